@@ -1,15 +1,39 @@
+import time
+START_TIME = time.perf_counter() # [STARTUP] Mốc đo thời gian khởi động (trước cả import pygame)
+
 import pygame
-import cv2
-import mediapipe as mp
-import math
 import random
-import os
+
+from handblast.engine import GRID_SIZE, SHAPE_CATALOG
+from handblast.game import GameState
+from handblast.layers import LayeredRenderer
+from handblast.sprites import BlockAtlas
+from handblast.surfaces import SurfacePool
+from handblast.solver import HintSearch
+from handblast.control import ControlLayout, HandController
+from handblast.filters import CursorFilter
+from handblast.power import POWER_PRESETS, PowerGovernor
+from handblast.replay import LandmarkRecorder, Recording, ReplaySource
+from handblast.shared import SharedHandSource
+from handblast.startup import BackgroundHandPipeline, StartupTimer
+from handblast.storage import Leaderboard, ScoreWriter, read_high_score, session_from_game
+from handblast.profiler import TOTAL, FrameProfiler, NULL_PROFILER, open_sink
 
 # ---------------- Config chung ----------------
-GRID_SIZE = 8
-CELL = 60
+# [BOARD] Cạnh lưới: GRID_SIZE (8) = luật gốc, 12 / 16... cho sự kiện. Vùng lưới giữ cạnh
+# GRID_AREA px, ô tự thu nhỏ theo BOARD_SIZE; bố cục bên dưới đều suy ra từ CELL.
+# Đo chi phí đặt khối theo kích thước: python benchmarks/bench_board_sizes.py
+BOARD_SIZE = GRID_SIZE
+GRID_AREA = 480
+CELL = min(60, GRID_AREA // BOARD_SIZE)
+TRAY_CELL = 30 # Ô của khối trong khay: cố định, không phụ thuộc kích thước lưới
 PADDING = 40 
 
+# [TRAY] PLAYABLE_TRAY = True: khay mới luôn có ít nhất một thứ tự đặt hết cả 3 khối trên lưới
+# hiện tại (handblast.trays); False = rút ngẫu nhiên như bản gốc. Chạy lại bản ghi thì theo bản ghi.
+# Chi phí lúc làm mới khay trên lưới dày: python benchmarks/bench_trays.py
+PLAYABLE_TRAY = False
+
 # [LAYOUT] Điều chỉnh kích thước cửa sổ chuẩn HD-ish cho thoáng
 WIDTH = 1080 
 HEIGHT = 720 
@@ -17,8 +41,8 @@ FPS = 30
 CORNER_RADIUS = 15 # Bo tròn mềm mại hơn
 
 # [LAYOUT] Tính toán vị trí Lưới (Căn giữa dọc, lệch trái)
-GRID_W = GRID_SIZE * CELL
-GRID_H = GRID_SIZE * CELL
+GRID_W = BOARD_SIZE * CELL
+GRID_H = BOARD_SIZE * CELL
 GRID_START_X = 60 # Cách mép trái 60px
 GRID_START_Y = (HEIGHT - GRID_H) // 2
 
@@ -42,112 +66,102 @@ BEST_COLOR = (255, 100, 100)
 VALID_HIGHLIGHT = (80, 255, 150)
 INVALID_HIGHLIGHT = (255, 80, 80)
 
+# [HINT] Nhấn H để bật/tắt gợi ý nước đi; xem EVALUATIONS trong handblast/solver.py
+HINT_EVALUATION = "balanced"
+HINT_FRAME_MARGIN = 0.004 # Chừa lại (giây) cho present() + clock.tick() trong mỗi frame
+
+# [PROFILE] Nhấn F3 để bật/tắt bảng thời gian từng giai đoạn của frame (p50/p95/p99/max, ms).
+# PROFILE_LOG = "frames.csv" hoặc "frames.jsonl": đo từ đầu và ghi mỗi frame ra file (kể cả khi ẩn bảng)
+PROFILE_LOG = None
+PROFILE_WINDOW = 300 # Số frame gần nhất dùng để tính phân vị
+PROFILE_REFRESH = 15 # Vẽ lại chữ của bảng mỗi bấy nhiêu frame
+PROFILE_STAGES = ("events", "hand", "logic", "hint", "compose", "overlay", "profile", "present", "tick",
+                  "cap.read", "hands.process", "hand.track", "hand_latency")
+
+# [REPLAY] RECORD_FILE = "session.hbr": ghi lại landmark đã dùng để chạy lại y hệt sau này.
+# REPLAY_FILE = "session.hbr": chạy lại bản ghi thay cho camera (REPLAY_SPEED = 2.0: nhanh gấp đôi)
+RECORD_FILE = None
+REPLAY_FILE = None
+REPLAY_SPEED = 1.0
+
 # ---------------- Khởi tạo Pygame ----------------
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Hand Block Blast")
+startup_timer = StartupTimer(START_TIME)
+startup_timer.mark("window")
 clock = pygame.time.Clock()
 # Font chữ
 font = pygame.font.SysFont("sansserif", 24, bold=True)
 bigfont = pygame.font.SysFont("sansserif", 48, bold=True)
 titlefont = pygame.font.SysFont("sansserif", 56, bold=True) # Font riêng cho tiêu đề
 medfont = pygame.font.SysFont("sansserif", 32, bold=True) 
+smallfont = pygame.font.SysFont("monospace", 13) # Bảng profiler
 
 # ---------------- MediaPipe Hands ----------------
-mpHands = mp.solutions.hands
-hands = mpHands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-cap = cv2.VideoCapture(0)
+# [STARTUP]: Camera + MediaPipe được dựng trên thread nền (handblast.startup), cửa sổ hiện ngay.
+# CAMERA = 0: index camera (hoặc đường dẫn video); đo khởi động: python benchmarks/bench_startup.py
+CAMERA = 0
+# [CAPTURE]: Độ phân giải / FPS / MJPG-YUYV / bộ đệm của camera, xem CAPTURE_PRESETS trong
+# handblast/capture.py ("default" = để driver tự chọn như cũ). "auto": lần đầu thử mọi ứng viên,
+# chọn cấu hình trễ thấp nhất còn đủ cho tracking, lưu vào CAPTURE_CACHE cho các lần sau.
+# Đo độ trễ thật (nháy màn hình trước camera): python tools/measure_latency.py
+CAPTURE = "auto"
+CAPTURE_CACHE = "capture.json"
+# [SERVER]: Nhiều cửa sổ trên một máy dùng chung camera + MediaPipe: chạy python tools/hand_server.py
+# rồi đặt HAND_SERVER = "hbb" (--name của server); CAMERA là camera của server muốn đọc. Cửa sổ
+# không tự mở camera / dựng model, chỉ đọc landmark mới nhất từ shared memory (handblast/shared.py)
+HAND_SERVER = None
+# [INFERENCE]: Chế độ suy luận, xem INFERENCE_PRESETS trong handblast/inference.py
+# ("default" = cấu hình cũ; "lite", "lite-half", "lite-roi"... nhẹ hơn cho máy yếu).
+# Đo độ trễ / độ rung của từng chế độ: python benchmarks/bench_inference_modes.py
+INFERENCE_MODE = "single"
+# [SCHEDULE]: Chỉ chạy MediaPipe khi cần, các frame khác bám ngón tay bằng optical flow,
+# xem SCHEDULE_PRESETS trong handblast/tracking.py ("always" = suy luận mọi frame như cũ).
+# Đo: python benchmarks/bench_tracking.py
+INFERENCE_SCHEDULE = "balanced"
+# [POWER]: Không thấy tay một lúc / màn hình Game Over -> giảm FPS vẽ và tần số suy luận,
+# thấy tay là về đủ FPS ngay frame sau. Xem POWER_PRESETS trong handblast/power.py
+# ("off" = luôn đủ FPS như cũ, "kiosk" = máy bật cả ngày). CPU từng chế độ in ra khi thoát
+POWER_MODE = "balanced"
 
 # ---------------- Xử lý Kỷ lục (High Score) ----------------
+# [STORAGE]: Ghi kỷ lục + bảng xếp hạng trên thread nền (handblast.storage.ScoreWriter),
+# ghi file tạm rồi os.replace nên tắt ngang không làm hỏng file. LEADERBOARD_FILE = None: không lưu các ván
 HIGHSCORE_FILE = "highscore.txt"
-
-def load_high_score():
-    if not os.path.exists(HIGHSCORE_FILE):
-        return 0
-    try:
-        with open(HIGHSCORE_FILE, "r") as f: 
-            return int(f.read())
-    except:
-        return 0
-
-def save_high_score(new_high):
-    with open(HIGHSCORE_FILE, "w") as f:
-        f.write(str(new_high))
-
-score = 0
-high_score = load_high_score()
-
-# ---------------- Lưới & Khối ----------------
-grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-
-BLOCK_SHAPES = [
-    [(0,0)], [(0,0),(1,0)], [(0,0),(1,0),(2,0)], [(0,0),(1,0),(2,0),(3,0)],
-    [(0,0),(1,0),(0,1),(1,1)], [(0,0),(0,1),(1,1)], [(0,0),(0,1),(0,2),(1,2)],
-    [(0,0),(1,0),(2,0),(1,1)], [(0,0),(1,0),(1,1),(2,1)], [(1,0),(2,0),(0,1),(1,1)],
-]
-
-def new_block():
-    shape = random.choice(BLOCK_SHAPES)
-    color_index = random.randrange(len(BLOCK_COLORS)) 
-    return {"shape": shape, "color_index": color_index, "color": BLOCK_COLORS[color_index]}
-
-def new_tray():
-    return [new_block(), new_block(), new_block()]
-
-tray = new_tray()
+LEADERBOARD_FILE = "leaderboard.db"
+score_writer = None # Tạo khi chạy game (không tạo khi file này chỉ được import, vd. bench_suite)
+
+# ---------------- Lưới, Khối & Điểm ----------------
+# [CORE]: Lưới, khay, điểm và Game Over nằm trong handblast.game.GameState (không phụ thuộc pygame).
+# Lưới lưu index màu: 0 = trống, 1..n = index trong BLOCK_COLORS + 1
+# Khay sinh từ random.Random(seed) để bản ghi (RECORD_FILE) chạy lại ra đúng các khối cũ
+replay_recording = Recording.load(REPLAY_FILE) if REPLAY_FILE else None
+if replay_recording and replay_recording.board_size != BOARD_SIZE:
+    raise SystemExit(f"{REPLAY_FILE} được ghi trên lưới {replay_recording.board_size}x{replay_recording.board_size}, "
+                     f"đặt BOARD_SIZE = {replay_recording.board_size} để chạy lại")
+game_seed = replay_recording.seed if replay_recording else random.randrange(2**63)
+game = GameState(rng=random.Random(game_seed), high_score=read_high_score(HIGHSCORE_FILE), num_colors=len(BLOCK_COLORS), size=BOARD_SIZE,
+                 playable_tray=replay_recording.playable_tray if replay_recording else PLAYABLE_TRAY)
+
+# [LAYOUT] Bảng điểm: vị trí Y cố định (dưới tiêu đề)
+SCORE_Y = 140
+SCORE_PANEL_HEIGHT = 140
 
 # [LAYOUT] Cấu hình vị trí Khay (Tray) dựa trên UI Panel
 TRAY_START_Y = 320 # Vị trí bắt đầu vẽ khay (bên dưới bảng điểm)
 TRAY_SPACING = 130 # Khoảng cách giữa các khối
+TRAY_SLOT_HEIGHT = 110
 
 # ---------------- Logic Game ----------------
-def can_place(grid, block, gx, gy):
-    for dx, dy in block["shape"]:
-        x = gx + dx
-        y = gy + dy
-        if x < 0 or y < 0 or x >= GRID_SIZE or y >= GRID_SIZE: return False
-        if grid[y][x] != 0: return False
-    return True
-
-def place_block(grid, block, gx, gy):
-    global score, high_score
-    placed_cells = 0
-    
-    color_id = block["color_index"] + 1 
-    
-    for dx, dy in block["shape"]:
-        x = gx + dx
-        y = gy + dy
-        grid[y][x] = color_id
-        placed_cells += 1
-    score += placed_cells 
-
-    full_rows = [r for r in range(GRID_SIZE) if all(grid[r][c] != 0 for c in range(GRID_SIZE))]
-    full_cols = [c for c in range(GRID_SIZE) if all(grid[r][c] != 0 for r in range(GRID_SIZE))]
-
-    combo = 0
-    for r in full_rows:
-        for c in range(GRID_SIZE): grid[r][c] = 0
-        combo += 1
-    for c in full_cols:
-        for r in range(GRID_SIZE): grid[r][c] = 0
-        combo += 1
-    if combo > 0: score += combo * GRID_SIZE
-    
-    if score > high_score:
-        high_score = score
-        save_high_score(high_score)
-        
+def place_block(slot, gx, gy):
+    # Đặt khối qua GameState; vừa phá kỷ lục thì gửi cho thread ghi (không chờ đĩa)
+    old_high = game.high_score
+    combo = game.place_block(slot, gx, gy)
+    if game.high_score > old_high and score_writer is not None:
+        score_writer.submit_high_score(game.high_score)
     return combo
 
-def any_moves_available(grid, tray):
-    for i, block in enumerate(tray):
-        if block is None: continue
-        for gy in range(GRID_SIZE):
-            for gx in range(GRID_SIZE):
-                if can_place(grid, block, gx, gy): return True
-    return False
-
 # ---------------- Vẽ ----------------
 
 def draw_styled_block(surface, color, x, y, size):
@@ -159,7 +173,23 @@ def draw_styled_block(surface, color, x, y, size):
     pygame.draw.line(surface, highlight_color, (x + 3, y + 3), (x + size - 4, y + 3), 2)
     pygame.draw.line(surface, highlight_color, (x + 3, y + 3), (x + 3, y + size - 4), 2)
 
-def draw_grid(surface):
+def render_block_sprite(surface, color, size, highlight):
+    draw_styled_block(surface, color, 0, 0, size)
+    if highlight is not None:
+        # Viền valid/invalid dùng cho khối đang kéo
+        pygame.draw.rect(surface, highlight, (0, 0, size, size), 4, border_radius=CORNER_RADIUS - 4)
+
+# [ATLAS]: Mỗi ô khối được vẽ sẵn thành sprite, vẽ ô = 1 lần blit
+GRID_BLOCK_SIZE = CELL - 4
+TRAY_BLOCK_SIZE = TRAY_CELL - 2
+block_atlas = BlockAtlas(render_block_sprite, BLOCK_COLORS)
+block_atlas.warm((GRID_BLOCK_SIZE, TRAY_BLOCK_SIZE))
+block_atlas.warm((GRID_BLOCK_SIZE,), (VALID_HIGHLIGHT, INVALID_HIGHLIGHT))
+
+# [POOL]: Surface cho khối đang kéo / lớp phủ Game Over được dùng lại, không tạo mới mỗi frame
+surface_pool = SurfacePool()
+
+def draw_grid_frame(surface):
     # Khung bao quanh lưới
     outer_rect = pygame.Rect(GRID_START_X - 15, GRID_START_Y - 15, GRID_W + 30, GRID_H + 30)
     pygame.draw.rect(surface, FRAME_BLUE, outer_rect, border_radius=CORNER_RADIUS + 5)
@@ -168,18 +198,18 @@ def draw_grid(surface):
     # Nền lưới
     pygame.draw.rect(surface, GRID_AREA_BG, (GRID_START_X, GRID_START_Y, GRID_W, GRID_H), border_radius=CORNER_RADIUS)
 
-    for r in range(GRID_SIZE):
-        for c in range(GRID_SIZE):
+def draw_grid(surface):
+    for r in range(BOARD_SIZE):
+        for c in range(BOARD_SIZE):
             x = GRID_START_X + c * CELL + 2
             y = GRID_START_Y + r * CELL + 2
-            size = CELL - 4
+            size = GRID_BLOCK_SIZE
             
-            cell_value = grid[r][c]
+            cell_value = game.grid.cell(r, c)
             
             if cell_value != 0:
                 color_index = cell_value - 1
-                color = BLOCK_COLORS[color_index] 
-                draw_styled_block(surface, color, x, y, size)
+                surface.blit(block_atlas.get(color_index, size), (x, y))
             else:
                 empty_rect = pygame.Rect(x, y, size, size)
                 pygame.draw.rect(surface, GRID_AREA_BG, empty_rect, border_radius=CORNER_RADIUS - 5)
@@ -202,43 +232,46 @@ def draw_title(surface):
     surface.blit(title_text, (x_pos, y_pos))
 
 
-def draw_score(surface):
-    SCORE_Y = 140 # Vị trí Y cố định cho bảng điểm (dưới tiêu đề)
-    PANEL_HEIGHT = 140
-    
+def draw_score_panel(surface):
     # Khung bảng điểm
-    score_rect = pygame.Rect(UI_START_X, SCORE_Y, UI_WIDTH, PANEL_HEIGHT)
+    score_rect = pygame.Rect(UI_START_X, SCORE_Y, UI_WIDTH, SCORE_PANEL_HEIGHT)
     pygame.draw.rect(surface, FRAME_BLUE, score_rect, border_radius=CORNER_RADIUS)
     pygame.draw.rect(surface, (50, 60, 90), score_rect, 2, border_radius=CORNER_RADIUS) 
 
     # Chia đôi bảng điểm: Trái (Score) - Phải (Best)
     center_div = UI_START_X + UI_WIDTH // 2
-    pygame.draw.line(surface, (50, 60, 90), (center_div, SCORE_Y + 10), (center_div, SCORE_Y + PANEL_HEIGHT - 10), 2)
+    pygame.draw.line(surface, (50, 60, 90), (center_div, SCORE_Y + 10), (center_div, SCORE_Y + SCORE_PANEL_HEIGHT - 10), 2)
 
-    # --- SCORE (Trái) ---
     lbl_score = font.render("SCORE", True, (200, 200, 200))
-    val_score = bigfont.render(str(score), True, SCORE_COLOR)
-    
     surface.blit(lbl_score, (UI_START_X + (UI_WIDTH//4) - lbl_score.get_width()//2, SCORE_Y + 20))
+    lbl_best = font.render("BEST", True, (200, 200, 200))
+    surface.blit(lbl_best, (center_div + (UI_WIDTH//4) - lbl_best.get_width()//2, SCORE_Y + 20))
+
+def draw_score(surface):
+    center_div = UI_START_X + UI_WIDTH // 2
+
+    # --- SCORE (Trái) ---
+    val_score = bigfont.render(str(game.score), True, SCORE_COLOR)
     surface.blit(val_score, (UI_START_X + (UI_WIDTH//4) - val_score.get_width()//2, SCORE_Y + 60))
     
     # --- BEST (Phải) ---
-    lbl_best = font.render("BEST", True, (200, 200, 200))
-    val_best = bigfont.render(str(high_score), True, BEST_COLOR)
-    
-    surface.blit(lbl_best, (center_div + (UI_WIDTH//4) - lbl_best.get_width()//2, SCORE_Y + 20))
+    val_best = bigfont.render(str(game.high_score), True, BEST_COLOR)
     surface.blit(val_best, (center_div + (UI_WIDTH//4) - val_best.get_width()//2, SCORE_Y + 60))
 
 
-def draw_tray(surface, tray):
-    for i, block in enumerate(tray):
+def draw_tray_slots(surface):
+    for i in range(3):
         y = TRAY_START_Y + i*TRAY_SPACING
         
         # Vẽ nền cho từng khối (Tray Slot)
-        slot_rect = pygame.Rect(UI_START_X, y, UI_WIDTH, 110)
+        slot_rect = pygame.Rect(UI_START_X, y, UI_WIDTH, TRAY_SLOT_HEIGHT)
         pygame.draw.rect(surface, (25, 30, 50), slot_rect, border_radius=CORNER_RADIUS) # Nền tối hơn chút
         pygame.draw.rect(surface, (40, 50, 80), slot_rect, 1, border_radius=CORNER_RADIUS) # Viền mờ
 
+def draw_tray(surface, tray):
+    for i, block in enumerate(tray):
+        y = TRAY_START_Y + i*TRAY_SPACING
+
         if block is None:
             # Vẽ chữ USED hoặc icon mờ
             empty = medfont.render("---", True, (60, 60, 80))
@@ -246,187 +279,318 @@ def draw_tray(surface, tray):
             continue
             
         # Tính toán vị trí để căn giữa khối trong slot
-        # 1. Tìm kích thước thực của khối
-        block_w = 0
-        block_h = 0
-        shapes = block["shape"]
-        if shapes:
-            max_x = max(p[0] for p in shapes)
-            max_y = max(p[1] for p in shapes)
-            block_w = (max_x + 1) * (CELL // 2 + 3)
-            block_h = (max_y + 1) * (CELL // 2 + 3)
+        # 1. Kích thước thực của khối: hộp bao tính sẵn trong SHAPE_CATALOG
+        info = SHAPE_CATALOG[block["shape_id"]]
+        block_w = info.width * (TRAY_CELL + 3)
+        block_h = info.height * (TRAY_CELL + 3)
         
         # 2. Tính offset để căn giữa
         start_x = UI_CENTER_X - block_w // 2
-        start_y = y + (110 - block_h) // 2
+        start_y = y + (TRAY_SLOT_HEIGHT - block_h) // 2
         
-        block_color = block["color"]
+        sprite = block_atlas.get(block["color_index"], TRAY_BLOCK_SIZE)
         
-        for dx, dy in shapes:
-            rx = start_x + dx * (CELL // 2 + 3) 
-            ry = start_y + dy * (CELL // 2 + 3)
-            size = CELL // 2 - 2
-            draw_styled_block(surface, block_color, rx, ry, size)
+        for dx, dy in info.cells:
+            rx = start_x + dx * (TRAY_CELL + 3) 
+            ry = start_y + dy * (TRAY_CELL + 3)
+            surface.blit(sprite, (rx, ry))
 
 
-# ---------------- Điều khiển Tay ----------------
-holding = False
-held_block_index = None
-held_block = None
-cursor_x, cursor_y = WIDTH//2, HEIGHT//2
-thumb_x, thumb_y = WIDTH//2, HEIGHT//2
-hand_detected = False
-DIST_THRESHOLD = 40 
+def draw_game_over(surface):
+    if not game_over: return
+    overlay = surface_pool.get((WIDTH, HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    surface.blit(overlay, (0, 0))
 
-def update_hand_control(frame):
-    global holding, held_block_index, held_block, cursor_x, cursor_y, thumb_x, thumb_y, hand_detected
+    box_w, box_h = 400, 250
+    box_x, box_y = (WIDTH - box_w)//2, (HEIGHT - box_h)//2
+    
+    pygame.draw.rect(surface, FRAME_BLUE, (box_x, box_y, box_w, box_h), border_radius=20)
+    pygame.draw.rect(surface, HIGHLIGHT_GLOW, (box_x, box_y, box_w, box_h), 2, border_radius=20)
     
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
+    msg1 = bigfont.render("GAME OVER", True, BEST_COLOR)
+    msg2 = medfont.render(f"Final Score: {game.score}", True, TEXT)
+    msg3 = font.render("Press 'R' to Restart", True, (200, 200, 200))
+    
+    surface.blit(msg1, (WIDTH//2 - msg1.get_width()//2, box_y + 40))
+    surface.blit(msg2, (WIDTH//2 - msg2.get_width()//2, box_y + 110))
+    surface.blit(msg3, (WIDTH//2 - msg3.get_width()//2, box_y + 180))
 
-    if results.multi_hand_landmarks:
-        hand_detected = True
-        hand = results.multi_hand_landmarks[0]
-        
-        ix, iy = int(hand.landmark[8].x * WIDTH), int(hand.landmark[8].y * HEIGHT)
-        tx, ty = int(hand.landmark[4].x * WIDTH), int(hand.landmark[4].y * HEIGHT)
-        
-        cursor_x, cursor_y = ix, iy
-        thumb_x, thumb_y = tx, ty
-        dist = math.hypot(ix - tx, iy - ty)
 
-        def hovered_tray_index(x, y):
-            # Kiểm tra xem con trỏ có nằm trong vùng Panel bên phải không
-            if x < UI_START_X or x > UI_START_X + UI_WIDTH: return None
-            
-            for i in range(len(tray)):
-                ty0 = TRAY_START_Y + i*TRAY_SPACING 
-                ty1 = ty0 + 110 # Chiều cao của slot
-                if ty0 <= y <= ty1: return i
-            return None
-
-        if dist < DIST_THRESHOLD:
-            if not holding:
-                idx = hovered_tray_index(cursor_x, cursor_y)
-                if idx is not None and tray[idx] is not None:
-                    holding = True
-                    held_block_index = idx
-                    held_block = tray[idx]
-        else:
-            if holding:
-                # Logic thả khối vào lưới
-                gx = (cursor_x - GRID_START_X) // CELL
-                gy = (cursor_y - GRID_START_Y) // CELL
-                if held_block is not None and 0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE:
-                    if can_place(grid, held_block, gx, gy):
-                        place_block(grid, held_block, gx, gy)
-                        if held_block_index is not None: tray[held_block_index] = None
-                        if all(b is None for b in tray): tray[:] = new_tray()
-                holding = False
-                held_block = None
-                held_block_index = None
-    else:
-        hand_detected = False
-        if holding:
-             holding = False
-             held_block = None
-             held_block_index = None
+def draw_block_preview(surface, block, gx, gy, highlight_color):
+    # Khối trong suốt neo tại ô (gx, gy) của lưới, dùng cho khối đang kéo và gợi ý
+    sprite = block_atlas.get(block["color_index"], GRID_BLOCK_SIZE, highlight_color)
+    
+    # Surface chỉ lớn bằng hộp bao của khối, lấy từ pool theo kích thước
+    info = SHAPE_CATALOG[block["shape_id"]]
+    temp_surface = surface_pool.get(((info.width - 1)*CELL + GRID_BLOCK_SIZE, (info.height - 1)*CELL + GRID_BLOCK_SIZE), pygame.SRCALPHA)
+    temp_surface.fill((0, 0, 0, 0))
+    
+    for dx, dy in info.cells:
+        temp_surface.blit(sprite, (dx*CELL, dy*CELL))
+    
+    temp_surface.set_alpha(180)
+    return surface.blit(temp_surface, (GRID_START_X + gx*CELL + 2, GRID_START_Y + gy*CELL + 2))
+
+
+def render_profile(summary, extra_rows=()):
+    # Bảng profiler (đặt phía trên lưới): 2 cột, mỗi dòng "giai đoạn p50 p95 p99 max" (ms),
+    # extra_rows: các dòng chữ thêm vào cuối (bộ đếm suy luận / bám)
+    panel = surface_pool.get((GRID_W, GRID_START_Y - 24), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    rows = [f"{name[:13]:13s} {p50:5.1f} {p95:5.1f} {p99:5.1f} {worst:5.1f}"
+            for name in PROFILE_STAGES + (TOTAL,) if name in summary
+            for p50, p95, p99, worst in (summary[name],)] + list(extra_rows)
+    header = f"{'ms':13s} {'p50':>5s} {'p95':>5s} {'p99':>5s} {'max':>5s}"
+    per_column = (len(rows) + 1) // 2
+    # Nhiều dòng thì dòng sát lại cho vừa bảng
+    line_h = min(smallfont.get_linesize(), (panel.get_height() - 4) // (per_column + 1))
+    for col in range(2):
+        x = 6 + col * (GRID_W // 2)
+        panel.blit(smallfont.render(header, True, HIGHLIGHT_GLOW), (x, 4))
+        for i, row in enumerate(rows[col * per_column:(col + 1) * per_column]):
+            panel.blit(smallfont.render(row, True, TEXT), (x, 4 + (i + 1) * line_h))
+    return panel
+
+
+def draw_loading(surface, status):
+    # [STARTUP] Dòng trạng thái khi camera / model còn đang tải (vẽ đè lên lưới), trả về vùng đã vẽ
+    text = font.render(status, True, HIGHLIGHT_GLOW)
+    box = text.get_rect(center=(GRID_START_X + GRID_W // 2, GRID_START_Y + GRID_H // 2)).inflate(32, 20)
+    pygame.draw.rect(surface, DARK_BG, box, border_radius=10)
+    pygame.draw.rect(surface, FRAME_BLUE, box, 2, border_radius=10)
+    surface.blit(text, text.get_rect(center=box.center))
+    return box
+
+
+def scene_key(status, hint_move):
+    # [POWER] Mọi thứ quyết định khung hình; không đổi thì khỏi ghép / đẩy ra màn hình
+    tray = tuple(None if b is None else (b["shape_id"], b["color_index"]) for b in game.tray)
+    hand = (control.cursor_x, control.cursor_y, control.thumb_x, control.thumb_y) if control.hand_detected else None
+    return (game.grid.occupied, bytes(game.grid.colors), tray, game.score, game.high_score, game_over,
+            hand, control.holding, control.held_block_index, status, hint_move)
+
+
+def draw_static(surface):
+    # [LAYER] Lớp tĩnh: chỉ vẽ một lần khi khởi động
+    surface.fill(DARK_BG)
+    draw_grid_frame(surface)
+    draw_title(surface)
+    draw_score_panel(surface)
+    draw_tray_slots(surface)
 
-# ---------------- Game loop ----------------
-running = True
-game_over = False
 
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+# ---------------- Điều khiển Tay ----------------
+# [CONTROL]: Véo / kéo / thả nằm trong handblast.control.HandController (dùng chung với replay)
+DIST_THRESHOLD = 40 
+PINCH_HYSTERESIS = 1.25 # Đang giữ khối: phải mở xa hơn DIST_THRESHOLD * hệ số này mới thả
+# [FILTER] Lọc rung + bù trễ cho con trỏ, xem CURSOR_FILTERS trong handblast/filters.py ("raw" = không lọc).
+# So sánh độ trễ / độ rung: python benchmarks/bench_filters.py
+CURSOR_FILTER = "one-euro+predict"
+CURSOR_DISPLAY_LEAD = 0.5 / FPS # Ước lượng từ lúc xử lý sample tới lúc frame lên màn hình (giây)
+CONTROL_LAYOUT = ControlLayout(WIDTH, HEIGHT, GRID_START_X, GRID_START_Y, CELL, UI_START_X, UI_START_X + UI_WIDTH,
+                               TRAY_START_Y, TRAY_SPACING, TRAY_SLOT_HEIGHT, DIST_THRESHOLD, DIST_THRESHOLD * PINCH_HYSTERESIS)
+control = HandController(game, replay_recording.layout if replay_recording else CONTROL_LAYOUT, place=place_block)
+cursor_filter = CursorFilter(CURSOR_FILTER)
 
-    screen.fill(DARK_BG) 
+# ---------------- Game loop ----------------
+# [BENCH]: Chỉ chạy khi mở trực tiếp; benchmarks/bench_suite.py import file này để đo các hàm vẽ / điều khiển
+if __name__ == "__main__":
+    running = True
+    game_over = False
+
+    # [PIPELINE]: Camera + MediaPipe chạy trên thread riêng, vòng lặp chỉ lấy kết quả mới nhất
+    # (hoặc ReplaySource nhả lại từng sample của bản ghi)
+    if replay_recording:
+        camera = None
+        pipeline = ReplaySource(replay_recording, REPLAY_SPEED).start()
+    elif HAND_SERVER:
+        # Landmark từ server dùng chung (camera của server: chưa lọc; server nhả lại bản ghi: đã lọc)
+        camera = pipeline = SharedHandSource(HAND_SERVER, CAMERA, startup_timer).start()
+    else:
+        # Mở camera + nạp model chạy nền; trong lúc đó vẫn vẽ game và dòng trạng thái camera.status
+        camera = pipeline = BackgroundHandPipeline(CAMERA, INFERENCE_MODE, INFERENCE_SCHEDULE, control.layout, startup_timer,
+                                                         CAPTURE, CAPTURE_CACHE).start()
+    recorder = LandmarkRecorder(game_seed, control.layout, playable_tray=game.playable_tray) if RECORD_FILE else None
+    # Chạy lại bản ghi không ghi kỷ lục / bảng xếp hạng
+    score_writer = None if replay_recording else ScoreWriter(HIGHSCORE_FILE, LEADERBOARD_FILE).start()
+    session_start = time.perf_counter()
+    last_hand_seq = 0
+
+    # [LAYER]: Chỉ vẽ lại lớp nào có state đổi, chỉ đẩy các vùng bẩn ra màn hình
+    renderer = LayeredRenderer(screen, draw_static)
+    renderer.add_layer((GRID_START_X, GRID_START_Y, GRID_W, GRID_H), draw_grid,
+                       lambda: (game.grid.occupied, bytes(game.grid.colors)))
+    renderer.add_layer((UI_START_X + 4, SCORE_Y + 50, UI_WIDTH - 8, SCORE_PANEL_HEIGHT - 60), draw_score,
+                       lambda: (game.score, game.high_score))
+    renderer.add_layer((UI_START_X, TRAY_START_Y, UI_WIDTH, 2*TRAY_SPACING + TRAY_SLOT_HEIGHT), lambda s: draw_tray(s, game.tray),
+                       lambda: tuple(None if b is None else (b["shape_id"], b["color_index"]) for b in game.tray))
+    renderer.add_layer((0, 0, WIDTH, HEIGHT), draw_game_over, lambda: (game_over, game.score))
+
+    # [HINT]: Tìm nước đi tốt nhất bằng thời gian thừa của mỗi frame, tạo lại khi lưới/khay đổi
+    show_hint = False
+    hint = None
+    hint_key = None
+    hint_cache = {}
+
+    # [PROFILE]: NULL_PROFILER (không làm gì) khi ẩn bảng và không ghi file
+    show_profile = False
+    profile_panel = None
+    profiler = FrameProfiler(PROFILE_WINDOW, open_sink(PROFILE_LOG, PROFILE_STAGES)) if PROFILE_LOG else NULL_PROFILER
+
+    # [POWER]: Chạy lại bản ghi giữ đúng nhịp lúc ghi
+    power = PowerGovernor(POWER_PRESETS["off" if replay_recording else POWER_MODE], FPS)
+    last_scene = None
+
+    while running:
+        profiler.begin_frame()
+        frame_start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                renderer.invalidate()
+                last_scene = None
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                show_hint = not show_hint
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_profile = not show_profile
+                profile_panel = None
+                last_scene = None # tắt bảng thì phải vẽ lại vùng bảng
+                if show_profile and not profiler.enabled:
+                    profiler = FrameProfiler(PROFILE_WINDOW)
+                    profiler.begin_frame()
+                elif not show_profile and not PROFILE_LOG:
+                    profiler = NULL_PROFILER
+        profiler.mark("events")
+
+        sample = pipeline.latest()
+        if sample is not None and sample.seq != last_hand_seq:
+            last_hand_seq = sample.seq
+            if sample.points is not None: startup_timer.mark("first_hand")
+            # Hai giai đoạn chạy ở thread nền + độ trễ từ lúc chụp tới lúc frame này dùng kết quả
+            if camera is not None and camera.tracker is not None: # HAND_SERVER: đo ở server, không có ở đây
+                profiler.record("cap.read", pipeline.grabber.read_time)
+                # Frame được bám bằng optical flow thì không tính vào hands.process
+                profiler.record("hands.process" if camera.tracker.last_inferred else "hand.track", pipeline.worker.detect_time)
+            profiler.record("hand_latency", time.perf_counter() - sample.captured_at)
+            if not pipeline.filtered:
+                # Bản ghi (kể cả khi server nhả lại bản ghi) lưu sample ĐÃ lọc, nên không lọc lại
+                sample = cursor_filter.apply(sample, time.perf_counter() + CURSOR_DISPLAY_LEAD)
+            control.update(sample)
+            if recorder is not None: recorder.add(sample)
+        profiler.mark("hand")
+
+        if not game_over and game.is_game_over():
+            game_over = True
+            if score_writer is not None: score_writer.submit_session(session_from_game(game, session_start))
+
+        if game_over:
+            keys = pygame.key.get_pressed()
+            if keys[pygame.K_r] or (replay_recording and pipeline.take_reset()):
+                game.reset()
+                session_start = time.perf_counter()
+                control.release()
+                if recorder is not None: recorder.mark_reset()
+                game_over = False
+        power.update(control.hand_detected, game_over)
+        pipeline.throttle(power.detect_interval)
+        profiler.mark("logic")
+
+        hint_move = None
+        if show_hint and not game_over:
+            key = (game.grid.occupied, tuple(None if b is None else b["shape_id"] for b in game.tray))
+            if key != hint_key:
+                hint_key = key
+                hint = HintSearch(game.grid.occupied, game.tray, HINT_EVALUATION, hint_cache, game.size, game.line_bonus)
+            budget = 1 / FPS - (time.perf_counter() - frame_start) - HINT_FRAME_MARGIN
+            if budget > 0: hint.step(budget)
+            hint_move = hint.first_move()
+        profiler.mark("hint")
+
+        # Khung hình y hệt frame trước (và không mở bảng profiler): không vẽ gì, chỉ chờ
+        status = camera.status if camera is not None else None
+        scene = scene_key(status, hint_move)
+        redraw = show_profile or scene != last_scene
+        power.count_frame(redraw)
+        if not redraw:
+            power.wait(clock, pipeline.hand_event)
+            profiler.mark("tick")
+            profiler.end_frame()
+            continue
+        last_scene = scene
 
-    draw_grid(screen) # Vẽ lưới bên trái
-    
-    # Vẽ Dashboard bên phải
-    draw_title(screen)
-    draw_score(screen)
-    draw_tray(screen, tray)
-    
-    if holding and held_block is not None:
-        gx = (cursor_x - GRID_START_X) // CELL
-        gy = (cursor_y - GRID_START_Y) // CELL
-        valid = 0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE and can_place(grid, held_block, gx, gy)
-        
-        drag_color = held_block["color"] 
-        
-        temp_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        temp_surface.fill((0, 0, 0, 0))
-        
-        for dx, dy in held_block["shape"]:
-            x = GRID_START_X + (gx + dx)*CELL + 2
-            y = GRID_START_Y + (gy + dy)*CELL + 2
-            size = CELL - 4
-            
-            draw_styled_block(temp_surface, drag_color, x, y, size)
-            
-            rect = pygame.Rect(x, y, size, size)
-            highlight_color = VALID_HIGHLIGHT if valid else INVALID_HIGHLIGHT
-            pygame.draw.rect(temp_surface, highlight_color, rect, 4, border_radius=CORNER_RADIUS - 4)
-        
-        temp_surface.set_alpha(180)
-        screen.blit(temp_surface, (0, 0))
+        # Lưới, tiêu đề, bảng điểm, khay: lấy từ cache, chỉ ghép lại phần đã đổi
+        renderer.begin_frame()
+        profiler.mark("compose")
 
+        if hint_move is not None and not control.holding:
+            slot, gx, gy = hint_move
+            renderer.overlay(draw_block_preview(screen, game.tray[slot], gx, gy, VALID_HIGHLIGHT))
 
-    if hand_detected:
-        cursor_color = (255, 50, 50) if holding else HIGHLIGHT_GLOW 
-        
-        # Đường nối ngón tay
-        pygame.draw.line(screen, (80, 80, 120), (thumb_x, thumb_y), (cursor_x, cursor_y), 2)
+        if control.holding and control.held_block is not None:
+            gx, gy = control.grid_cell(control.cursor_x, control.cursor_y)
+            valid = game.can_place(control.held_block_index, gx, gy)
         
-        # Ngón cái
-        pygame.draw.circle(screen, FRAME_BLUE, (thumb_x, thumb_y), 8)
-        pygame.draw.circle(screen, (200, 200, 255), (thumb_x, thumb_y), 4)
-        
-        # Ngón trỏ (Con trỏ chính)
-        pygame.draw.circle(screen, DARK_BG, (cursor_x, cursor_y), 12) # Viền nền
-        pygame.draw.circle(screen, cursor_color, (cursor_x, cursor_y), 10) # Màu chính
-        pygame.draw.circle(screen, (255, 255, 255), (cursor_x, cursor_y), 12, 1) # Viền trắng mỏng
-
-    if not game_over and not any_moves_available(grid, tray):
-        game_over = True
+            highlight_color = VALID_HIGHLIGHT if valid else INVALID_HIGHLIGHT
+            renderer.overlay(draw_block_preview(screen, control.held_block, gx, gy, highlight_color))
 
-    if game_over:
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
 
-        box_w, box_h = 400, 250
-        box_x, box_y = (WIDTH - box_w)//2, (HEIGHT - box_h)//2
+        if control.hand_detected:
+            cursor_x, cursor_y = control.cursor_x, control.cursor_y
+            thumb_x, thumb_y = control.thumb_x, control.thumb_y
+            cursor_color = (255, 50, 50) if control.holding else HIGHLIGHT_GLOW 
         
-        pygame.draw.rect(screen, FRAME_BLUE, (box_x, box_y, box_w, box_h), border_radius=20)
-        pygame.draw.rect(screen, HIGHLIGHT_GLOW, (box_x, box_y, box_w, box_h), 2, border_radius=20)
+            # Đường nối ngón tay
+            line_rect = pygame.draw.line(screen, (80, 80, 120), (thumb_x, thumb_y), (cursor_x, cursor_y), 2)
         
-        msg1 = bigfont.render("GAME OVER", True, BEST_COLOR)
-        msg2 = medfont.render(f"Final Score: {score}", True, TEXT)
-        msg3 = font.render("Press 'R' to Restart", True, (200, 200, 200))
+            # Ngón cái
+            thumb_rect = pygame.draw.circle(screen, FRAME_BLUE, (thumb_x, thumb_y), 8)
+            pygame.draw.circle(screen, (200, 200, 255), (thumb_x, thumb_y), 4)
         
-        screen.blit(msg1, (WIDTH//2 - msg1.get_width()//2, box_y + 40))
-        screen.blit(msg2, (WIDTH//2 - msg2.get_width()//2, box_y + 110))
-        screen.blit(msg3, (WIDTH//2 - msg3.get_width()//2, box_y + 180))
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_r]:
-            grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-            tray = new_tray()
-            score = 0
-            game_over = False
-
-    pygame.display.flip()
-
-    ret, frame = cap.read()
-    if ret:
-        update_hand_control(frame)
+            # Ngón trỏ (Con trỏ chính)
+            cursor_rect = pygame.draw.circle(screen, DARK_BG, (cursor_x, cursor_y), 12) # Viền nền
+            pygame.draw.circle(screen, cursor_color, (cursor_x, cursor_y), 10) # Màu chính
+            pygame.draw.circle(screen, (255, 255, 255), (cursor_x, cursor_y), 12, 1) # Viền trắng mỏng
+            renderer.overlay(line_rect.unionall([thumb_rect, cursor_rect]))
+        profiler.mark("overlay")
+
+        if show_profile:
+            if profile_panel is None or profiler.frames % PROFILE_REFRESH == 0:
+                tracker = camera.tracker if camera is not None else None
+                counters = () if tracker is None else (f"{'infer/track':13s} {tracker.frames_inferred:5d} {tracker.frames_tracked:5d}",)
+                cpu = power.stats[power.mode].cpu_per_minute
+                counters += (f"{power.mode:13s} {cpu:5.1f} s CPU/min",)
+                profile_panel = render_profile(profiler.summary(), counters)
+            renderer.overlay(screen.blit(profile_panel, (GRID_START_X, 6)))
+            profiler.mark("profile")
+
+        if status:
+            renderer.overlay(draw_loading(screen, status))
+
+        renderer.present()
+        startup_timer.mark("first_frame")
+        profiler.mark("present")
     
-    clock.tick(FPS)
-
-cap.release()
-pygame.quit()
\ No newline at end of file
+        power.wait(clock, pipeline.hand_event)
+        profiler.mark("tick")
+        profiler.end_frame()
+
+    pipeline.stop()
+    profiler.close()
+    if score_writer is not None:
+        # Ván đang chơi dở cũng được lưu
+        if not game_over and game.moves_made: score_writer.submit_session(session_from_game(game, session_start))
+        score_writer.close()
+        if LEADERBOARD_FILE:
+            leaderboard = Leaderboard(LEADERBOARD_FILE)
+            print("Top 5:", ", ".join(f"{s.score} ({s.moves} nước)" for s in leaderboard.top(5)))
+            leaderboard.close()
+    if recorder is not None:
+        recorder.save(RECORD_FILE, game)
+        print(f"Đã ghi {len(recorder)} frame vào {RECORD_FILE}")
+    print("Khởi động:", startup_timer.report())
+    if camera is not None: print("Camera:", camera.capture_report())
+    print("Điện năng:", power.report())
+    print("SurfacePool:", surface_pool.stats())
+    pygame.quit()
\ No newline at end of file
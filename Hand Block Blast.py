@@ -1,18 +1,38 @@
+import time
+START_TIME = time.perf_counter() # [STARTUP] Mốc đo thời gian khởi động (trước cả import pygame)
+
 import pygame
-import cv2
-import mediapipe as mp
 import math
 import random
-import os
+
+from handblast.engine import GRID_SIZE
+from handblast.game import GameState
+from handblast.surfaces import SurfacePool
+from handblast.control import ControlLayout, HandController
+from handblast.filters import CursorFilter
+from handblast.power import POWER_PRESETS, PowerGovernor
+from handblast.replay import LandmarkRecorder, Recording, ReplaySource
+from handblast.shared import SharedHandSource
+from handblast.startup import BackgroundHandPipeline, StartupTimer
+from handblast.storage import Leaderboard, ScoreWriter, read_high_score, session_from_game
 
 # ---------------- Config chung ----------------
-GRID_SIZE = 8
-CELL = 60
+# [BOARD] Cạnh lưới: GRID_SIZE (8) = luật gốc, 12 / 16... cho sự kiện. Lưới giữ cạnh GRID_AREA px
+# (cửa sổ không đổi), ô tự thu nhỏ theo BOARD_SIZE
+BOARD_SIZE = GRID_SIZE
+GRID_AREA = 480
+CELL = min(60, GRID_AREA // BOARD_SIZE)
+TRAY_CELL = 30 # Ô của khối trong khay: cố định, không phụ thuộc kích thước lưới
 PADDING = 20
-WIDTH = PADDING*2 + GRID_SIZE*CELL + 300 
-HEIGHT = PADDING*2 + GRID_SIZE*CELL
+WIDTH = PADDING*2 + BOARD_SIZE*CELL + 300 
+HEIGHT = PADDING*2 + BOARD_SIZE*CELL
 FPS = 60
 
+# [TRAY] PLAYABLE_TRAY = True: khay mới luôn có ít nhất một thứ tự đặt hết cả 3 khối trên lưới
+# hiện tại (handblast.trays); False = rút ngẫu nhiên như bản gốc. Chạy lại bản ghi thì theo bản ghi.
+# Chi phí lúc làm mới khay trên lưới dày: python benchmarks/bench_trays.py
+PLAYABLE_TRAY = False
+
 BG = (245, 245, 245)
 GRID_BG = (230, 230, 230)
 GRID_LINE = (200, 200, 200)
@@ -22,127 +42,98 @@ TEXT = (30, 30, 30)
 VALID_HIGHLIGHT = (120, 255, 160)
 INVALID_HIGHLIGHT = (255, 140, 140)
 
+# [REPLAY] RECORD_FILE = "session.hbr": ghi lại landmark đã dùng để chạy lại y hệt sau này.
+# REPLAY_FILE = "session.hbr": chạy lại bản ghi thay cho camera (REPLAY_SPEED = 2.0: nhanh gấp đôi)
+RECORD_FILE = None
+REPLAY_FILE = None
+REPLAY_SPEED = 1.0
+
 # ---------------- Khởi tạo Pygame ----------------
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Hand Block Blast")
+startup_timer = StartupTimer(START_TIME)
+startup_timer.mark("window")
 clock = pygame.time.Clock()
 font = pygame.font.SysFont("arial", 20)
 bigfont = pygame.font.SysFont("arial", 36)
 medfont = pygame.font.SysFont("arial", 28) 
 
 # ---------------- MediaPipe Hands ----------------
-mpHands = mp.solutions.hands
-hands = mpHands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-cap = cv2.VideoCapture(0)
+# [STARTUP]: Camera + MediaPipe được dựng trên thread nền (handblast.startup), cửa sổ hiện ngay.
+# CAMERA = 0: index camera (hoặc đường dẫn video); đo khởi động: python benchmarks/bench_startup.py
+CAMERA = 0
+# [CAPTURE]: Độ phân giải / FPS / MJPG-YUYV / bộ đệm của camera, xem CAPTURE_PRESETS trong
+# handblast/capture.py ("default" = để driver tự chọn như cũ). "auto": lần đầu thử mọi ứng viên,
+# chọn cấu hình trễ thấp nhất còn đủ cho tracking, lưu vào CAPTURE_CACHE cho các lần sau.
+# Đo độ trễ thật (nháy màn hình trước camera): python tools/measure_latency.py
+CAPTURE = "auto"
+CAPTURE_CACHE = "capture.json"
+# [SERVER]: Nhiều cửa sổ trên một máy dùng chung camera + MediaPipe: chạy python tools/hand_server.py
+# rồi đặt HAND_SERVER = "hbb" (--name của server); CAMERA là camera của server muốn đọc. Cửa sổ
+# không tự mở camera / dựng model, chỉ đọc landmark mới nhất từ shared memory (handblast/shared.py)
+HAND_SERVER = None
+# [INFERENCE]: Chế độ suy luận, xem INFERENCE_PRESETS trong handblast/inference.py
+# ("default" = cấu hình cũ; "lite", "lite-half", "lite-roi"... nhẹ hơn cho máy yếu).
+# Đo độ trễ / độ rung của từng chế độ: python benchmarks/bench_inference_modes.py
+INFERENCE_MODE = "single"
+# [SCHEDULE]: Chỉ chạy MediaPipe khi cần, các frame khác bám ngón tay bằng optical flow,
+# xem SCHEDULE_PRESETS trong handblast/tracking.py ("always" = suy luận mọi frame như cũ).
+# Đo: python benchmarks/bench_tracking.py
+INFERENCE_SCHEDULE = "balanced"
+# [POWER]: Không thấy tay một lúc / màn hình Game Over -> giảm FPS vẽ và tần số suy luận,
+# thấy tay là về đủ FPS ngay frame sau. Xem POWER_PRESETS trong handblast/power.py
+# ("off" = luôn đủ FPS như cũ, "kiosk" = máy bật cả ngày). CPU từng chế độ in ra khi thoát
+POWER_MODE = "balanced"
 
 # ---------------- Xử lý Kỷ lục (High Score) ----------------
+# [STORAGE]: Ghi kỷ lục + bảng xếp hạng trên thread nền (handblast.storage.ScoreWriter),
+# ghi file tạm rồi os.replace nên tắt ngang không làm hỏng file. LEADERBOARD_FILE = None: không lưu các ván
 HIGHSCORE_FILE = "highscore.txt"
-
-def load_high_score():
-    if not os.path.exists(HIGHSCORE_FILE):
-        return 0
-    try:
-        with open(HIGHSCORE_FILE, "r") as f:
-            return int(f.read())
-    except:
-        return 0
-
-def save_high_score(new_high):
-    with open(HIGHSCORE_FILE, "w") as f:
-        f.write(str(new_high))
-
-# Khởi tạo điểm
-score = 0
-high_score = load_high_score()
-
-# ---------------- Lưới & Khối ----------------
-# [ĐÃ SỬA]: Lưới giờ sẽ lưu trữ index màu (1 đến len(BLOCK_COLORS)) thay vì chỉ 0 hoặc 1.
-# 0: Trống
-# 1..n: Index của màu trong BLOCK_COLORS (index thực: index - 1)
-grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-
-BLOCK_SHAPES = [
-    [(0,0)], [(0,0),(1,0)], [(0,0),(1,0),(2,0)], [(0,0),(1,0),(2,0),(3,0)],
-    [(0,0),(1,0),(0,1),(1,1)], [(0,0),(0,1),(1,1)], [(0,0),(0,1),(0,2),(1,2)],
-    [(0,0),(1,0),(2,0),(1,1)], [(0,0),(1,0),(1,1),(2,1)], [(1,0),(2,0),(0,1),(1,1)],
-]
-
-def new_block():
-    shape = random.choice(BLOCK_SHAPES)
-    # [ĐÃ SỬA]: Lưu index màu thay vì giá trị màu RGB
-    color_index = random.randrange(len(BLOCK_COLORS)) 
-    return {"shape": shape, "color_index": color_index, "color": BLOCK_COLORS[color_index]}
-
-def new_tray():
-    return [new_block(), new_block(), new_block()]
-
-tray = new_tray()
-TRAY_X = PADDING + GRID_SIZE*CELL + 30
+LEADERBOARD_FILE = "leaderboard.db"
+score_writer = None # Tạo khi chạy game (không tạo khi file này chỉ được import, vd. bench_suite)
+
+# ---------------- Lưới, Khối & Điểm ----------------
+# [CORE]: Lưới, khay, điểm và Game Over nằm trong handblast.game.GameState (không phụ thuộc pygame).
+# Lưới lưu index màu: 0 = trống, 1..n = index trong BLOCK_COLORS + 1
+# Khay sinh từ random.Random(seed) để bản ghi (RECORD_FILE) chạy lại ra đúng các khối cũ
+replay_recording = Recording.load(REPLAY_FILE) if REPLAY_FILE else None
+if replay_recording and replay_recording.board_size != BOARD_SIZE:
+    raise SystemExit(f"{REPLAY_FILE} được ghi trên lưới {replay_recording.board_size}x{replay_recording.board_size}, "
+                     f"đặt BOARD_SIZE = {replay_recording.board_size} để chạy lại")
+game_seed = replay_recording.seed if replay_recording else random.randrange(2**63)
+game = GameState(rng=random.Random(game_seed), high_score=read_high_score(HIGHSCORE_FILE), num_colors=len(BLOCK_COLORS), size=BOARD_SIZE,
+                 playable_tray=replay_recording.playable_tray if replay_recording else PLAYABLE_TRAY)
+TRAY_X = PADDING + BOARD_SIZE*CELL + 30
 TRAY_Y = PADDING
 TRAY_SPACING = 150
 
 # ---------------- Logic Game ----------------
-def can_place(grid, block, gx, gy):
-    for dx, dy in block["shape"]:
-        x = gx + dx
-        y = gy + dy
-        if x < 0 or y < 0 or x >= GRID_SIZE or y >= GRID_SIZE: return False
-        # [ĐÃ SỬA]: Kiểm tra nếu ô đã khác 0 (tức là đã có màu)
-        if grid[y][x] != 0: return False
-    return True
-
-def place_block(grid, block, gx, gy):
-    global score, high_score
-    placed_cells = 0
-    
-    # [ĐÃ SỬA]: Lưu trữ index màu + 1 vào lưới thay vì chỉ số 1
-    color_id = block["color_index"] + 1 
-    
-    for dx, dy in block["shape"]:
-        x = gx + dx
-        y = gy + dy
-        grid[y][x] = color_id # <-- LƯU MÃ MÀU VÀO LƯỚI
-        placed_cells += 1
-    score += placed_cells 
-
-    # [ĐÃ SỬA]: Kiểm tra hàng/cột đầy bằng cách kiểm tra nếu không có ô nào là 0
-    full_rows = [r for r in range(GRID_SIZE) if all(grid[r][c] != 0 for c in range(GRID_SIZE))]
-    full_cols = [c for c in range(GRID_SIZE) if all(grid[r][c] != 0 for r in range(GRID_SIZE))]
-
-    combo = 0
-    for r in full_rows:
-        for c in range(GRID_SIZE): grid[r][c] = 0
-        combo += 1
-    for c in full_cols:
-        for r in range(GRID_SIZE): grid[r][c] = 0
-        combo += 1
-    if combo > 0: score += combo * GRID_SIZE
-    
-    if score > high_score:
-        high_score = score
-        save_high_score(high_score)
-        
+def place_block(slot, gx, gy):
+    # Đặt khối qua GameState; vừa phá kỷ lục thì gửi cho thread ghi (không chờ đĩa)
+    old_high = game.high_score
+    combo = game.place_block(slot, gx, gy)
+    if game.high_score > old_high and score_writer is not None:
+        score_writer.submit_high_score(game.high_score)
     return combo
 
-def any_moves_available(grid, tray):
-    for i, block in enumerate(tray):
-        if block is None: continue
-        for gy in range(GRID_SIZE):
-            for gx in range(GRID_SIZE):
-                if can_place(grid, block, gx, gy): return True
-    return False
-
 # ---------------- Vẽ ----------------
+def scene_key(status):
+    # [POWER] Mọi thứ quyết định khung hình; không đổi thì khỏi vẽ lại / flip
+    tray = tuple(None if b is None else (b["shape_id"], b["color_index"]) for b in game.tray)
+    hand = (control.cursor_x, control.cursor_y, control.thumb_x, control.thumb_y) if control.hand_detected else None
+    return (game.grid.occupied, bytes(game.grid.colors), tray, game.score, game.high_score, game_over,
+            hand, control.holding, control.held_block_index, status)
+
 def draw_grid(surface):
-    pygame.draw.rect(surface, GRID_BG, (PADDING, PADDING, GRID_SIZE*CELL, GRID_SIZE*CELL), border_radius=8)
-    for r in range(GRID_SIZE):
-        for c in range(GRID_SIZE):
+    pygame.draw.rect(surface, GRID_BG, (PADDING, PADDING, BOARD_SIZE*CELL, BOARD_SIZE*CELL), border_radius=8)
+    for r in range(BOARD_SIZE):
+        for c in range(BOARD_SIZE):
             x = PADDING + c*CELL
             y = PADDING + r*CELL
             rect = pygame.Rect(x, y, CELL, CELL)
             
-            cell_value = grid[r][c]
+            cell_value = game.grid.cell(r, c)
             
             if cell_value == 0:
                 color = (255,255,255) # Ô trống màu trắng
@@ -166,159 +157,186 @@ def draw_tray(surface, tray):
             continue
         base_x, base_y = TRAY_X, y + 30
         for dx, dy in block["shape"]:
-            rx = base_x + dx*(CELL//2)
-            ry = base_y + dy*(CELL//2)
-            rect = pygame.Rect(rx, ry, CELL//2, CELL//2)
-            # [SỬ DỤNG MÀU RGB TRONG BLOCK]: Vẫn sử dụng màu RGB đã lưu trong block cho khay
-            pygame.draw.rect(surface, block["color"], rect, border_radius=6) 
+            rx = base_x + dx*TRAY_CELL
+            ry = base_y + dy*TRAY_CELL
+            rect = pygame.Rect(rx, ry, TRAY_CELL, TRAY_CELL)
+            # [SỬ DỤNG MÀU RGB TRONG BLOCK]: Lấy màu RGB từ index màu của khối
+            pygame.draw.rect(surface, BLOCK_COLORS[block["color_index"]], rect, border_radius=6) 
             pygame.draw.rect(surface, (80,80,80), rect, 1, border_radius=6)
 
 def draw_score(surface):
-    txt = bigfont.render(f"Score: {score}", True, TEXT)
+    txt = bigfont.render(f"Score: {game.score}", True, TEXT)
     surface.blit(txt, (TRAY_X, HEIGHT - 80))
     
-    best_txt = medfont.render(f"Best: {high_score}", True, (200, 50, 50)) 
+    best_txt = medfont.render(f"Best: {game.high_score}", True, (200, 50, 50)) 
     surface.blit(best_txt, (TRAY_X, HEIGHT - 40))
 
+def draw_loading(surface, status):
+    # [STARTUP] Dòng trạng thái khi camera / model còn đang tải (giữa lưới)
+    txt = font.render(status, True, TEXT)
+    box = txt.get_rect(center=(PADDING + BOARD_SIZE*CELL//2, PADDING + BOARD_SIZE*CELL//2)).inflate(24, 16)
+    pygame.draw.rect(surface, (255, 255, 255), box, border_radius=8)
+    pygame.draw.rect(surface, (80, 80, 80), box, 1, border_radius=8)
+    surface.blit(txt, txt.get_rect(center=box.center))
+
+# [POOL]: Surface trong suốt của khối đang kéo được dùng lại, không tạo mới mỗi ô mỗi frame
+surface_pool = SurfacePool()
+
 # ---------------- Điều khiển Tay ----------------
-holding = False
-held_block_index = None
-held_block = None
-cursor_x, cursor_y = WIDTH//2, HEIGHT//2
-thumb_x, thumb_y = WIDTH//2, HEIGHT//2
-hand_detected = False
+# [CONTROL]: Véo / kéo / thả nằm trong handblast.control.HandController (dùng chung với replay)
+# Vùng khay: từ TRAY_X - 10 sang hết mép phải, mỗi ô cao 100px
 DIST_THRESHOLD = 40 
+PINCH_HYSTERESIS = 1.25 # Đang giữ khối: phải mở xa hơn DIST_THRESHOLD * hệ số này mới thả
+# [FILTER] Lọc rung + bù trễ cho con trỏ, xem CURSOR_FILTERS trong handblast/filters.py ("raw" = không lọc).
+# So sánh độ trễ / độ rung: python benchmarks/bench_filters.py
+CURSOR_FILTER = "one-euro+predict"
+CURSOR_DISPLAY_LEAD = 0.5 / FPS # Ước lượng từ lúc xử lý sample tới lúc frame lên màn hình (giây)
+CONTROL_LAYOUT = ControlLayout(WIDTH, HEIGHT, PADDING, PADDING, CELL, TRAY_X - 10, math.inf,
+                               TRAY_Y, TRAY_SPACING, 100, DIST_THRESHOLD, DIST_THRESHOLD * PINCH_HYSTERESIS)
+control = HandController(game, replay_recording.layout if replay_recording else CONTROL_LAYOUT, place=place_block)
+cursor_filter = CursorFilter(CURSOR_FILTER)
 
-def update_hand_control(frame):
-    global holding, held_block_index, held_block, cursor_x, cursor_y, thumb_x, thumb_y, hand_detected
-    
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(rgb)
-
-    if results.multi_hand_landmarks:
-        hand_detected = True
-        hand = results.multi_hand_landmarks[0]
-        
-        ix, iy = int(hand.landmark[8].x * WIDTH), int(hand.landmark[8].y * HEIGHT)
-        tx, ty = int(hand.landmark[4].x * WIDTH), int(hand.landmark[4].y * HEIGHT)
-        
-        cursor_x, cursor_y = ix, iy
-        thumb_x, thumb_y = tx, ty
-        dist = math.hypot(ix - tx, iy - ty)
-
-        def hovered_tray_index(x, y):
-            if x < TRAY_X - 10: return None
-            for i in range(len(tray)):
-                ty0 = TRAY_Y + i*TRAY_SPACING
-                ty1 = ty0 + 100
-                if ty0 <= y <= ty1: return i
-            return None
-
-        if dist < DIST_THRESHOLD:
-            if not holding:
-                idx = hovered_tray_index(cursor_x, cursor_y)
-                if idx is not None and tray[idx] is not None:
-                    holding = True
-                    held_block_index = idx
-                    held_block = tray[idx]
-            # Giữ khối: Không làm gì thêm
-        else:
-            if holding:
-                # Thả khối
-                gx = (cursor_x - PADDING) // CELL
-                gy = (cursor_y - PADDING) // CELL
-                if held_block is not None and 0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE:
-                    if can_place(grid, held_block, gx, gy):
-                        place_block(grid, held_block, gx, gy)
-                        if held_block_index is not None: tray[held_block_index] = None
-                        if all(b is None for b in tray): tray[:] = new_tray()
-                holding = False
-                held_block = None
-                held_block_index = None
+# ---------------- Game loop ----------------
+# [BENCH]: Chỉ chạy khi mở trực tiếp; benchmarks/bench_suite.py import file này để đo các hàm vẽ / điều khiển
+if __name__ == "__main__":
+    running = True
+    game_over = False
+
+    # [PIPELINE]: Camera + MediaPipe chạy trên thread riêng, vòng lặp chỉ lấy kết quả mới nhất
+    # (hoặc ReplaySource nhả lại từng sample của bản ghi)
+    if replay_recording:
+        camera = None
+        pipeline = ReplaySource(replay_recording, REPLAY_SPEED).start()
+    elif HAND_SERVER:
+        # Landmark từ server dùng chung (camera của server: chưa lọc; server nhả lại bản ghi: đã lọc)
+        camera = pipeline = SharedHandSource(HAND_SERVER, CAMERA, startup_timer).start()
     else:
-        hand_detected = False
-        # Nếu tay mất dấu khi đang giữ khối, khối sẽ tự động bị hủy (giống như thao tác thả)
-        if holding:
-             holding = False
-             held_block = None
-             held_block_index = None
+        # Mở camera + nạp model chạy nền; trong lúc đó vẫn vẽ game và dòng trạng thái camera.status
+        camera = pipeline = BackgroundHandPipeline(CAMERA, INFERENCE_MODE, INFERENCE_SCHEDULE, control.layout, startup_timer,
+                                                         CAPTURE, CAPTURE_CACHE).start()
+    recorder = LandmarkRecorder(game_seed, control.layout, playable_tray=game.playable_tray) if RECORD_FILE else None
+    # Chạy lại bản ghi không ghi kỷ lục / bảng xếp hạng
+    score_writer = None if replay_recording else ScoreWriter(HIGHSCORE_FILE, LEADERBOARD_FILE).start()
+    session_start = time.perf_counter()
+    last_hand_seq = 0
+    # Chạy lại bản ghi giữ đúng nhịp lúc ghi
+    power = PowerGovernor(POWER_PRESETS["off" if replay_recording else POWER_MODE], FPS)
+    last_scene = None
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                last_scene = None
+
+        sample = pipeline.latest()
+        if sample is not None and sample.seq != last_hand_seq:
+            last_hand_seq = sample.seq
+            if sample.points is not None: startup_timer.mark("first_hand")
+            if not pipeline.filtered:
+                # Bản ghi (kể cả khi server nhả lại bản ghi) lưu sample ĐÃ lọc, nên không lọc lại
+                sample = cursor_filter.apply(sample, time.perf_counter() + CURSOR_DISPLAY_LEAD)
+            control.update(sample)
+            if recorder is not None: recorder.add(sample)
+
+        if not game_over and game.is_game_over():
+            game_over = True
+            if score_writer is not None: score_writer.submit_session(session_from_game(game, session_start))
+
+        if game_over:
+            keys = pygame.key.get_pressed()
+            if keys[pygame.K_r] or (replay_recording and pipeline.take_reset()):
+                game.reset()
+                session_start = time.perf_counter()
+                control.release()
+                if recorder is not None: recorder.mark_reset()
+                game_over = False
+
+        power.update(control.hand_detected, game_over)
+        pipeline.throttle(power.detect_interval)
+        status = camera.status if camera is not None else None
+        scene = scene_key(status)
+        power.count_frame(scene != last_scene)
+        if scene == last_scene:
+            power.wait(clock, pipeline.hand_event)
+            continue
+        last_scene = scene
 
-# ---------------- Game loop ----------------
-running = True
-game_over = False
-
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    screen.fill(BG)
-    draw_grid(screen)
-    draw_tray(screen, tray)
-    draw_score(screen)
+        screen.fill(BG)
+        draw_grid(screen)
+        draw_tray(screen, game.tray)
+        draw_score(screen)
     
-    if holding and held_block is not None:
-        gx = (cursor_x - PADDING) // CELL
-        gy = (cursor_y - PADDING) // CELL
-        valid = 0 <= gx < GRID_SIZE and 0 <= gy < GRID_SIZE and can_place(grid, held_block, gx, gy)
+        held_block = control.held_block
+        if control.holding and held_block is not None:
+            gx, gy = control.grid_cell(control.cursor_x, control.cursor_y)
+            valid = game.can_place(control.held_block_index, gx, gy)
         
-        # [ĐÃ SỬA]: Vẫn sử dụng màu RGB đã lưu trong block cho khối đang kéo
-        drag_color = held_block["color"] 
+            # [ĐÃ SỬA]: Vẫn sử dụng màu RGB đã lưu trong block cho khối đang kéo
+            drag_color = BLOCK_COLORS[held_block["color_index"]] 
         
-        for dx, dy in held_block["shape"]:
-            x = PADDING + (gx + dx)*CELL
-            y = PADDING + (gy + dy)*CELL
-            rect = pygame.Rect(x, y, CELL, CELL)
-            
-            # Tô màu của khối đang kéo (hơi trong suốt)
-            s = pygame.Surface((CELL, CELL))
+            # Tô màu của khối đang kéo (hơi trong suốt): mọi ô cùng màu nên fill một lần
+            s = surface_pool.get((CELL, CELL))
             s.set_alpha(150)  # Độ trong suốt 
             s.fill(drag_color)
-            screen.blit(s, (x, y))
-
-            # Vẽ viền highlight (valid/invalid)
-            highlight_color = VALID_HIGHLIGHT if valid else INVALID_HIGHLIGHT
-            pygame.draw.rect(screen, highlight_color, rect, 4, border_radius=6)
-
-    if hand_detected:
-        cursor_color = (255, 50, 50) if holding else (0, 200, 0)
-        pygame.draw.line(screen, (150, 150, 150), (thumb_x, thumb_y), (cursor_x, cursor_y), 2)
-        pygame.draw.circle(screen, (100, 100, 100), (thumb_x, thumb_y), 8)
-        pygame.draw.circle(screen, cursor_color, (cursor_x, cursor_y), 12)
-        pygame.draw.circle(screen, (255, 255, 255), (cursor_x, cursor_y), 14, 2)
-
-    if not game_over and not any_moves_available(grid, tray):
-        game_over = True
-
-    if game_over:
-        # Vẽ khung thông báo Game Over
-        pygame.draw.rect(screen, (255, 255, 255), (WIDTH//2 - 150, HEIGHT//2 - 60, 300, 120), border_radius=10)
-        pygame.draw.rect(screen, (200, 60, 60), (WIDTH//2 - 150, HEIGHT//2 - 60, 300, 120), 2, border_radius=10)
         
-        msg1 = bigfont.render("GAME OVER", True, (200,60,60))
-        msg2 = font.render(f"Final Score: {score}", True, TEXT)
-        msg3 = font.render("Press 'R' to Restart", True, TEXT)
+            for dx, dy in held_block["shape"]:
+                x = PADDING + (gx + dx)*CELL
+                y = PADDING + (gy + dy)*CELL
+                rect = pygame.Rect(x, y, CELL, CELL)
+            
+                screen.blit(s, (x, y))
+
+                # Vẽ viền highlight (valid/invalid)
+                highlight_color = VALID_HIGHLIGHT if valid else INVALID_HIGHLIGHT
+                pygame.draw.rect(screen, highlight_color, rect, 4, border_radius=6)
+
+        if control.hand_detected:
+            cursor_x, cursor_y = control.cursor_x, control.cursor_y
+            thumb_x, thumb_y = control.thumb_x, control.thumb_y
+            cursor_color = (255, 50, 50) if control.holding else (0, 200, 0)
+            pygame.draw.line(screen, (150, 150, 150), (thumb_x, thumb_y), (cursor_x, cursor_y), 2)
+            pygame.draw.circle(screen, (100, 100, 100), (thumb_x, thumb_y), 8)
+            pygame.draw.circle(screen, cursor_color, (cursor_x, cursor_y), 12)
+            pygame.draw.circle(screen, (255, 255, 255), (cursor_x, cursor_y), 14, 2)
+
+        if game_over:
+            # Vẽ khung thông báo Game Over
+            pygame.draw.rect(screen, (255, 255, 255), (WIDTH//2 - 150, HEIGHT//2 - 60, 300, 120), border_radius=10)
+            pygame.draw.rect(screen, (200, 60, 60), (WIDTH//2 - 150, HEIGHT//2 - 60, 300, 120), 2, border_radius=10)
         
-        screen.blit(msg1, (WIDTH//2 - msg1.get_width()//2, HEIGHT//2 - 40))
-        screen.blit(msg2, (WIDTH//2 - msg2.get_width()//2, HEIGHT//2))
-        screen.blit(msg3, (WIDTH//2 - msg3.get_width()//2, HEIGHT//2 + 30))
-
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_r]:
-            grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-            tray = new_tray()
-            score = 0
-            game_over = False
-
-    pygame.display.flip()
-
-    ret, frame = cap.read()
-    if ret:
-        update_hand_control(frame)
-    
-    clock.tick(FPS)
+            msg1 = bigfont.render("GAME OVER", True, (200,60,60))
+            msg2 = font.render(f"Final Score: {game.score}", True, TEXT)
+            msg3 = font.render("Press 'R' to Restart", True, TEXT)
+        
+            screen.blit(msg1, (WIDTH//2 - msg1.get_width()//2, HEIGHT//2 - 40))
+            screen.blit(msg2, (WIDTH//2 - msg2.get_width()//2, HEIGHT//2))
+            screen.blit(msg3, (WIDTH//2 - msg3.get_width()//2, HEIGHT//2 + 30))
+
+        if status:
+            draw_loading(screen, status)
 
-cap.release()
-pygame.quit()
+        pygame.display.flip()
+        startup_timer.mark("first_frame")
+    
+        power.wait(clock, pipeline.hand_event)
+
+    pipeline.stop()
+    if score_writer is not None:
+        # Ván đang chơi dở cũng được lưu
+        if not game_over and game.moves_made: score_writer.submit_session(session_from_game(game, session_start))
+        score_writer.close()
+        if LEADERBOARD_FILE:
+            leaderboard = Leaderboard(LEADERBOARD_FILE)
+            print("Top 5:", ", ".join(f"{s.score} ({s.moves} nước)" for s in leaderboard.top(5)))
+            leaderboard.close()
+    if recorder is not None:
+        recorder.save(RECORD_FILE, game)
+        print(f"Đã ghi {len(recorder)} frame vào {RECORD_FILE}")
+    print("Khởi động:", startup_timer.report())
+    if camera is not None: print("Camera:", camera.capture_report())
+    print("Điện năng:", power.report())
+    print("SurfacePool:", surface_pool.stats())
+    pygame.quit()
 # Hùng đẹp trai vãi
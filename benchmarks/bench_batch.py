@@ -0,0 +1,43 @@
+# ---------------- Benchmark: mô phỏng batch NumPy vs GameState ----------------
+# Chạy: python benchmarks/bench_batch.py [--games 4096] [--policy random|greedy] [--verify 200]
+# Kiểm tra batch cho cùng lưới / điểm / vết điểm với bản vô hướng trên `--verify` seed đầu,
+# rồi so tốc độ (nước đi/giây) của hai bản.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.batch import BatchSimulator, play_scalar, verify_against_scalar
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=4096)
+    parser.add_argument("--policy", choices=("random", "greedy"), default="random")
+    parser.add_argument("--verify", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    verify_against_scalar(list(range(args.seed, args.seed + args.verify)), args.policy)
+    print(f"OK: {args.verify} ván batch giống hệt GameState ({args.policy})")
+
+    seeds = list(range(args.seed, args.seed + args.games))
+    t0 = time.perf_counter()
+    sim = BatchSimulator(seeds, policy=args.policy)
+    sim.run()
+    t_batch = time.perf_counter() - t0
+    batch_moves = int(sim.moves_made.sum())
+
+    n_scalar = max(1, args.games // 8)
+    t0 = time.perf_counter()
+    scalar_moves = sum(len(play_scalar(seed, args.policy)[2]) for seed in seeds[:n_scalar])
+    t_scalar = time.perf_counter() - t0
+
+    print(f"batch : {args.games} ván, {batch_moves / t_batch:,.0f} nước/giây ({t_batch:.2f}s), điểm TB {sim.scores.mean():.1f}")
+    print(f"scalar: {n_scalar} ván, {scalar_moves / t_scalar:,.0f} nước/giây ({t_scalar:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# ---------------- Benchmark: chi phí đặt khối theo kích thước lưới ----------------
+# Chạy: python benchmarks/bench_board_sizes.py [--sizes 8 12 16 24 32] [--games 20]
+# Với mỗi kích thước, chơi trước --games ván ngẫu nhiên (chỉ ghi lại chuỗi nước đi), rồi đo
+# thời gian chạy lại đúng các chuỗi đó (µs / lần đặt) bằng:
+#   - counters: Board.place (bộ đếm hàng / cột, chỉ xét các dòng khối chạm tới)
+#   - full scan: cách cũ, sau mỗi lần đặt quét mọi hàng + cột bằng clear_full_lines
+# Cột counters phải gần như không đổi khi lưới lớn dần; full scan tăng theo kích thước.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.engine import BLOCK_SHAPES, Board, clear_full_lines
+
+
+def random_games(size, games, seed, max_moves):
+    rng = random.Random(seed)
+    sequences = []
+    for _ in range(games):
+        board = Board(size)
+        moves = []
+        while len(moves) < max_moves:
+            shape_id = rng.randrange(len(BLOCK_SHAPES))
+            bits = board.legal_anchors(shape_id)
+            if not bits: break
+            anchors = [a for a in range(board.geo.cells) if bits >> a & 1]
+            gy, gx = divmod(rng.choice(anchors), size)
+            move = (shape_id, rng.randrange(5) + 1, gx, gy)
+            board.place(*move)
+            moves.append(move)
+        sequences.append(moves)
+    return sequences
+
+
+def place_full_scan(board, shape_id, color_id, gx, gy):
+    # Như Board.place trước khi có bộ đếm: quét mọi hàng + cột sau mỗi lần đặt
+    geo = board.geo
+    anchor = gy * board.size + gx
+    occ = board.occupied | geo.placement_masks[shape_id][anchor]
+    for off in geo.shape_offsets[shape_id]:
+        board.colors[anchor + off] = color_id
+    occ, cleared, combo = clear_full_lines(occ, geo)
+    while cleared:
+        low = cleared & -cleared
+        board.colors[low.bit_length() - 1] = 0
+        cleared ^= low
+    board.occupied = occ
+    return combo
+
+
+def time_replay(size, sequences, place):
+    total = 0.0
+    count = 0
+    for moves in sequences:
+        board = Board(size)
+        t0 = time.perf_counter()
+        for move in moves:
+            place(board, *move)
+        total += time.perf_counter() - t0
+        count += len(moves)
+    return total / max(count, 1) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[8, 12, 16, 24, 32])
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--max-moves", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'size':>5s} {'nước':>7s} {'counters':>10s} {'full scan':>10s} {'tỉ lệ':>7s}   (µs / lần đặt, min của {args.repeat} lần)")
+    for size in args.sizes:
+        sequences = random_games(size, args.games, args.seed, args.max_moves)
+        moves = sum(len(s) for s in sequences)
+        counters = min(time_replay(size, sequences, Board.place) for _ in range(args.repeat))
+        scan = min(time_replay(size, sequences, place_full_scan) for _ in range(args.repeat))
+        print(f"{size:5d} {moves:7d} {counters:10.2f} {scan:10.2f} {scan / counters:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# ---------------- Benchmark: engine bitboard vs lưới list-of-lists cũ ----------------
+# Chạy: python benchmarks/bench_engine.py [--seed 1] [--boards 200]
+# So sánh can_place / place_block / any_moves_available của bản cũ (copy nguyên văn
+# bên dưới) với handblast.engine, đồng thời kiểm tra hai bản cho ra cùng lưới và điểm.
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.engine import GRID_SIZE, BLOCK_SHAPES, Board, placement_score
+
+
+# ---------------- Bản cũ (list-of-lists) ----------------
+def legacy_can_place(grid, block, gx, gy):
+    for dx, dy in block["shape"]:
+        x = gx + dx
+        y = gy + dy
+        if x < 0 or y < 0 or x >= GRID_SIZE or y >= GRID_SIZE: return False
+        if grid[y][x] != 0: return False
+    return True
+
+def legacy_place_block(grid, block, gx, gy):
+    placed_cells = 0
+    color_id = block["color_index"] + 1
+    for dx, dy in block["shape"]:
+        grid[gy + dy][gx + dx] = color_id
+        placed_cells += 1
+    score = placed_cells
+
+    full_rows = [r for r in range(GRID_SIZE) if all(grid[r][c] != 0 for c in range(GRID_SIZE))]
+    full_cols = [c for c in range(GRID_SIZE) if all(grid[r][c] != 0 for r in range(GRID_SIZE))]
+
+    combo = 0
+    for r in full_rows:
+        for c in range(GRID_SIZE): grid[r][c] = 0
+        combo += 1
+    for c in full_cols:
+        for r in range(GRID_SIZE): grid[r][c] = 0
+        combo += 1
+    if combo > 0: score += combo * GRID_SIZE
+    return score
+
+def legacy_any_moves_available(grid, tray):
+    for block in tray:
+        if block is None: continue
+        for gy in range(GRID_SIZE):
+            for gx in range(GRID_SIZE):
+                if legacy_can_place(grid, block, gx, gy): return True
+    return False
+
+def bb_any_moves_available(board, tray):
+    for block in tray:
+        if block is not None and board.has_move(block["shape_id"]): return True
+    return False
+
+
+# ---------------- Dữ liệu mẫu ----------------
+def random_block(rng):
+    shape_id = rng.randrange(len(BLOCK_SHAPES))
+    return {"shape": BLOCK_SHAPES[shape_id], "shape_id": shape_id, "color_index": rng.randrange(5)}
+
+def random_rows(rng, fill):
+    # Lưới ngẫu nhiên với tỉ lệ ô đầy ~fill (không có hàng/cột đầy sẵn)
+    rows = [[(rng.randrange(5) + 1) if rng.random() < fill else 0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    for r in range(GRID_SIZE):
+        if all(rows[r]): rows[r][rng.randrange(GRID_SIZE)] = 0
+    for c in range(GRID_SIZE):
+        if all(rows[r][c] for r in range(GRID_SIZE)): rows[rng.randrange(GRID_SIZE)][c] = 0
+    return rows
+
+def make_cases(rng, boards):
+    # Mỗi case: (lưới, khối, điểm neo hợp lệ hoặc None)
+    cases = []
+    for i in range(boards):
+        rows = random_rows(rng, fill=(i % 10) / 10)
+        block = random_block(rng)
+        anchors = [(gx, gy) for gy in range(GRID_SIZE) for gx in range(GRID_SIZE) if legacy_can_place(rows, block, gx, gy)]
+        cases.append((rows, block, rng.choice(anchors) if anchors else None))
+    return cases
+
+
+def check_equivalent(cases):
+    for rows, block, anchor in cases:
+        board = Board.from_rows(rows)
+        for gy in range(-1, GRID_SIZE + 1):
+            for gx in range(-1, GRID_SIZE + 1):
+                assert legacy_can_place(rows, block, gx, gy) == board.can_place(block["shape_id"], gx, gy)
+        expected = sum(1 << (gy * GRID_SIZE + gx) for gy in range(GRID_SIZE) for gx in range(GRID_SIZE)
+                       if legacy_can_place(rows, block, gx, gy))
+        assert board.legal_anchors(block["shape_id"]) == expected
+        if anchor is None: continue
+        legacy = [list(r) for r in rows]
+        gained = legacy_place_block(legacy, block, *anchor)
+        placed, combo = board.place(block["shape_id"], block["color_index"] + 1, *anchor)
+        assert gained == placement_score(placed, combo)
+        assert legacy == board.to_rows()
+
+
+def bench(label, fn, number, calls):
+    t = min(timeit.repeat(fn, number=number, repeat=5))
+    per_call = t / number / calls * 1e6
+    print(f"  {label:<34} {per_call:10.2f} us")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--boards", type=int, default=200)
+    args = parser.parse_args()
+
+    cases = make_cases(random.Random(args.seed), args.boards)
+    check_equivalent(cases)
+    print(f"OK: {len(cases)} lưới cho kết quả giống nhau")
+
+    placeable = [c for c in cases if c[2] is not None]
+    boards = [Board.from_rows(rows) for rows, _, _ in cases]
+    trays = [[random_block(random.Random(i)) for _ in range(3)] for i in range(len(cases))]
+
+    def legacy_scan():
+        for rows, block, _ in cases:
+            for gy in range(GRID_SIZE):
+                for gx in range(GRID_SIZE):
+                    legacy_can_place(rows, block, gx, gy)
+
+    def bb_scan():
+        for board, (_, block, _) in zip(boards, cases):
+            sid = block["shape_id"]
+            for gy in range(GRID_SIZE):
+                for gx in range(GRID_SIZE):
+                    board.can_place(sid, gx, gy)
+
+    def legacy_place():
+        for rows, block, anchor in placeable:
+            legacy_place_block([list(r) for r in rows], block, *anchor)
+
+    placeable_boards = [(Board.from_rows(rows), block, anchor) for rows, block, anchor in placeable]
+
+    def bb_place():
+        for board, block, anchor in placeable_boards:
+            board.copy().place(block["shape_id"], block["color_index"] + 1, *anchor)
+
+    def legacy_any():
+        for (rows, _, _), tray in zip(cases, trays):
+            legacy_any_moves_available(rows, tray)
+
+    def bb_any():
+        for board, tray in zip(boards, trays):
+            bb_any_moves_available(board, tray)
+
+    n_scan = len(cases) * GRID_SIZE * GRID_SIZE
+    print("Thời gian / lần gọi:")
+    for name, old, new, count in (
+        ("can_place", legacy_scan, bb_scan, n_scan),
+        ("place_block (gồm copy lưới)", legacy_place, bb_place, len(placeable)),
+        ("any_moves_available", legacy_any, bb_any, len(cases)),
+    ):
+        t_old = bench(name + " [cũ]", old, 3, count)
+        t_new = bench(name + " [bitboard]", new, 3, count)
+        print(f"  -> nhanh hơn x{t_old / t_new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# ---------------- Benchmark: lọc / dự đoán con trỏ ----------------
+# Chạy: python benchmarks/bench_filters.py [--latency 0.06] [--noise 2.0] [--seconds 60]
+# Mô phỏng ngón tay thật (các cú với tới mục tiêu ngẫu nhiên theo quỹ đạo minimum-jerk xen
+# giữa các lúc đứng yên), camera 30 fps, landmark có nhiễu --noise px, kết quả tới vòng
+# lặp game sau --latency giây, lên màn hình sau thêm nửa frame. Với mỗi CURSOR_FILTERS:
+#   - lag: độ trễ hiệu dụng (ms) = độ dời thời gian làm sai số với quỹ đạo thật nhỏ nhất
+#   - err: sai số trung bình (px) so với vị trí thật lúc hiển thị, khi tay đang di chuyển
+#   - jitter: RMS độ dịch con trỏ giữa hai frame (px) khi tay đã đứng yên được SETTLE giây
+# và số lần véo / thả bị "nháy" khi khoảng cách hai ngón dao động quanh DIST_THRESHOLD,
+# có và không có hysteresis.
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.control import INDEX_TIP, THUMB_TIP
+from handblast.filters import CURSOR_FILTERS, CursorFilter
+from handblast.pipeline import HandSample
+
+WIDTH, HEIGHT = 1080, 720
+CAMERA_FPS = 30
+DISPLAY_FPS = 30
+SETTLE = 0.25
+
+
+def make_trajectory(seconds, rng):
+    # Danh sách đoạn (t0, t1, p0, p1): đi từ p0 tới p1 (p0 == p1: đứng yên)
+    segments = []
+    t = 0.0
+    p = (0.5, 0.5)
+    while t < seconds:
+        hold = rng.uniform(0.3, 1.0)
+        segments.append((t, t + hold, p, p))
+        t += hold
+        q = (rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9))
+        move = rng.uniform(0.3, 0.7)
+        segments.append((t, t + move, p, q))
+        t += move
+        p = q
+    return segments
+
+
+def position(segments, t):
+    # Vị trí thật tại t (minimum-jerk trong mỗi đoạn di chuyển), và tay có đang đứng yên không
+    lo, hi = 0, len(segments) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if segments[mid][0] <= t: lo = mid
+        else: hi = mid - 1
+    t0, t1, p0, p1 = segments[lo]
+    s = min(max((t - t0) / (t1 - t0), 0.0), 1.0)
+    s = s * s * s * (10 - 15 * s + 6 * s * s)
+    return (p0[0] + (p1[0] - p0[0]) * s, p0[1] + (p1[1] - p0[1]) * s), p0 == p1
+
+
+def simulate(name, segments, seconds, latency, noise, seed):
+    # Trả về danh sách (thời điểm hiển thị, vị trí con trỏ) như vòng lặp game sẽ vẽ
+    rng = random.Random(seed)
+    cursor_filter = CursorFilter(name)
+    shown = []
+    display_lead = 0.5 / DISPLAY_FPS
+    for k in range(int(seconds * CAMERA_FPS)):
+        t_cap = k / CAMERA_FPS
+        (x, y), _ = position(segments, t_cap)
+        x += rng.gauss(0, noise / WIDTH)
+        y += rng.gauss(0, noise / HEIGHT)
+        points = [(x, y)] * 21
+        points[THUMB_TIP] = (x + 0.1, y)
+        t_use = t_cap + latency
+        sample = cursor_filter.apply(HandSample(k + 1, t_cap, t_use, tuple(points)), t_use + display_lead)
+        shown.append((t_use + display_lead, sample.points[INDEX_TIP]))
+    return shown
+
+
+def error_px(shown, segments, shift, moving_only=True):
+    total = 0.0
+    n = 0
+    for t, (x, y) in shown:
+        (tx, ty), still = position(segments, t - shift)
+        if moving_only and still: continue
+        total += math.hypot((x - tx) * WIDTH, (y - ty) * HEIGHT)
+        n += 1
+    return total / max(n, 1)
+
+
+def effective_lag(shown, segments):
+    # Độ dời thời gian (-40..200 ms, bước 2 ms) làm sai số nhỏ nhất
+    best = min(range(-40, 201, 2), key=lambda ms: error_px(shown, segments, ms / 1000))
+    return best
+
+
+def jitter_px(shown, segments):
+    total = 0.0
+    n = 0
+    for (t0, p0), (t1, p1) in zip(shown, shown[1:]):
+        # Chỉ tính khi tay đã đứng yên ít nhất SETTLE giây (bộ lọc đã bắt kịp)
+        if position(segments, t0 - SETTLE)[1] and position(segments, t0)[1] and position(segments, t1)[1]:
+            total += ((p1[0] - p0[0]) * WIDTH) ** 2 + ((p1[1] - p0[1]) * HEIGHT) ** 2
+            n += 1
+    return math.sqrt(total / max(n, 1))
+
+
+def pinch_flicker(threshold, release, noise, seed):
+    # Khoảng cách hai ngón dao động quanh ngưỡng: đếm số lần chuyển véo <-> thả
+    rng = random.Random(seed)
+    pinched = False
+    toggles = 0
+    for k in range(3000):
+        dist = threshold + 4 * math.sin(k / 15) + rng.gauss(0, noise)
+        now = dist < (release if pinched else threshold)
+        if now != pinched: toggles += 1
+        pinched = now
+    return toggles
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.06, help="camera + suy luận (giây)")
+    parser.add_argument("--noise", type=float, default=2.0, help="nhiễu landmark (px)")
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dist-threshold", type=float, default=40)
+    parser.add_argument("--hysteresis", type=float, default=1.25, help="ngưỡng thả = ngưỡng véo * hệ số")
+    args = parser.parse_args()
+
+    segments = make_trajectory(args.seconds, random.Random(args.seed))
+    print(f"camera {CAMERA_FPS} fps, trễ {args.latency * 1000:.0f} ms + nửa frame hiển thị, nhiễu {args.noise:.1f} px")
+    print(f"{'bộ lọc':18s} {'lag ms':>7s} {'err px':>7s} {'jitter px':>10s}")
+    base_lag = None
+    for name in CURSOR_FILTERS:
+        shown = simulate(name, segments, args.seconds, args.latency, args.noise, args.seed)
+        lag = effective_lag(shown, segments)
+        if base_lag is None: base_lag = lag
+        note = "" if name == "raw" else f"  (giảm {base_lag - lag} ms)"
+        print(f"{name:18s} {lag:7d} {error_px(shown, segments, 0):7.1f} {jitter_px(shown, segments):10.2f}{note}")
+
+    raw = pinch_flicker(args.dist_threshold, args.dist_threshold, args.noise, args.seed)
+    hyst = pinch_flicker(args.dist_threshold, args.dist_threshold * args.hysteresis, args.noise, args.seed)
+    print(f"véo / thả đổi trạng thái: {raw} lần không hysteresis, {hyst} lần với ngưỡng thả x{args.hysteresis}")
+
+
+if __name__ == "__main__":
+    main()
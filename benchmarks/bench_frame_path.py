@@ -0,0 +1,212 @@
+# ---------------- Benchmark: cấp phát bộ nhớ trên đường đi của frame ----------------
+# Chạy: python benchmarks/bench_frame_path.py [--frames 300] [--video clip.mp4]
+# So đường cũ (cap.read() cấp phát frame mới, cv2.flip + cvtColor trong HandDetector, resize +
+# cvtColor + flip trong AdaptiveHandDetector) với đường hiện tại (cap.read(image=buf) xoay
+# vòng bộ đệm như LatestFrameGrabber, bộ đệm dst, lật toạ độ x -> 1 - x):
+#   - KB/frame: đỉnh bộ nhớ cấp phát thêm trong một frame (tracemalloc; numpy báo các mảng
+#     OpenCV trả về cho tracemalloc), trung bình sau --warmup frame
+#   - µs/frame: thời gian đọc + chuẩn bị ảnh, đo riêng không bật tracemalloc
+#   - sai lệch con trỏ / ngón cái (px màn hình) giữa hai đường: HandDetector riêng và sau lập
+#     lịch optical flow, với từng preset trong --presets
+# MediaPipe được thay bằng một "model" đối xứng gương (trọng tâm độ sáng) để hai đường so
+# được chính xác; không có --video thì tạo video thử (vệt sáng có vân chạy vòng tròn).
+import argparse
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.benchutil import to_screen
+from handblast.control import ControlLayout, THUMB_TIP
+from handblast.inference import HandDetector, INFERENCE_PRESETS, roi_around
+from handblast.replay import NUM_LANDMARKS
+from handblast.tracking import AdaptiveHandDetector, SCHEDULE_PRESETS
+
+
+class NoHandModel:
+    # Thay mp Hands khi đo cấp phát: không thấy tay, không cấp phát gì
+    def process(self, rgb):
+        return SimpleNamespace(multi_hand_landmarks=None)
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MirrorModel(NoHandModel):
+    # "Tay" = trọng tâm độ sáng kênh G; các landmark chỉ lệch nhau theo trục y nên kết quả
+    # trên ảnh lật đúng bằng 1 - x của kết quả trên ảnh gốc (như một model đối xứng gương)
+    def process(self, rgb):
+        m = cv2.moments(cv2.extractChannel(rgb, 1))
+        if m["m00"] == 0: return super().process(rgb)
+        h, w = rgb.shape[:2]
+        # moments tính theo tâm pixel, landmark MediaPipe tính theo mép ảnh: +0.5
+        cx, cy = (m["m10"] / m["m00"] + 0.5) / w, (m["m01"] / m["m00"] + 0.5) / h
+        marks = [SimpleNamespace(x=cx, y=cy + (k - 10) * 0.004) for k in range(NUM_LANDMARKS)]
+        marks[THUMB_TIP] = SimpleNamespace(x=cx, y=cy + 0.08)
+        return SimpleNamespace(multi_hand_landmarks=[SimpleNamespace(landmark=marks)])
+
+
+class OldHandDetector(HandDetector):
+    # Như HandDetector trước khi có bộ đệm: lật nguyên ảnh, resize / cvtColor cấp phát mới
+    def _process(self, frame, box):
+        x0, y0, x1, y1 = box
+        sub = frame[y0:y1, x0:x1]
+        if self.config.scale != 1.0:
+            sub = cv2.resize(sub, None, fx=self.config.scale, fy=self.config.scale, interpolation=cv2.INTER_AREA)
+        results = self.hands.process(cv2.cvtColor(sub, cv2.COLOR_BGR2RGB))
+        if not results.multi_hand_landmarks: return None
+        h, w = frame.shape[:2]
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        return tuple((ox + lm.x * sx, oy + lm.y * sy) for lm in results.multi_hand_landmarks[0].landmark)
+
+    def __call__(self, frame):
+        frame = cv2.flip(frame, 1)
+        h, w = frame.shape[:2]
+        points = None
+        if self.config.roi and self.roi is not None:
+            points = self._process(frame, self.roi)
+        if points is None:
+            points = self._process(frame, (0, 0, w, h))
+        if self.config.roi:
+            self.roi = None if points is None else roi_around(points, self.config.roi_padding, w, h)
+        return points
+
+
+class OldAdaptiveHandDetector(AdaptiveHandDetector):
+    # Như trước khi có bộ đệm: resize / cvtColor / flip đều cấp phát mới
+    def _gray(self, frame):
+        s = self.config.scale
+        small = frame if s == 1.0 else cv2.resize(frame, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        return cv2.flip(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), 1)
+
+
+def make_video(path, frames, width, height, seed):
+    # Nền tối có nhiễu + đĩa sáng có vân (optical flow bám được) chạy vòng tròn
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    texture = rng.integers(120, 256, (2 * height, 2 * width, 3), dtype=np.uint8)
+    yy, xx = np.mgrid[0:height, 0:width]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (width, height))
+    for i in range(frames):
+        a = 2 * math.pi * i / 120
+        cx, cy = width * (0.5 + 0.25 * math.cos(a)), height * (0.5 + 0.25 * math.sin(a))
+        disk = (xx - cx) ** 2 + (yy - cy) ** 2 < (height / 8) ** 2
+        ox, oy = int(width / 2 - cx), int(height / 2 - cy) # vân đi theo đĩa
+        frame = background.copy()
+        frame[disk] = texture[oy + height // 2:oy + height // 2 + height, ox + width // 2:ox + width // 2 + width][disk]
+        writer.write(frame)
+    writer.release()
+
+
+def build(old, preset, model, layout):
+    detector = (OldHandDetector if old else HandDetector)(INFERENCE_PRESETS[preset])
+    detector.hands.close()
+    detector.hands = model
+    return (OldAdaptiveHandDetector if old else AdaptiveHandDetector)(detector, layout, SCHEDULE_PRESETS["balanced"])
+
+
+def reader(video, reuse):
+    # Đọc như LatestFrameGrabber: reuse = xoay vòng 3 bộ đệm, không thì mỗi frame một mảng mới
+    cap = cv2.VideoCapture(video)
+    buffers = [None] * 3
+    count = 0
+
+    def read():
+        nonlocal count
+        if not reuse:
+            ret, frame = cap.read()
+            return frame if ret else None
+        i = count % len(buffers)
+        ret, frame = cap.read(image=buffers[i])
+        if not ret: return None
+        buffers[i] = frame
+        count += 1
+        return frame
+    return cap, read
+
+
+def run_path(video, old, preset, layout, frames, trace):
+    tracker = build(old, preset, NoHandModel(), layout)
+    cap, read = reader(video, reuse=not old)
+    samples = []
+    if trace: tracemalloc.start()
+    for _ in range(frames):
+        if trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        frame = read()
+        if frame is None: break
+        tracker(frame)
+        samples.append(tracemalloc.get_traced_memory()[1] - base if trace else time.perf_counter() - t0)
+    if trace: tracemalloc.stop()
+    cap.release()
+    return samples
+
+
+def compare(video, preset, layout, frames):
+    # Sai lệch (px màn hình) ngón trỏ / ngón cái giữa đường cũ và mới
+    old_detect, new_detect = build(True, preset, MirrorModel(), layout), build(False, preset, MirrorModel(), layout)
+    # HandDetector riêng (ROI của nó không bị lập lịch bỏ qua frame nào)
+    old_raw, new_raw = build(True, preset, MirrorModel(), layout).detect, build(False, preset, MirrorModel(), layout).detect
+    cap = cv2.VideoCapture(video)
+    raw_err, tracked_err = [], []
+    for _ in range(frames):
+        ret, frame = cap.read()
+        if not ret: break
+        for a, b, errors in ((old_raw(frame), new_raw(frame), raw_err), (old_detect(frame), new_detect(frame), tracked_err)):
+            sa, sb = to_screen(a, layout.width, layout.height), to_screen(b, layout.width, layout.height)
+            if sa is None or sb is None:
+                errors.append(0.0 if sa is sb else math.inf)
+            else:
+                errors.append(max(math.dist(sa[0], sb[0]), math.dist(sa[1], sb[1])))
+    cap.release()
+    return max(raw_err), max(tracked_err), new_detect.frames_tracked
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="file video (mặc định: tạo video thử)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--presets", nargs="*", default=["single", "lite-roi-half"], help="INFERENCE_PRESETS để đo / so")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Ngưỡng véo nhỏ: ngón cái của MirrorModel luôn đủ xa ngưỡng để lập lịch được bám
+    layout = ControlLayout(1080, 720, 0, 0, 1, 0, 0, 0, 0, 0, 10, 12.5)
+    with tempfile.TemporaryDirectory() as tmp:
+        video = args.video
+        if video is None:
+            video = os.path.join(tmp, "bench.avi")
+            make_video(video, args.frames, args.width, args.height, args.seed)
+        print(f"{'preset':14s} {'đường':6s} {'KB/frame':>9s} {'µs/frame':>9s}")
+        for preset in args.presets:
+            for old in (True, False):
+                allocated = run_path(video, old, preset, layout, args.frames, True)[args.warmup:]
+                times = run_path(video, old, preset, layout, args.frames, False)[args.warmup:]
+                print(f"{preset:14s} {'cũ' if old else 'mới':6s} {statistics.mean(allocated) / 1024:9.1f} {statistics.median(times) * 1e6:9.0f}")
+
+        print(f"\n{'preset':14s} {'lệch detect px':>15s} {'lệch sau bám px':>16s} {'frame bám':>10s}")
+        for preset in args.presets:
+            raw, tracked, frames_tracked = compare(video, preset, layout, args.frames)
+            print(f"{preset:14s} {raw:15.2e} {tracked:16.2e} {frames_tracked:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# ---------------- Benchmark: mô phỏng headless bằng GameState ----------------
+# Chạy: python benchmarks/bench_game.py [--games 2000] [--seed 1]
+# Chơi ngẫu nhiên nhiều ván (không pygame / cv2 / camera) và in số nước đi mỗi giây.
+# Cùng seed phải cho cùng kết quả.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.game import GameState
+
+
+def play_random(seed):
+    rng = random.Random(seed)
+    game = GameState(rng=rng)
+    while not game.is_game_over():
+        game.place_block(*rng.choice(game.legal_moves()))
+    return game.score, game.moves_made
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    results = [play_random(args.seed + i) for i in range(args.games)]
+    elapsed = time.perf_counter() - t0
+
+    assert results[:20] == [play_random(args.seed + i) for i in range(20)], "cùng seed phải cho cùng ván"
+
+    total_moves = sum(m for _, m in results)
+    print(f"{args.games} ván, {total_moves} nước đi trong {elapsed:.2f}s")
+    print(f"  {total_moves / elapsed:,.0f} nước đi/giây, điểm TB {sum(s for s, _ in results) / len(results):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# ---------------- Benchmark: server tracking dùng chung (shared memory) ----------------
+# Chạy: python benchmarks/bench_hand_server.py [--clients 1 4 8] [--seconds 10] [--video clip.mp4]
+# Một process server publish landmark vào LandmarkRing (handblast.shared) như tools/hand_server.py:
+# mặc định là nguồn replay (bản ghi tổng hợp 21 điểm, không cần camera / MediaPipe), --video
+# thì MediaPipe thật trên file video. Với mỗi số cửa sổ trong --clients: bấy nhiêu process đọc
+# qua SharedHandSource đúng nhịp vòng lặp game (--fps), mỗi cửa sổ một process Python riêng, in:
+#   - nhận: tỉ lệ sample server đã publish mà cửa sổ thấy (vòng lặp chậm hơn server thì < 100%)
+#   - trễ: lúc cửa sổ đọc được - lúc server suy luận xong (gồm cả chờ tới frame kế tiếp của game)
+#   - µs/đọc: thời gian latest() khi có sample mới (chép ô + đổi sang HandSample)
+#   - sai: sample đọc được không khớp điểm nào của bản ghi (đọc rách), phải là 0
+#   - CPU s/phút: trung bình mỗi cửa sổ (chỉ phần đọc ring + ngủ, không vẽ) và của server
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.control import ControlLayout
+from handblast.replay import Recording, synthesize_recording
+from handblast.shared import LandmarkRing, ServerConfig, SharedHandSource, ring_name, run_publisher
+
+V2_LAYOUT = ControlLayout(1080, 720, 60, 120, 60, 600, 1020, 320, 130, 110, 40, 50)
+
+
+def client(prefix, camera, seconds, fps, replay):
+    expected = set()
+    if replay:
+        expected = {s.points for s, _ in Recording.load(replay).samples()}
+    source = SharedHandSource(prefix, camera).start()
+    seen, wrong, latencies, reads = 0, 0, [], []
+    last = 0
+    cpu0 = time.process_time()
+    start = time.perf_counter()
+    next_at = start
+    while time.perf_counter() - start < seconds:
+        t0 = time.perf_counter()
+        sample = source.latest()
+        t1 = time.perf_counter()
+        if sample is not None and sample.seq != last:
+            last = sample.seq
+            seen += 1
+            reads.append(t1 - t0)
+            latencies.append(t1 - sample.inferred_at)
+            if expected and sample.points not in expected: wrong += 1
+        next_at += 1 / fps
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+    cpu = time.process_time() - cpu0
+    source.stop()
+    return {"seen": seen, "wrong": wrong, "latencies": latencies, "reads": reads, "cpu": cpu / (time.perf_counter() - start) * 60}
+
+
+def serve(prefix, camera, config, stop, replay, measure, cpu):
+    # run_publisher + đo CPU của cả process server trong lúc các cửa sổ chạy (measure .. stop)
+    def watch():
+        measure.wait()
+        t0, cpu0 = time.perf_counter(), time.process_time()
+        stop.wait()
+        cpu.value = (time.process_time() - cpu0) / (time.perf_counter() - t0) * 60
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    run_publisher(prefix, camera, config, stop, replay)
+    watcher.join(1.0)
+
+
+def run(args, prefix, clients, replay, config):
+    context = multiprocessing.get_context("spawn")
+    stop, measure = context.Event(), context.Event()
+    cpu = context.Value("d", 0.0)
+    camera = 0 if replay else args.video
+    server = context.Process(target=serve, args=(prefix, camera, config, stop, replay, measure, cpu), daemon=True)
+    server.start()
+    ring = None
+    while ring is None and server.is_alive():
+        try:
+            ring = LandmarkRing.attach(ring_name(prefix, camera), untrack=False)
+        except FileNotFoundError:
+            time.sleep(0.05)
+    # Chờ sample đầu tiên (MediaPipe nạp model ở lần process đầu)
+    while ring is not None and ring.latest_seq == 0 and server.is_alive(): time.sleep(0.05)
+    if ring is None: return None
+    # Mỗi cửa sổ là một process Python riêng như khi mở nhiều file game
+    cmd = [sys.executable, os.path.abspath(__file__), "--client", prefix, "--camera", str(camera),
+           "--seconds", str(args.seconds), "--fps", str(args.fps)] + (["--replay", replay] if replay else [])
+    first, t0 = ring.latest_seq, time.perf_counter()
+    measure.set()
+    workers = [subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) for _ in range(clients)]
+    outputs = [json.loads(w.communicate()[0].strip().splitlines()[-1]) for w in workers]
+    published, elapsed = ring.latest_seq - first, time.perf_counter() - t0
+    stop.set()
+    server.join(5.0)
+    ring.close()
+    return published, elapsed, outputs, cpu.value
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", nargs="*", type=int, default=[1, 4, 8])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=int, default=30, help="FPS vòng lặp của mỗi cửa sổ")
+    parser.add_argument("--video", help="file video: server chạy MediaPipe thật thay cho bản ghi")
+    parser.add_argument("--inference", default="single")
+    parser.add_argument("--moves", type=int, default=40, help="số nước của bản ghi tổng hợp")
+    parser.add_argument("--client", help=argparse.SUPPRESS)
+    parser.add_argument("--camera", help=argparse.SUPPRESS)
+    parser.add_argument("--replay", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.client:
+        camera = int(args.camera) if args.camera.isdigit() else args.camera
+        print(json.dumps(client(args.client, camera, args.seconds, args.fps, args.replay)))
+        return
+
+    prefix = f"hbb-bench-{os.getpid()}"
+    config = ServerConfig(args.inference, capture="default", power="off")
+    with tempfile.TemporaryDirectory() as tmp:
+        replay = None
+        if not args.video:
+            replay = os.path.join(tmp, "bench.hbr")
+            synthesize_recording(1, V2_LAYOUT, args.moves, 5, full=True).save(replay)
+        print(f"nguồn: {'video ' + args.video if args.video else 'bản ghi tổng hợp'}, {args.seconds:.0f}s, cửa sổ {args.fps} fps, {os.cpu_count()} nhân")
+        print(f"{'cửa sổ':>6s} {'server/s':>9s} {'nhận':>6s} {'trễ p50':>8s} {'p95':>6s} {'µs/đọc':>7s} {'sai':>4s} {'CPU cửa sổ':>11s} {'CPU server':>11s}")
+        for clients in args.clients:
+            result = run(args, prefix, clients, replay, config)
+            if result is None:
+                print(f"{clients:6d} server không chạy được")
+                continue
+            published, elapsed, outputs, server_cpu = result
+            latencies = sorted(l for o in outputs for l in o["latencies"])
+            reads = [r for o in outputs for r in o["reads"]]
+            seen = statistics.mean(o["seen"] for o in outputs)
+            wrong = sum(o["wrong"] for o in outputs)
+            client_cpu = statistics.mean(o["cpu"] for o in outputs)
+            if not latencies:
+                print(f"{clients:6d} không nhận được sample nào")
+                continue
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            print(f"{clients:6d} {published / elapsed:9.1f} {seen / max(published, 1):6.0%} {statistics.median(latencies) * 1000:6.1f}ms "
+                  f"{p95 * 1000:4.1f}ms {statistics.median(reads) * 1e6:7.1f} {wrong:4d} {client_cpu:9.2f}s {server_cpu:9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
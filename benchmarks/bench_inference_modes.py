@@ -0,0 +1,107 @@
+# ---------------- Đo đánh đổi độ trễ / độ chính xác của các chế độ suy luận ----------------
+# Chạy: python benchmarks/bench_inference_modes.py [--video clip.mp4 | --camera 0] [--frames 300]
+# Các frame được đọc vào bộ nhớ trước, sau đó MỌI chế độ trong INFERENCE_PRESETS chạy
+# trên cùng một dãy frame, nên có thể so trực tiếp với chế độ "default" (cấu hình cũ):
+#   - latency: thời gian HandDetector(frame) (ms, trung bình và p95)
+#   - detect: tỉ lệ frame thấy tay
+#   - jitter: RMS sai phân bậc 2 của con trỏ (px) — rung càng nhiều càng lớn
+#   - err: sai lệch trung bình của con trỏ so với "default" (px)
+#   - pinch: tỉ lệ frame đang "véo" (dist < DIST_THRESHOLD), agree: tỉ lệ trùng với "default"
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.benchutil import percentile, read_frames, to_screen
+from handblast.inference import HandDetector, INFERENCE_PRESETS
+
+
+def run_mode(config, frames, warmup):
+    detector = HandDetector(config)
+    for frame in frames[:warmup]:
+        detector(frame)
+    latencies = []
+    results = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        results.append(detector(frame))
+        latencies.append(time.perf_counter() - t0)
+    detector.close()
+    return latencies, results
+
+
+def summarize(latencies, results, reference, args):
+    screen = [to_screen(p, args.width, args.height) for p in results]
+    ref_screen = [to_screen(p, args.width, args.height) for p in reference]
+
+    detected = [s for s in screen if s is not None]
+    jitter_terms = []
+    for a, b, c in zip(screen, screen[1:], screen[2:]):
+        if a is None or b is None or c is None: continue
+        ax = a[0][0] - 2 * b[0][0] + c[0][0]
+        ay = a[0][1] - 2 * b[0][1] + c[0][1]
+        jitter_terms.append(ax * ax + ay * ay)
+
+    errors = []
+    agree = 0
+    compared = 0
+    pinches = 0
+    for s, r in zip(screen, ref_screen):
+        pinch = s is not None and math.dist(*s) < args.dist_threshold
+        pinches += pinch
+        if r is None: continue
+        compared += 1
+        agree += pinch == (math.dist(*r) < args.dist_threshold)
+        if s is not None: errors.append(math.dist(s[0], r[0]))
+
+    return {
+        "latency_ms": sum(latencies) / len(latencies) * 1000,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+        "detect_rate": len(detected) / len(results),
+        "jitter_px": math.sqrt(sum(jitter_terms) / len(jitter_terms)) if jitter_terms else 0.0,
+        "cursor_err_px": sum(errors) / len(errors) if errors else 0.0,
+        "pinch_rate": pinches / len(detected) if detected else 0.0,
+        "pinch_agree": agree / compared if compared else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="file video thay cho camera")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--modes", nargs="*", default=list(INFERENCE_PRESETS))
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--dist-threshold", type=float, default=40)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.camera, args.frames)
+    if not frames:
+        sys.exit("Không đọc được frame nào từ camera/video")
+    print(f"{len(frames)} frame, {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    modes = ["default"] + [m for m in args.modes if m != "default"]
+    runs = {m: run_mode(INFERENCE_PRESETS[m], frames, args.warmup) for m in modes}
+    reference = runs["default"][1]
+
+    report = {}
+    print(f"{'mode':<14}{'lat ms':>8}{'p95':>8}{'detect':>8}{'jitter':>8}{'err px':>8}{'pinch':>7}{'agree':>7}")
+    for m in modes:
+        r = report[m] = summarize(*runs[m], reference, args)
+        print(f"{m:<14}{r['latency_ms']:8.1f}{r['latency_p95_ms']:8.1f}{r['detect_rate']:8.2f}"
+              f"{r['jitter_px']:8.1f}{r['cursor_err_px']:8.1f}{r['pinch_rate']:7.2f}{r['pinch_agree']:7.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ---------------- Benchmark: CPU khi không ai chơi (POWER_MODE) ----------------
+# Chạy: python benchmarks/bench_power.py [--seconds 20] [--modes off balanced kiosk] [--scripts v2]
+# Mỗi lần đo là một process mới chạy file game thật (SDL video driver "dummy", thư mục tạm),
+# MediaPipe thật, camera giả trả frame trống 30 fps (không có tay -> sau idle_after giây là
+# vào "idle"), hoặc --video (có tay thì phần lớn thời gian ở "active"). POWER_MODE của file
+# game được thay bằng preset cần đo. In số giây CPU / phút (cả process) của từng chế độ và
+# tỉ lệ frame thật sự vẽ lại.
+import argparse
+import json
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SCRIPTS = {"v1": "Hand Block Blast.py", "v2": "Hand Block Blast v2.py"}
+
+
+class BlankCamera:
+    # Thay cv2.VideoCapture: frame đen 640x480 đúng nhịp fps
+    def __init__(self, fps=30):
+        import numpy as np
+        self.frame = np.zeros((480, 640, 3), np.uint8)
+        self.period = 1 / fps
+        self.next_at = time.perf_counter()
+
+    def read(self, image=None):
+        self.next_at += self.period
+        time.sleep(max(0.0, self.next_at - time.perf_counter()))
+        if image is None: return True, self.frame.copy()
+        image[:] = self.frame
+        return True, image
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def child(script, mode, seconds, video):
+    import cv2
+    import handblast.power as power
+    open_capture = cv2.VideoCapture
+    cv2.VideoCapture = (lambda source, *args: open_capture(video, *args)) if video else (lambda source, *args: BlankCamera())
+    # File game tra POWER_PRESETS[POWER_MODE] lúc chạy: mọi tên đều trỏ về preset cần đo
+    chosen = power.POWER_PRESETS[mode]
+    for name in power.POWER_PRESETS: power.POWER_PRESETS[name] = chosen
+
+    def stop_later():
+        time.sleep(seconds)
+        pygame = sys.modules["pygame"]
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    threading.Thread(target=stop_later, daemon=True).start()
+    g = runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
+    return {m: (s.wall, s.cpu, s.frames, s.redraws) for m, s in g["power"].stats.items() if s.frames}
+
+
+def run_child(args, script, mode):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", mode, "--script", script, "--seconds", str(args.seconds)]
+    if args.video: cmd += ["--video", os.path.abspath(args.video)]
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--modes", nargs="*", default=["off", "balanced", "kiosk"])
+    parser.add_argument("--scripts", nargs="*", choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    parser.add_argument("--video", help="file video thay cho camera trống")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--script", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.script, args.child, args.seconds, args.video)))
+        return
+
+    print(f"{args.seconds:.0f}s mỗi lần, camera {'video ' + args.video if args.video else 'trống (không có tay)'}")
+    print(f"{'':12s} {'POWER_MODE':10s} {'chế độ':10s} {'giây':>6s} {'CPU s/phút':>11s} {'fps':>6s} {'vẽ lại':>8s}")
+    for version in args.scripts:
+        for mode in args.modes:
+            for name, (wall, cpu, frames, redraws) in run_child(args, SCRIPTS[version], mode).items():
+                print(f"{version:12s} {mode:10s} {name:10s} {wall:6.1f} {cpu / wall * 60:11.1f} {frames / wall:6.1f} {redraws / frames:7.0%}")
+
+
+if __name__ == "__main__":
+    main()
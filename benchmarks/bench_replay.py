@@ -0,0 +1,67 @@
+# ---------------- Benchmark: chạy lại hàng loạt bản ghi landmark ----------------
+# Chạy: python benchmarks/bench_replay.py [--sessions 2000] [--moves 30] [--full] [--playable] [--dir thư_mục]
+# Dựng --sessions bản ghi giả lập (handblast.replay.synthesize_recording, bố cục v2), ghi ra
+# file .hbr, rồi đọc lại + chạy lại headless toàn bộ: mọi bản ghi phải cho đúng lưới / điểm
+# lúc ghi. In tốc độ ghi / đọc / chạy lại và số byte mỗi frame.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.control import ControlLayout
+from handblast.replay import Recording, replay_headless, synthesize_recording
+
+# Bố cục của "Hand Block Blast v2.py" (CONTROL_LAYOUT), chép lại để không phải mở pygame
+V2_LAYOUT = ControlLayout(1080, 720, 60, 120, 60, 600, 1020, 320, 130, 110, 40)
+NUM_COLORS = 5
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--moves", type=int, default=30)
+    parser.add_argument("--full", action="store_true", help="ghi đủ 21 điểm thay vì chỉ ngón trỏ + ngón cái")
+    parser.add_argument("--playable", action="store_true", help="ván chơi với GameState(playable_tray=True)")
+    parser.add_argument("--dir", help="thư mục chứa file .hbr (mặc định: thư mục tạm)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.dir or tmp
+        os.makedirs(folder, exist_ok=True)
+
+        t0 = time.perf_counter()
+        paths = []
+        for i in range(args.sessions):
+            path = os.path.join(folder, f"session_{args.seed + i:05d}.hbr")
+            synthesize_recording(args.seed + i, V2_LAYOUT, args.moves, NUM_COLORS, args.full, playable_tray=args.playable).save(path)
+            paths.append(path)
+        t_write = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        recordings = [Recording.load(path) for path in paths]
+        t_load = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        mismatches = 0
+        for recording in recordings:
+            game = replay_headless(recording, NUM_COLORS)
+            if game.score != recording.final_score or bytes(game.grid.colors) != recording.final_grid:
+                mismatches += 1
+        t_replay = time.perf_counter() - t0
+
+        frames = sum(len(r) for r in recordings)
+        size = sum(os.path.getsize(p) for p in paths)
+
+    assert mismatches == 0, f"{mismatches} bản ghi chạy lại khác lúc ghi"
+    print(f"OK: {args.sessions} bản ghi, {frames} frame chạy lại giống hệt lúc ghi")
+    print(f"  dựng + ghi : {t_write:.2f}s")
+    print(f"  đọc file   : {t_load:.2f}s ({size / frames:.1f} byte/frame, tổng {size / 1024:.0f} KB)")
+    print(f"  chạy lại   : {t_replay:.2f}s ({args.sessions / t_replay:,.0f} bản ghi/giây, {frames / t_replay:,.0f} frame/giây)")
+
+
+if __name__ == "__main__":
+    main()
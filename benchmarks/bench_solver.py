@@ -0,0 +1,69 @@
+# ---------------- Benchmark: gợi ý nước đi (HintSearch) ----------------
+# Chạy: python benchmarks/bench_solver.py [--boards 30] [--evaluation balanced] [--budget 0.005]
+# Lấy các thế cờ từ ván chơi ngẫu nhiên (GameState, seed cố định), rồi đo:
+#   - thời gian tìm trọn vẹn (tất cả độ sâu) cho mỗi thế cờ
+#   - khi chia theo lát `--budget` giây/frame: số frame cần và lát dài nhất (vượt ngân sách bao nhiêu)
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.game import GameState
+from handblast.solver import EVALUATIONS, HintSearch
+
+
+def sample_positions(count, seed):
+    # Thế cờ lúc khay vừa làm mới (3 khối), đi ngẫu nhiên vài nước giữa các lần lấy mẫu
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = GameState(rng=rng)
+        while not game.is_game_over() and len(positions) < count:
+            if all(b is not None for b in game.tray):
+                positions.append((game.grid.occupied, [dict(b) for b in game.tray]))
+            game.place_block(*rng.choice(game.legal_moves()))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", type=int, default=30)
+    parser.add_argument("--evaluation", choices=sorted(EVALUATIONS), default="balanced")
+    parser.add_argument("--budget", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.boards, args.seed)
+
+    full_times = []
+    nodes = 0
+    for occ, tray in positions:
+        search = HintSearch(occ, tray, args.evaluation)
+        t0 = time.perf_counter()
+        search.step(float("inf"))
+        full_times.append(time.perf_counter() - t0)
+        nodes += search.nodes
+
+    frames = []
+    worst_slice = 0.0
+    for occ, tray in positions:
+        search = HintSearch(occ, tray, args.evaluation)
+        n = 0
+        while not search.done:
+            t0 = time.perf_counter()
+            search.step(args.budget)
+            worst_slice = max(worst_slice, time.perf_counter() - t0)
+            n += 1
+        frames.append(n)
+
+    full_times.sort()
+    print(f"{len(positions)} thế cờ, đánh giá '{args.evaluation}', {nodes} node")
+    print(f"  tìm trọn vẹn: TB {sum(full_times) / len(full_times) * 1000:.1f}ms, max {full_times[-1] * 1000:.1f}ms")
+    print(f"  lát {args.budget * 1000:.1f}ms: TB {sum(frames) / len(frames):.1f} frame, max {max(frames)} frame, lát dài nhất {worst_slice * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# ---------------- Benchmark: thời gian khởi động ----------------
+# Chạy: python benchmarks/bench_startup.py [--runs 3] [--until ready] [--video clip.mp4] [--scripts v2]
+# Mỗi lần đo là một process Python mới (import lạnh như khi mở game thật), chạy trong thư mục
+# tạm với SDL video driver "dummy":
+#   - staged: chạy file game thật; một thread theo dõi startup_timer của file đó và đóng cửa
+#     sổ khi có mốc --until (hoặc hết --timeout). In các mốc window, first_frame, model, camera,
+#     ready, first_hand (giây kể từ dòng đầu của file game)
+#   - sequential: làm lại đúng thứ tự cũ (import cv2 + mediapipe, dựng Hands, mở camera rồi mới
+#     vẽ frame đầu) để so thời gian tới frame đầu tiên
+# Không có camera thì dùng --video (khi đó cv2 được import trước để thay nguồn, mốc của staged
+# nhanh hơn thực tế một chút) hoặc --until first_frame / model.
+import argparse
+import json
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+SCRIPTS = {"v1": "Hand Block Blast.py", "v2": "Hand Block Blast v2.py"}
+MARKS = ("window", "first_frame", "model", "camera", "ready", "first_hand")
+
+
+def child_staged(script, until, timeout, video):
+    if video:
+        import cv2
+        open_capture = cv2.VideoCapture
+        cv2.VideoCapture = lambda source, *args: open_capture(video, *args)
+
+    def watch():
+        # runpy đặt module đang chạy vào sys.modules["__main__"] trong lúc chạy
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            timer = getattr(sys.modules["__main__"], "startup_timer", None)
+            if timer is not None and until in timer.marks: break
+            time.sleep(0.005)
+        pygame = sys.modules.get("pygame")
+        if pygame is not None: pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    threading.Thread(target=watch, daemon=True).start()
+    g = runpy.run_path(os.path.join(ROOT, script), run_name="__main__")
+    return g["startup_timer"].marks
+
+
+def child_sequential(camera, video, mode):
+    # Thứ tự cũ: mọi thứ nặng xong rồi mới vẽ frame đầu
+    t0 = time.perf_counter()
+    marks = {}
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((1080, 720))
+    marks["window"] = time.perf_counter() - t0
+    import cv2
+    from handblast.inference import HandDetector, INFERENCE_PRESETS
+    detector = HandDetector(INFERENCE_PRESETS[mode])
+    marks["model"] = time.perf_counter() - t0
+    cap = cv2.VideoCapture(video if video else camera)
+    marks["camera"] = time.perf_counter() - t0
+    screen.fill((0, 0, 0))
+    pygame.display.flip()
+    marks["first_frame"] = time.perf_counter() - t0
+    cap.release()
+    detector.close()
+    pygame.quit()
+    return marks
+
+
+def run_child(kind, args, script=None):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", kind, "--until", args.until, "--timeout", str(args.timeout)]
+    if script: cmd += ["--script", script]
+    if args.video: cmd += ["--video", os.path.abspath(args.video)]
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    with tempfile.TemporaryDirectory() as tmp: # kỷ lục / bảng xếp hạng của lần đo không lẫn vào thư mục thật
+        out = subprocess.run(cmd, cwd=tmp, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def print_runs(name, runs):
+    cells = []
+    for mark in MARKS:
+        values = [r[mark] for r in runs if mark in r]
+        cells.append(f"{statistics.median(values):12.2f}" if values else f"{'-':>12s}")
+    print(f"{name:14s}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--until", choices=MARKS, default="ready", help="mốc khởi động thì dừng lần đo")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--video", help="file video thay cho camera")
+    parser.add_argument("--scripts", nargs="*", choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    parser.add_argument("--child", choices=("staged", "sequential"), help=argparse.SUPPRESS)
+    parser.add_argument("--script", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "staged":
+        print(json.dumps(child_staged(args.script, args.until, args.timeout, args.video)))
+        return
+    if args.child == "sequential":
+        print(json.dumps(child_sequential(0, args.video, "single")))
+        return
+
+    print(f"{args.runs} lần mỗi cách, trung vị (giây từ lúc bắt đầu chạy)")
+    print(f"{'':14s}" + "".join(f"{m:>12s}" for m in MARKS))
+    print_runs("sequential", [run_child("sequential", args) for _ in range(args.runs)])
+    for version in args.scripts:
+        print_runs(f"staged {version}", [run_child("staged", args, SCRIPTS[version]) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# ---------------- Benchmark: ghi kỷ lục + bảng xếp hạng ----------------
+# Chạy: python benchmarks/bench_storage.py [--updates 2000] [--sessions 100000]
+# 1. Thời gian vòng lặp vẽ bị chặn mỗi lần phá kỷ lục (µs / lần), ghi vào thư mục tạm:
+#      - sync: open + write như save_high_score() cũ
+#      - atomic sync: write_atomic (fsync + os.replace) ngay trong frame
+#      - ScoreWriter: chỉ submit_high_score; thread nền gộp và ghi, đếm số lần ghi thật
+# 2. Leaderboard: chèn --sessions ván, rồi thời gian top 10 khi có / không có index theo điểm.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.storage import Leaderboard, ScoreWriter, Session, write_atomic
+
+
+def time_calls(fn, count):
+    per_call = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        fn(i)
+        per_call.append(time.perf_counter() - t0)
+    per_call.sort()
+    return statistics.mean(per_call) * 1e6, per_call[int(0.99 * (len(per_call) - 1))] * 1e6
+
+
+def bench_high_score(tmp, updates):
+    path = os.path.join(tmp, "highscore.txt")
+
+    def sync(i):
+        with open(path, "w") as f:
+            f.write(str(i))
+
+    print(f"{'ghi kỷ lục':24s} {'µs/lần':>9s} {'p99':>9s} {'số lần ghi':>11s}")
+    for name, fn in (("sync", sync), ("atomic sync", lambda i: write_atomic(path, str(i)))):
+        mean, p99 = time_calls(fn, updates)
+        print(f"{name:24s} {mean:9.1f} {p99:9.1f} {updates:11d}")
+
+    writer = ScoreWriter(path).start()
+    mean, p99 = time_calls(writer.submit_high_score, updates)
+    writer.close()
+    with open(path) as f:
+        assert int(f.read()) == updates - 1, "ScoreWriter không ghi giá trị cuối"
+    print(f"{'ScoreWriter.submit':24s} {mean:9.1f} {p99:9.1f} {writer.high_score_writes:11d}")
+
+
+def bench_leaderboard(tmp, sessions, seed):
+    rng = random.Random(seed)
+    rows = [Session(rng.randrange(2000), rng.uniform(30, 900), rng.randrange(200), 1.7e9 + i) for i in range(sessions)]
+    path = os.path.join(tmp, "leaderboard.db")
+    board = Leaderboard(path)
+    t0 = time.perf_counter()
+    board.add_many(rows)
+    insert = time.perf_counter() - t0
+    print(f"\nLeaderboard: chèn {board.count()} ván trong {insert * 1000:.0f} ms")
+
+    def top_ms(conn_board, repeat=200):
+        t0 = time.perf_counter()
+        for _ in range(repeat): result = conn_board.top(10)
+        return (time.perf_counter() - t0) / repeat * 1000, result
+
+    with_index, best = top_ms(board)
+    board.conn.execute("DROP INDEX sessions_by_score")
+    without_index, best_scan = top_ms(board, 20)
+    board.close()
+    assert best == best_scan
+    print(f"top 10: {with_index:.3f} ms có index, {without_index:.3f} ms quét cả bảng ({without_index / with_index:.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=2000, help="số lần phá kỷ lục liên tiếp")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_high_score(tmp, args.updates)
+        bench_leaderboard(tmp, args.sessions, args.seed)
+
+
+if __name__ == "__main__":
+    main()
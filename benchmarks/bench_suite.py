@@ -0,0 +1,237 @@
+# ---------------- Bộ benchmark: logic game, vẽ, điều khiển tay ----------------
+# Chạy: python benchmarks/bench_suite.py [--json out.json] [--compare baseline.json] [--filter draw]
+# Đo trên dữ liệu cố định (seed), không cần camera / cửa sổ thật:
+#   - logic/*: can_place, place_block, is_game_over (thay any_moves_available), MoveIndex.rebuild
+#     trên các lưới dựng sẵn từ trống đến gần đầy
+#   - draw/<v1|v2>/*: draw_grid, draw_tray, draw_score, draw_title vẽ lên Surface ẩn
+#     (SDL video driver "dummy"); file game được import, vòng lặp chính không chạy
+#   - hand/<v1|v2>/control_update: HandController.update (thay update_hand_control) với chuỗi
+#     landmark dựng sẵn (di tới khay, véo, kéo, thả) theo bố cục của từng file game
+# Mỗi case chạy --repeat lần, lấy trung vị thời gian / lần gọi (µs).
+# --json ghi kết quả ra file; --compare so với file baseline đã lưu, case nào chậm hơn
+# quá --tolerance thì bị đánh dấu REGRESSION và thoát với mã 1.
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from handblast.engine import GRID_SIZE, CELLS, Board
+from handblast.game import GameState
+from handblast.moves import MoveIndex
+from handblast.replay import synthesize_recording
+
+SCRIPTS = {"v1": "Hand Block Blast.py", "v2": "Hand Block Blast v2.py"}
+FILLS = (0.0, 0.25, 0.5, 0.75, 0.9)
+
+
+# ---------------- Dữ liệu cố định ----------------
+def board_fixture(fill, seed):
+    # Lưới có ~fill * CELLS ô, không có hàng / cột nào đầy (như lưới thật sau khi xoá dòng)
+    rng = random.Random(seed)
+    cells = list(range(CELLS))
+    rng.shuffle(cells)
+    rows = [[0] * GRID_SIZE for _ in range(GRID_SIZE)]
+    row_count = [0] * GRID_SIZE
+    col_count = [0] * GRID_SIZE
+    target = int(fill * CELLS)
+    placed = 0
+    for i in cells:
+        if placed >= target: break
+        r, c = divmod(i, GRID_SIZE)
+        if row_count[r] == GRID_SIZE - 1 or col_count[c] == GRID_SIZE - 1: continue
+        rows[r][c] = rng.randrange(5) + 1
+        row_count[r] += 1
+        col_count[c] += 1
+        placed += 1
+    return Board.from_rows(rows)
+
+
+def game_fixture(fill, seed):
+    game = GameState(rng=random.Random(seed), high_score=10**9)
+    game.grid = board_fixture(fill, seed)
+    game.moves.rebuild(game.grid, game.tray)
+    return game
+
+
+def clone_game(game):
+    copy = GameState(rng=random.Random(0), high_score=game.high_score)
+    copy.grid = game.grid.copy()
+    copy.score = game.score
+    copy.tray = [None if b is None else dict(b) for b in game.tray]
+    copy.moves = MoveIndex(copy.grid, copy.tray)
+    return copy
+
+
+# ---------------- Case logic ----------------
+def logic_cases(seed):
+    cases = []
+    for fill in FILLS:
+        tag = f"{int(fill * 100)}%"
+        game = game_fixture(fill, seed)
+        anchors = [(slot, gx, gy) for slot in range(len(game.tray)) for gy in range(GRID_SIZE) for gx in range(GRID_SIZE)]
+
+        def can_place(game=game, anchors=anchors):
+            def run():
+                for move in anchors: game.can_place(*move)
+            return run, len(anchors)
+        cases.append((f"logic/can_place/{tag}", can_place))
+
+        moves = game.legal_moves()
+        if moves:
+            def place_block(game=game, moves=moves):
+                # Mỗi nước đặt trên một bản sao riêng (tạo trước, không tính giờ)
+                clones = [(clone_game(game), move) for move in moves]
+                def run():
+                    for g, move in clones: g.place_block(*move)
+                return run, len(clones)
+            cases.append((f"logic/place_block/{tag}", place_block))
+
+        def is_game_over(game=game):
+            def run():
+                for _ in range(1000): game.is_game_over()
+            return run, 1000
+        cases.append((f"logic/is_game_over/{tag}", is_game_over))
+
+        def rebuild(game=game):
+            def run():
+                for _ in range(100): game.moves.rebuild(game.grid, game.tray)
+            return run, 100
+        cases.append((f"logic/moves_rebuild/{tag}", rebuild))
+    return cases
+
+
+# ---------------- Import file game (không chạy vòng lặp) ----------------
+def load_script(version):
+    spec = importlib.util.spec_from_file_location(f"hand_block_blast_{version}", os.path.join(ROOT, SCRIPTS[version]))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    mod.HIGHSCORE_FILE = os.devnull # không ghi đè kỷ lục thật khi benchmark
+    return mod
+
+
+def draw_cases(version, mod, seed):
+    import pygame
+    surface = pygame.Surface((mod.WIDTH, mod.HEIGHT))
+    cases = []
+
+    def with_game(fill, fn, calls=50):
+        def prepare():
+            mod.game = game_fixture(fill, seed)
+            def run():
+                for _ in range(calls): fn()
+            return run, calls
+        return prepare
+
+    for fill in (0.0, 0.5, 0.9):
+        tag = f"{int(fill * 100)}%"
+        cases.append((f"draw/{version}/draw_grid/{tag}", with_game(fill, lambda: mod.draw_grid(surface))))
+    cases.append((f"draw/{version}/draw_tray", with_game(0.5, lambda: mod.draw_tray(surface, mod.game.tray))))
+    cases.append((f"draw/{version}/draw_score", with_game(0.5, lambda: mod.draw_score(surface))))
+    if hasattr(mod, "draw_title"):
+        cases.append((f"draw/{version}/draw_title", with_game(0.5, lambda: mod.draw_title(surface))))
+    return cases
+
+
+# ---------------- Điều khiển tay ----------------
+def hand_cases(version, mod, seed):
+    # Chuỗi landmark dựng sẵn (handblast.replay.synthesize_recording) theo bố cục của file game
+    recording = synthesize_recording(seed, mod.CONTROL_LAYOUT, 20, len(mod.BLOCK_COLORS))
+    samples = [sample for sample, _ in recording.samples()]
+
+    def prepare():
+        mod.game = GameState(rng=random.Random(seed), high_score=10**9, num_colors=len(mod.BLOCK_COLORS))
+        mod.control.game = mod.game
+        mod.control.release()
+        def run():
+            for sample in samples: mod.control.update(sample)
+            assert mod.game.score == recording.final_score, "HandController không chạy lại y hệt"
+        return run, len(samples)
+    return [(f"hand/{version}/control_update", prepare)]
+
+
+# ---------------- Đo + so sánh ----------------
+def measure(prepare, repeat):
+    per_call = []
+    for _ in range(repeat):
+        run, calls = prepare()
+        t0 = time.perf_counter()
+        run()
+        per_call.append((time.perf_counter() - t0) / calls)
+    return {"median_us": statistics.median(per_call) * 1e6, "min_us": min(per_call) * 1e6, "calls": calls}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"\n{'case':44s} {'baseline':>10s} {'hiện tại':>10s} {'tỉ lệ':>7s}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:44s} {'-':>10s} {result['median_us']:10.2f}    (mới)")
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  nhanh hơn"
+        print(f"{name:44s} {base['median_us']:10.2f} {result['median_us']:10.2f} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--json", help="ghi kết quả ra file JSON (dùng làm baseline cho --compare)")
+    parser.add_argument("--compare", help="file JSON baseline để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="chậm hơn baseline quá tỉ lệ này = regression")
+    parser.add_argument("--filter", default="", help="chỉ chạy case có tên chứa chuỗi này")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scripts", nargs="*", choices=sorted(SCRIPTS), default=sorted(SCRIPTS))
+    args = parser.parse_args()
+
+    cases = logic_cases(args.seed)
+    for version in args.scripts:
+        if args.filter.startswith("logic"): break # không cần import file game
+        mod = load_script(version)
+        cases += draw_cases(version, mod, args.seed)
+        cases += hand_cases(version, mod, args.seed)
+
+    results = {}
+    for name, prepare in cases:
+        if args.filter not in name: continue
+        results[name] = measure(prepare, args.repeat)
+        print(f"{name:44s} {results[name]['median_us']:10.2f} µs/lần (min {results[name]['min_us']:.2f})")
+
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case chậm hơn baseline quá {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
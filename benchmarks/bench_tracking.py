@@ -0,0 +1,96 @@
+# ---------------- Đo lập lịch suy luận (MediaPipe + optical flow) ----------------
+# Chạy: python benchmarks/bench_tracking.py [--video clip.mp4 | --camera 0] [--frames 300] [--mode single]
+# Các frame được đọc vào bộ nhớ trước, mọi preset trong SCHEDULE_PRESETS chạy trên cùng dãy
+# frame (mỗi preset một HandDetector mới) và được so với "always" (suy luận mọi frame, như cũ):
+#   - ms/frame: thời gian trung bình một lần gọi detect (suy luận hoặc bám), p95
+#   - infer: tỉ lệ frame chạy MediaPipe; các lý do phải suy luận (no-hand, motion, pinch, lost, floor)
+#   - err: sai lệch trung bình của con trỏ so với "always" (px), agree: tỉ lệ trùng trạng thái véo
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.benchutil import percentile, read_frames, to_screen
+from handblast.control import ControlLayout
+from handblast.inference import HandDetector, INFERENCE_PRESETS
+from handblast.tracking import AdaptiveHandDetector, SCHEDULE_PRESETS
+
+
+def run_schedule(config, frames, args, layout):
+    detector = HandDetector(INFERENCE_PRESETS[args.mode])
+    for frame in frames[:args.warmup]:
+        detector(frame)
+    detector.reset()
+    adaptive = AdaptiveHandDetector(detector, layout, config)
+    latencies = []
+    results = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        results.append(adaptive(frame))
+        latencies.append(time.perf_counter() - t0)
+    detector.close()
+    return latencies, results, adaptive
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="file video thay cho camera")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--mode", choices=sorted(INFERENCE_PRESETS), default="single", help="INFERENCE_PRESETS dùng để suy luận")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--dist-threshold", type=float, default=40)
+    parser.add_argument("--hysteresis", type=float, default=1.25)
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.camera, args.frames)
+    if not frames:
+        sys.exit("Không đọc được frame nào từ camera/video")
+    print(f"{len(frames)} frame, {frames[0].shape[1]}x{frames[0].shape[0]}, suy luận \"{args.mode}\"")
+
+    # Chỉ width / height / ngưỡng véo có ý nghĩa với lập lịch, phần bố cục còn lại là hình thức
+    layout = ControlLayout(args.width, args.height, 0, 0, 1, 0, 0, 0, 0, 0,
+                           args.dist_threshold, args.dist_threshold * args.hysteresis)
+    runs = {name: run_schedule(config, frames, args, layout) for name, config in SCHEDULE_PRESETS.items()}
+    reference = [to_screen(p, args.width, args.height) for p in runs["always"][1]]
+
+    report = {}
+    print(f"{'schedule':<10}{'ms/frame':>9}{'p95':>7}{'infer':>7}{'err px':>8}{'agree':>7}  lý do suy luận")
+    for name, (latencies, results, adaptive) in runs.items():
+        errors = []
+        agree = 0
+        compared = 0
+        for p, r in zip(results, reference):
+            s = to_screen(p, args.width, args.height)
+            if r is None or s is None: continue
+            compared += 1
+            errors.append(math.dist(s[0], r[0]))
+            agree += (math.dist(*s) < args.dist_threshold) == (math.dist(*r) < args.dist_threshold)
+        r = report[name] = {
+            "latency_ms": sum(latencies) / len(latencies) * 1000,
+            "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+            "frames_inferred": adaptive.frames_inferred,
+            "frames_tracked": adaptive.frames_tracked,
+            "infer_rate": adaptive.frames_inferred / len(frames),
+            "reasons": dict(adaptive.reasons),
+            "cursor_err_px": sum(errors) / len(errors) if errors else 0.0,
+            "pinch_agree": agree / compared if compared else 0.0,
+        }
+        reasons = " ".join(f"{k}={v}" for k, v in sorted(r["reasons"].items()))
+        print(f"{name:<10}{r['latency_ms']:9.2f}{r['latency_p95_ms']:7.1f}{r['infer_rate']:7.2f}"
+              f"{r['cursor_err_px']:8.1f}{r['pinch_agree']:7.2f}  {reasons}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# ---------------- Benchmark: khay luôn đặt được (handblast.trays) ----------------
+# Chạy: python benchmarks/bench_trays.py [--boards 200] [--games 300] [--repeat 3] [--seed 5]
+# Lưới dày: lưới lúc khay vừa làm mới trong các ván chơi ngẫu nhiên, lấy --boards lưới nhiều ô
+# nhất, cộng thêm lưới ngẫu nhiên đầy 50-85% (không còn dòng đầy). Trên mỗi lưới đo:
+#   - kiểm tra: tray_solution() cho MỌI tổ hợp 3 khối (memo riêng mỗi tổ hợp) -> p50 / p99 / max,
+#     tổ hợp chậm nhất là chi phí xấu nhất của một lần kiểm tra
+#   - làm mới: playable_tray() như GameState(playable_tray=True) lúc khay mới (phải dưới 1 frame
+#     16 ms mới không giật), số khay phải rút, số lần phải duyệt tổ hợp / không thể bảo đảm
+# Hai bộ lưới trên hiếm khi rút hỏng đủ PLAYABLE_ATTEMPTS lần, nên thêm lưới đầy 60-90% (đục một
+# ô mỗi dòng đầy thay vì xoá dòng để giữ độ đầy) và ép nhánh duyệt tổ hợp: draw() luôn trả một
+# khay không đặt hết được trên lưới đó -> PLAYABLE_ATTEMPTS lần kiểm tra hỏng + duyệt tổ hợp,
+# đúng đường chậm nhất của một lần làm mới.
+# Rồi --games ván ngẫu nhiên mỗi chế độ: tỉ lệ lần làm mới mà khay không đặt hết được (thua ngay
+# khi lưới chật) và số nước TB mỗi ván, có / không bảo đảm.
+# Mỗi thời gian là min của --repeat lần đo (bỏ nhiễu GC / lập lịch của máy khỏi con số xấu nhất).
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.engine import BLOCK_SHAPES, Board, clear_full_lines
+from handblast.game import TRAY_SIZE, GameState
+from handblast.trays import PLAYABLE_ATTEMPTS, playable_tray, tray_solution
+
+
+def refill_boards(count, seed):
+    # Lưới lúc khay vừa làm mới (đủ 3 khối), giữ `count` lưới nhiều ô nhất
+    rng = random.Random(seed)
+    boards = {}
+    for _ in range(count * 4):
+        game = GameState(rng=rng)
+        while not game.is_game_over():
+            if all(b is not None for b in game.tray): boards[game.grid.occupied] = game.grid.copy()
+            game.place_block(*rng.choice(game.legal_moves()))
+    return sorted(boards.values(), key=lambda b: -bin(b.occupied).count("1"))[:count]
+
+
+def board_from_bits(occ):
+    # Ghi từng ô như Board.place để bộ đếm hàng / cột khớp bitboard
+    board = Board()
+    board.occupied = occ
+    for i in range(board.geo.cells):
+        if occ >> i & 1:
+            board.colors[i] = 1
+            board.row_counts[i // board.size] += 1
+            board.col_counts[i % board.size] += 1
+    return board
+
+
+def random_boards(count, seed):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        geo = Board().geo
+        fill = rng.uniform(0.5, 0.85)
+        boards.append(board_from_bits(clear_full_lines(sum(1 << i for i in range(geo.cells) if rng.random() < fill), geo)[0]))
+    return boards
+
+
+def dense_boards(count, seed):
+    # Lưới đầy 60-90%, mỗi dòng / cột đầy bị đục một ô ngẫu nhiên; kèm một tổ hợp không đặt hết được
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        geo = Board().geo
+        size = geo.size
+        fill = rng.uniform(0.6, 0.9)
+        occ = sum(1 << i for i in range(geo.cells) if rng.random() < fill)
+        for r in range(size):
+            row = sum(1 << (r * size + c) for c in range(size))
+            if occ & row == row: occ &= ~(1 << (r * size + rng.randrange(size)))
+        for c in range(size):
+            col = sum(1 << (r * size + c) for r in range(size))
+            if occ & col == col: occ &= ~(1 << (rng.randrange(size) * size + c))
+        bad = next((combo for combo in itertools.combinations_with_replacement(range(len(BLOCK_SHAPES)), TRAY_SIZE)
+                    if tray_solution(occ, combo, geo) is None), None)
+        if bad is not None: boards.append((board_from_bits(occ), bad))
+    return boards
+
+
+def quantiles(values):
+    values = sorted(values)
+    return values[len(values) // 2], values[min(len(values) - 1, int(0.99 * len(values)))], values[-1]
+
+
+def refill_rate(games, seed, playable):
+    # Số lần làm mới khay, số lần khay mới không đặt hết được, tổng số nước
+    refills = stuck = moves = 0
+    for i in range(games):
+        game = GameState(rng=random.Random(seed * 100003 + i), playable_tray=playable)
+        while not game.is_game_over():
+            if all(b is not None for b in game.tray):
+                refills += 1
+                if tray_solution(game.grid.occupied, [b["shape_id"] for b in game.tray], game.grid.geo) is None: stuck += 1
+            game.place_block(*game.rng.choice(game.legal_moves()))
+        moves += game.moves_made
+    return refills, stuck, moves
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boards", type=int, default=200)
+    parser.add_argument("--games", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    sets = [("lưới lúc làm mới", refill_boards(args.boards, args.seed)), ("lưới ngẫu nhiên", random_boards(args.boards, args.seed))]
+    combos = list(itertools.combinations_with_replacement(range(len(BLOCK_SHAPES)), TRAY_SIZE))
+    print(f"{len(combos)} tổ hợp 3 khối, tối đa {PLAYABLE_ATTEMPTS} lần rút trước khi duyệt tổ hợp")
+    for name, boards in sets:
+        filled = [bin(b.occupied).count("1") for b in boards]
+        checks, solvable, worst = [], 0, (0.0, None, None)
+        for board in boards:
+            for combo in combos:
+                dt = math.inf
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    ok = tray_solution(board.occupied, combo, board.geo) is not None
+                    dt = min(dt, time.perf_counter() - t0)
+                checks.append(dt)
+                solvable += ok
+                if dt > worst[0]: worst = (dt, board, combo)
+        refills, draws = [], Counter()
+        for i, board in enumerate(boards):
+            dt = math.inf
+            for _ in range(args.repeat):
+                game = GameState(rng=random.Random(args.seed * 7919 + i))
+                t0 = time.perf_counter()
+                _, n = playable_tray(board, game.new_block, game.rng, TRAY_SIZE, list(range(len(BLOCK_SHAPES))))
+                dt = min(dt, time.perf_counter() - t0)
+            refills.append(dt)
+            draws[n] += 1
+        p50, p99, top = quantiles(checks)
+        print(f"\n{name}: {len(boards)} lưới, {min(filled)}-{max(filled)} ô (TB {sum(filled) / len(filled):.1f}), "
+              f"{solvable / len(checks):.0%} tổ hợp đặt hết được")
+        print(f"  kiểm tra: p50 {p50 * 1e6:.0f}µs, p99 {p99 * 1e6:.0f}µs, max {top * 1e3:.2f}ms "
+              f"(lưới {bin(worst[1].occupied).count('1')} ô, khối {worst[2]})")
+        p50, p99, top = quantiles(refills)
+        fallback = sum(c for n, c in draws.items() if n > PLAYABLE_ATTEMPTS)
+        print(f"  làm mới:  p50 {p50 * 1e3:.2f}ms, p99 {p99 * 1e3:.2f}ms, max {top * 1e3:.2f}ms; "
+              f"rút {dict(sorted((n, c) for n, c in draws.items() if n <= PLAYABLE_ATTEMPTS))}, duyệt tổ hợp {fallback} lần")
+
+    # Ép nhánh duyệt tổ hợp: mọi khay rút đều là tổ hợp `bad` không đặt hết được
+    boards = dense_boards(args.boards, args.seed)
+    filled = [bin(b.occupied).count("1") for b, _ in boards]
+    scans, worst, failed = [], (0.0, None), 0
+    for i, (board, bad) in enumerate(boards):
+        dt = math.inf
+        for _ in range(args.repeat):
+            game = GameState(rng=random.Random(args.seed * 7919 + i))
+            shapes = itertools.cycle(bad)
+
+            def draw():
+                s = next(shapes)
+                return dict(game.new_block(), shape=BLOCK_SHAPES[s], shape_id=s)
+
+            t0 = time.perf_counter()
+            tray, n = playable_tray(board, draw, game.rng, TRAY_SIZE, list(range(len(BLOCK_SHAPES))))
+            dt = min(dt, time.perf_counter() - t0)
+        assert n == PLAYABLE_ATTEMPTS + 1
+        failed += tray_solution(board.occupied, [b["shape_id"] for b in tray], board.geo) is None
+        scans.append(dt)
+        if dt > worst[0]: worst = (dt, board)
+    p50, p99, top = quantiles(scans)
+    print(f"\nduyệt tổ hợp (ép): {len(boards)} lưới, {min(filled)}-{max(filled)} ô (TB {sum(filled) / len(filled):.1f})")
+    print(f"  làm mới:  p50 {p50 * 1e3:.2f}ms, p99 {p99 * 1e3:.2f}ms, max {top * 1e3:.2f}ms "
+          f"(lưới {bin(worst[1].occupied).count('1')} ô), không thể bảo đảm {failed} lần")
+
+    print(f"\n{args.games} ván ngẫu nhiên mỗi chế độ")
+    for playable in (False, True):
+        refills, stuck, moves = refill_rate(args.games, args.seed, playable)
+        print(f"  playable_tray={playable!s:5s}: {refills} lần làm mới, {stuck} khay không đặt hết được ({stuck / refills:.2%}), "
+              f"TB {moves / args.games:.1f} nước / ván")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Phần lõi dùng chung cho "Hand Block Blast.py" (v1) và "Hand Block Blast v2.py".
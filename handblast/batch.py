@@ -0,0 +1,188 @@
+# ---------------- Mô phỏng hàng loạt bằng NumPy ----------------
+# Giữ N lưới trong một mảng (N, GRID_SIZE, GRID_SIZE) và chơi song song:
+#   - nước đi hợp lệ của mọi lưới x mọi khối: trượt mask khối trên lưới (kiểu tích chập)
+#   - đặt khối, tìm hàng/cột đầy (full_rows/full_cols) và xoá dòng cho cả batch cùng lúc
+# Mỗi ván có random.Random(seed) riêng, dùng theo ĐÚNG thứ tự như GameState (khay đầu,
+# chọn nước, làm mới khay), nên cùng seed thì lưới/điểm giống hệt bản vô hướng.
+# Cần numpy (chỉ module này, phần còn lại của game không phụ thuộc numpy).
+import random
+
+import numpy as np
+
+from handblast.engine import GRID_SIZE, BLOCK_SHAPES, PLACEMENT_MASKS
+from handblast.game import NUM_COLORS, TRAY_SIZE, GameState
+
+N_SHAPES = len(BLOCK_SHAPES)
+N_ANCHORS = GRID_SIZE * GRID_SIZE
+SHAPE_CELLS = np.array([len(s) for s in BLOCK_SHAPES])
+# Khối lớn nhất chiếm bao nhiêu ô theo mỗi chiều -> độ rộng viền đệm
+PAD = max(max(max(dx, dy) for dx, dy in s) for s in BLOCK_SHAPES)
+
+
+def _anchor_masks():
+    # ANCHOR_MASKS[s, a] = mảng bool (GRID_SIZE, GRID_SIZE) các ô khối s chiếm khi neo ở a
+    masks = np.zeros((N_SHAPES, N_ANCHORS, GRID_SIZE, GRID_SIZE), dtype=bool)
+    for s, per_anchor in enumerate(PLACEMENT_MASKS):
+        for a, m in enumerate(per_anchor):
+            for i in range(N_ANCHORS):
+                if m >> i & 1: masks[s, a, i // GRID_SIZE, i % GRID_SIZE] = True
+    return masks
+
+
+ANCHOR_MASKS = _anchor_masks()
+# Số ô khối thêm vào mỗi hàng / mỗi cột: (N_SHAPES, N_ANCHORS, GRID_SIZE)
+ANCHOR_ROW_CELLS = ANCHOR_MASKS.sum(axis=3)
+ANCHOR_COL_CELLS = ANCHOR_MASKS.sum(axis=2)
+
+
+def legal_placements(occupied):
+    # occupied: (N, G, G) bool -> (N, N_SHAPES, G, G) bool, True nếu đặt được khối tại (gy, gx)
+    n = occupied.shape[0]
+    padded = np.ones((n, GRID_SIZE + PAD, GRID_SIZE + PAD), dtype=bool) # ngoài lưới = đã chiếm
+    padded[:, :GRID_SIZE, :GRID_SIZE] = occupied
+    legal = np.empty((n, N_SHAPES, GRID_SIZE, GRID_SIZE), dtype=bool)
+    for s, shape in enumerate(BLOCK_SHAPES):
+        ok = np.ones((n, GRID_SIZE, GRID_SIZE), dtype=bool)
+        for dx, dy in shape:
+            ok &= ~padded[:, dy:dy + GRID_SIZE, dx:dx + GRID_SIZE]
+        legal[:, s] = ok
+    return legal
+
+
+def apply_placements(occupied, colors, shape_ids, anchors, color_ids):
+    # Đặt khối + xoá hàng/cột đầy cho từng lưới (tại chỗ). Trả về (điểm cộng thêm, combo)
+    masks = ANCHOR_MASKS[shape_ids, anchors]
+    occupied |= masks
+    colors[masks] = np.broadcast_to(color_ids[:, None, None], masks.shape)[masks]
+
+    full_rows = occupied.all(axis=2)
+    full_cols = occupied.all(axis=1)
+    clear = full_rows[:, :, None] | full_cols[:, None, :]
+    occupied &= ~clear
+    colors[clear] = 0
+
+    combo = full_rows.sum(axis=1) + full_cols.sum(axis=1)
+    return SHAPE_CELLS[shape_ids] + combo * GRID_SIZE, combo
+
+
+class BatchSimulator:
+    def __init__(self, seeds, policy="random", num_colors=NUM_COLORS):
+        if policy not in ("random", "greedy"):
+            raise ValueError(f"policy không hợp lệ: {policy}")
+        self.policy = policy
+        self.num_colors = num_colors
+        self.rngs = [random.Random(seed) for seed in seeds]
+        n = len(self.rngs)
+        self.occupied = np.zeros((n, GRID_SIZE, GRID_SIZE), dtype=bool)
+        self.colors = np.zeros((n, GRID_SIZE, GRID_SIZE), dtype=np.uint8)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.moves_made = np.zeros(n, dtype=np.int64)
+        self.active = np.ones(n, dtype=bool)
+        # -1 = ô khay đã dùng
+        self.tray_shapes = np.full((n, TRAY_SIZE), -1, dtype=np.int64)
+        self.tray_colors = np.zeros((n, TRAY_SIZE), dtype=np.int64)
+        for i in range(n): self._refill(i)
+        self.traces = [[] for _ in range(n)]
+
+    def _refill(self, i):
+        # Giống GameState.new_tray(): mỗi khối lấy shape rồi màu
+        rng = self.rngs[i]
+        for slot in range(TRAY_SIZE):
+            self.tray_shapes[i, slot] = rng.randrange(N_SHAPES)
+            self.tray_colors[i, slot] = rng.randrange(self.num_colors)
+
+    def _candidates(self, idx):
+        # (len(idx), TRAY_SIZE * N_ANCHORS) bool theo đúng thứ tự GameState.legal_moves()
+        legal = legal_placements(self.occupied[idx]).reshape(len(idx), N_SHAPES, N_ANCHORS)
+        shapes = self.tray_shapes[idx]
+        cand = legal[np.arange(len(idx))[:, None], np.maximum(shapes, 0)]
+        cand &= (shapes >= 0)[:, :, None]
+        return cand.reshape(len(idx), TRAY_SIZE * N_ANCHORS)
+
+    def _greedy(self, idx, cand):
+        # Chọn nước có điểm cộng lớn nhất (hoà thì lấy nước đứng trước), không dùng rng.
+        # Hàng/cột đầy sau khi đặt = số ô đang có + số ô khối thêm vào == GRID_SIZE
+        slots = np.arange(TRAY_SIZE).repeat(N_ANCHORS)
+        anchors = np.tile(np.arange(N_ANCHORS), TRAY_SIZE)
+        shapes = np.maximum(self.tray_shapes[idx][:, slots], 0)   # (n, C)
+        occ = self.occupied[idx]
+        rows = occ.sum(axis=2)[:, None] + ANCHOR_ROW_CELLS[shapes, anchors]
+        cols = occ.sum(axis=1)[:, None] + ANCHOR_COL_CELLS[shapes, anchors]
+        lines = (rows == GRID_SIZE).sum(axis=2) + (cols == GRID_SIZE).sum(axis=2)
+        gain = np.where(cand, SHAPE_CELLS[shapes] + lines * GRID_SIZE, -1)
+        return gain.argmax(axis=1)
+
+    def step(self):
+        # Một nước đi cho mọi ván còn chơi; trả về số ván vừa đi
+        idx = np.flatnonzero(self.active)
+        if len(idx) == 0: return 0
+        cand = self._candidates(idx)
+        has_move = cand.any(axis=1)
+        self.active[idx[~has_move]] = False
+        idx, cand = idx[has_move], cand[has_move]
+        if len(idx) == 0: return 0
+
+        if self.policy == "random":
+            choice = np.empty(len(idx), dtype=np.int64)
+            for k, i in enumerate(idx):
+                # Cùng thứ tự + cùng độ dài với game.legal_moves() -> rng.choice chọn đúng nước đó
+                choice[k] = self.rngs[i].choice(np.flatnonzero(cand[k]))
+        else:
+            choice = self._greedy(idx, cand)
+
+        slots = choice // N_ANCHORS
+        anchors = choice % N_ANCHORS
+        shape_ids = self.tray_shapes[idx, slots]
+        color_ids = self.tray_colors[idx, slots] + 1
+
+        occ = self.occupied[idx]
+        colors = self.colors[idx]
+        gained, _ = apply_placements(occ, colors, shape_ids, anchors, color_ids)
+        self.occupied[idx] = occ
+        self.colors[idx] = colors
+        self.scores[idx] += gained
+        self.moves_made[idx] += 1
+        self.tray_shapes[idx, slots] = -1
+
+        for i, score in zip(idx, self.scores[idx]):
+            self.traces[i].append(int(score))
+            if (self.tray_shapes[i] < 0).all(): self._refill(i)
+        return len(idx)
+
+    def run(self, max_steps=None):
+        steps = 0
+        while self.step():
+            steps += 1
+            if max_steps is not None and steps >= max_steps: break
+        return self.traces
+
+
+def play_scalar(seed, policy="random", num_colors=NUM_COLORS):
+    # Bản tham chiếu dùng GameState: trả về (lưới dạng list-of-lists, điểm, vết điểm)
+    rng = random.Random(seed)
+    game = GameState(rng=rng, num_colors=num_colors)
+    trace = []
+    while not game.is_game_over():
+        moves = game.legal_moves()
+        if policy == "random":
+            move = rng.choice(moves)
+        else:
+            best = -1
+            for slot, gx, gy in moves:
+                trial = game.grid.copy()
+                placed, combo = trial.place(game.tray[slot]["shape_id"], 1, gx, gy)
+                gain = placed + combo * GRID_SIZE
+                if gain > best: best, move = gain, (slot, gx, gy)
+        game.place_block(*move)
+        trace.append(game.score)
+    return game.grid.to_rows(), game.score, trace
+
+
+def verify_against_scalar(seeds, policy="random"):
+    sim = BatchSimulator(seeds, policy=policy)
+    traces = sim.run()
+    for k, seed in enumerate(seeds):
+        rows, score, trace = play_scalar(seed, policy)
+        assert traces[k] == trace, f"seed {seed}: vết điểm khác bản vô hướng"
+        assert int(sim.scores[k]) == score
+        assert sim.colors[k].tolist() == rows, f"seed {seed}: lưới khác bản vô hướng"
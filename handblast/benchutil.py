@@ -0,0 +1,32 @@
+# ---------------- Hàm dùng chung của các benchmark camera / suy luận ----------------
+# benchmarks/bench_inference_modes.py, bench_tracking.py, bench_frame_path.py đều cần đọc sẵn
+# frame, lấy phân vị và đổi landmark ra toạ độ màn hình; để ở đây thay vì import chéo giữa các
+# file benchmark (chỉ chạy được khi đứng trong thư mục benchmarks/).
+# cv2 chỉ import khi đọc frame.
+from handblast.control import INDEX_TIP, THUMB_TIP
+
+
+def read_frames(video, camera, count):
+    # Đọc trước tối đa `count` frame từ file video (nếu có) hoặc camera
+    import cv2
+    cap = cv2.VideoCapture(video if video else camera)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret: break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def percentile(values, q):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def to_screen(points, width, height):
+    # (ngón trỏ, ngón cái) theo pixel màn hình, None khi không thấy tay
+    if points is None: return None
+    return ((points[INDEX_TIP][0] * width, points[INDEX_TIP][1] * height),
+            (points[THUMB_TIP][0] * width, points[THUMB_TIP][1] * height))
@@ -0,0 +1,151 @@
+# ---------------- Cấu hình camera: độ phân giải, FPS, MJPG / YUYV, độ sâu bộ đệm ----------------
+# cv2.VideoCapture(0) mặc định lấy độ phân giải / FPS / định dạng của driver, và nhiều camera
+# V4L2 giữ sẵn vài frame trong hàng đợi -> frame đọc được đã cũ, con trỏ trễ thấy rõ.
+#   - CaptureConfig: các giá trị muốn đặt (None = để driver tự chọn), open_capture() mở
+#     camera và đặt theo đúng thứ tự driver cần (FOURCC trước kích thước / FPS)
+#   - probe_capture(): mở thử một cấu hình, đọc vài frame, đo chu kỳ frame thật và số frame
+#     cũ trong hàng đợi (sau khi ngừng đọc một lúc, các lần read() trả về ngay là frame cũ)
+#     -> ước lượng độ trễ = frame cũ * chu kỳ + nửa chu kỳ chờ + thời gian read()
+#   - choose_capture(): probe mọi ứng viên, bỏ cấu hình không dùng được cho tracking (không
+#     mở được, FPS thật hoặc độ phân giải thật dưới ngưỡng), lấy cấu hình có ước lượng thấp nhất
+#   - open_auto(): probe mất vài giây (mỗi ứng viên mở lại camera) nên lựa chọn được lưu theo
+#     từng camera trong cache_path (JSON); lần sau mở thẳng, mở hỏng thì probe lại
+# Đây là ước lượng phía máy tính; độ trễ thật từ màn hình tới camera (gồm cả độ trễ của
+# cảm biến, USB, màn hình) đo bằng nháy màn hình: python tools/measure_latency.py
+import json
+import time
+from collections import namedtuple
+
+import cv2
+
+from handblast.storage import write_atomic
+
+CaptureConfig = namedtuple("CaptureConfig", "width height fps fourcc buffersize", defaults=(None, None, None, None, None))
+
+# "default" = như cũ (không đặt gì); "auto" (xem choose_capture) thử lần lượt CAPTURE_CANDIDATES
+CAPTURE_PRESETS = {
+    "default": CaptureConfig(),
+    "mjpg-480p": CaptureConfig(640, 480, 30, "MJPG", 1),
+    "mjpg-480p-60": CaptureConfig(640, 480, 60, "MJPG", 1),
+    "yuyv-480p": CaptureConfig(640, 480, 30, "YUYV", 1),
+    "mjpg-720p": CaptureConfig(1280, 720, 30, "MJPG", 1),
+    "yuyv-360p": CaptureConfig(640, 360, 30, "YUYV", 1),
+}
+CAPTURE_CANDIDATES = ("mjpg-480p-60", "mjpg-480p", "yuyv-480p", "yuyv-360p", "mjpg-720p", "default")
+
+# Ngưỡng "tracking còn dùng được" khi chọn tự động
+MIN_FPS = 20
+MIN_HEIGHT = 360
+
+# actual: CaptureConfig driver thật sự dùng; period: chu kỳ frame đo được (giây);
+# read_time: thời gian read() khi frame đã sẵn (giải nén, chép); queued: số frame cũ trong
+# hàng đợi; latency: ước lượng (giây); None ở các trường khi không mở / không đọc được
+ProbeResult = namedtuple("ProbeResult", "name config actual period read_time queued latency")
+
+
+def fourcc_name(value):
+    value = int(value)
+    if value <= 0: return None
+    return "".join(chr((value >> 8 * i) & 0xFF) for i in range(4)).strip("\0") or None
+
+
+def open_capture(source, config=CaptureConfig()):
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened() or isinstance(source, str): return cap # file video: giữ nguyên
+    if config.fourcc: cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+    if config.width: cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+    if config.height: cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+    if config.fps: cap.set(cv2.CAP_PROP_FPS, config.fps)
+    if config.buffersize: cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffersize)
+    return cap
+
+
+def negotiated(cap):
+    # Driver có thể làm tròn / bỏ qua giá trị đã đặt: đọc lại các giá trị thật
+    def prop(p):
+        value = cap.get(p)
+        return int(round(value)) if value > 0 else None
+    return CaptureConfig(prop(cv2.CAP_PROP_FRAME_WIDTH), prop(cv2.CAP_PROP_FRAME_HEIGHT), prop(cv2.CAP_PROP_FPS),
+                         fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)), prop(cv2.CAP_PROP_BUFFERSIZE))
+
+
+def describe(config):
+    size = f"{config.width}x{config.height}" if config.width and config.height else "?x?"
+    return f"{config.fourcc or '?'} {size}@{config.fps or '?'} buffer {config.buffersize or '?'}"
+
+
+def probe_capture(source, name, config, frames=20, warmup=5):
+    cap = open_capture(source, config)
+    try:
+        if not cap.isOpened(): return ProbeResult(name, config, None, None, None, None, None)
+        frame = None
+        for _ in range(warmup):
+            ret, frame = cap.read(image=frame)
+            if not ret: return ProbeResult(name, config, negotiated(cap), None, None, None, None)
+        # Đọc liên tục: mỗi read() chờ frame kế tiếp -> khoảng cách giữa hai lần trả về = chu kỳ
+        stamps = []
+        for _ in range(frames):
+            ret, frame = cap.read(image=frame)
+            if not ret: return ProbeResult(name, config, negotiated(cap), None, None, None, None)
+            stamps.append(time.perf_counter())
+        intervals = sorted(b - a for a, b in zip(stamps, stamps[1:]))
+        period = intervals[len(intervals) // 2]
+
+        # Ngừng đọc vài chu kỳ cho driver xếp frame, rồi đếm số read() trả về ngay (frame cũ)
+        time.sleep(6 * period)
+        queued = 0
+        read_times = []
+        for _ in range(8):
+            t0 = time.perf_counter()
+            ret, frame = cap.read(image=frame)
+            dt = time.perf_counter() - t0
+            if not ret or dt > period / 4: break
+            queued += 1
+            read_times.append(dt)
+        read_time = min(read_times) if read_times else 0.0
+        # Frame mới nhất đọc được cũ hơn lúc chụp ít nhất `queued` chu kỳ
+        latency = queued * period + period / 2 + read_time
+        return ProbeResult(name, config, negotiated(cap), period, read_time, queued, latency)
+    finally:
+        cap.release()
+
+
+def usable(result, min_fps=MIN_FPS, min_height=MIN_HEIGHT):
+    if result.latency is None: return False
+    if result.period * min_fps > 1: return False
+    height = result.actual.height
+    return height is None or height >= min_height
+
+
+def choose_capture(source, candidates=CAPTURE_CANDIDATES, min_fps=MIN_FPS, min_height=MIN_HEIGHT):
+    # Trả về (tên cấu hình chọn, danh sách ProbeResult theo thứ tự đã thử);
+    # không ứng viên nào dùng được thì "default" như cũ
+    results = [probe_capture(source, name, CAPTURE_PRESETS[name]) for name in candidates]
+    good = [r for r in results if usable(r, min_fps, min_height)]
+    if not good: return "default", results
+    # Chênh dưới 1 ms coi như bằng nhau: giữ thứ tự ưu tiên của candidates
+    return min(good, key=lambda r: round(r.latency, 3)).name, results
+
+
+def _load_choices(cache_path):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def open_auto(source, cache_path=None):
+    # Trả về (cap, tên cấu hình, ProbeResult của lần probe này hoặc [] nếu lấy từ cache)
+    if isinstance(source, str): return open_capture(source), "default", []
+    choices = _load_choices(cache_path) if cache_path else {}
+    name = choices.get(str(source))
+    if name in CAPTURE_PRESETS:
+        cap = open_capture(source, CAPTURE_PRESETS[name])
+        if cap.isOpened(): return cap, name, []
+        cap.release()
+    name, results = choose_capture(source)
+    if cache_path and any(r.latency is not None for r in results):
+        choices[str(source)] = name
+        write_atomic(cache_path, json.dumps(choices, indent=1))
+    return open_capture(source, CAPTURE_PRESETS[name]), name, results
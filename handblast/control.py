@@ -0,0 +1,82 @@
+# ---------------- Điều khiển bằng tay, không phụ thuộc giao diện ----------------
+# Logic "véo để nhặt khối ở khay, kéo, mở tay để thả xuống lưới" tách ra từ
+# update_hand_control() của v1 / v2. Chỉ làm việc với HandSample (toạ độ chuẩn hoá)
+# và GameState, nên chạy được với camera thật, với bản ghi (handblast.replay) hoặc
+# hoàn toàn headless. Khác biệt bố cục giữa v1 và v2 nằm trong ControlLayout.
+import math
+from collections import namedtuple
+
+INDEX_TIP = 8
+THUMB_TIP = 4
+
+# width/height: kích thước cửa sổ (px); grid_x/grid_y: góc trên-trái lưới; cell: cạnh ô
+# tray_x0..tray_x1: khoảng x nhận khay; ô khay i: y từ tray_y + i*tray_spacing, cao tray_slot_height
+# dist_threshold: ngón trỏ - ngón cái gần hơn ngưỡng này (px) = bắt đầu véo (nhặt khối)
+# release_threshold: đang giữ khối thì phải xa hơn ngưỡng này mới thả (hysteresis, chống
+# nhặt / thả liên tục khi khoảng cách dao động quanh ngưỡng); None = bằng dist_threshold
+ControlLayout = namedtuple("ControlLayout", "width height grid_x grid_y cell tray_x0 tray_x1 tray_y tray_spacing tray_slot_height dist_threshold release_threshold",
+                           defaults=(None,))
+
+
+class HandController:
+    def __init__(self, game, layout, place=None):
+        # place(slot, gx, gy): hàm đặt khối (mặc định game.place_block); file game truyền
+        # hàm bọc thêm việc lưu kỷ lục
+        self.game = game
+        self.layout = layout
+        self.place = place
+        self.cursor_x, self.cursor_y = layout.width // 2, layout.height // 2
+        self.thumb_x, self.thumb_y = self.cursor_x, self.cursor_y
+        self.hand_detected = False
+        self.release()
+
+    def release(self):
+        # Bỏ khối đang giữ (không đặt)
+        self.holding = False
+        self.held_block_index = None
+        self.held_block = None
+
+    def hovered_tray_index(self, x, y):
+        layout = self.layout
+        if x < layout.tray_x0 or x > layout.tray_x1: return None
+        for i in range(len(self.game.tray)):
+            ty0 = layout.tray_y + i*layout.tray_spacing
+            if ty0 <= y <= ty0 + layout.tray_slot_height: return i
+        return None
+
+    def grid_cell(self, x, y):
+        # Ô lưới (gx, gy) dưới điểm (x, y); có thể nằm ngoài lưới
+        return (x - self.layout.grid_x) // self.layout.cell, (y - self.layout.grid_y) // self.layout.cell
+
+    def update(self, sample):
+        layout = self.layout
+        if sample.points is None:
+            self.hand_detected = False
+            # Tay mất dấu khi đang giữ khối: khối tự động bị huỷ
+            if self.holding: self.release()
+            return
+
+        self.hand_detected = True
+        index, thumb = sample.points[INDEX_TIP], sample.points[THUMB_TIP]
+        self.cursor_x, self.cursor_y = int(index[0] * layout.width), int(index[1] * layout.height)
+        self.thumb_x, self.thumb_y = int(thumb[0] * layout.width), int(thumb[1] * layout.height)
+        dist = math.hypot(self.cursor_x - self.thumb_x, self.cursor_y - self.thumb_y)
+
+        game = self.game
+        threshold = layout.dist_threshold
+        if self.holding and layout.release_threshold is not None: threshold = layout.release_threshold
+        if dist < threshold:
+            if not self.holding:
+                idx = self.hovered_tray_index(self.cursor_x, self.cursor_y)
+                if idx is not None and game.tray[idx] is not None:
+                    self.holding = True
+                    self.held_block_index = idx
+                    self.held_block = game.tray[idx]
+        elif self.holding:
+            # Thả khối vào lưới
+            gx, gy = self.grid_cell(self.cursor_x, self.cursor_y)
+            size = game.grid.size
+            if self.held_block is not None and 0 <= gx < size and 0 <= gy < size:
+                if game.can_place(self.held_block_index, gx, gy):
+                    (self.place or game.place_block)(self.held_block_index, gx, gy)
+            self.release()
@@ -0,0 +1,241 @@
+# ---------------- Engine bitboard ----------------
+# Lưới size x size được lưu thành MỘT số nguyên: bit (y*size + x) = 1 nghĩa là ô (x, y)
+# đã có khối. Màu từng ô nằm riêng trong một bytearray
+# (0: trống, 1..n: index màu trong BLOCK_COLORS + 1) — giống quy ước của `grid` cũ.
+# Nhờ vậy kiểm tra đặt khối chỉ còn vài phép AND/OR.
+# Kích thước lưới chọn lúc chạy (Board(size)); các bảng tính sẵn theo kích thước nằm trong
+# Geometry (geometry(size) dùng chung, chỉ tính một lần mỗi kích thước). Board giữ thêm số ô
+# đã có của từng hàng / cột, cập nhật khi đặt / xoá, nên tìm dòng đầy sau khi đặt chỉ xét các
+# hàng + cột khối chạm tới: chi phí không tăng theo kích thước lưới.
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+GRID_SIZE = 8 # Kích thước mặc định (luật gốc)
+MAX_GRID_SIZE = 255 # Bộ đếm hàng / cột là bytearray
+
+BLOCK_SHAPES = [
+    [(0,0)], [(0,0),(1,0)], [(0,0),(1,0),(2,0)], [(0,0),(1,0),(2,0),(3,0)],
+    [(0,0),(1,0),(0,1),(1,1)], [(0,0),(0,1),(1,1)], [(0,0),(0,1),(0,2),(1,2)],
+    [(0,0),(1,0),(2,0),(1,1)], [(0,0),(1,0),(1,1),(2,1)], [(1,0),(2,0),(0,1),(1,1)],
+]
+# Danh mục khối tính một lần lúc import: SHAPE_CATALOG[k] cho khối BLOCK_SHAPES[k]
+#   cells: các ô (dx, dy) đã chuẩn hoá (ô trên cùng / trái cùng ở 0), width / height: hộp bao
+#   (số ô), count: số ô, rows / cols: các hàng / cột khối chiếm so với điểm neo kèm số ô trên
+#   hàng / cột đó ((dy, số ô), ...) / ((dx, số ô), ...)
+# Mask đặt khối phụ thuộc kích thước lưới nên nằm trong Geometry (placement_masks, valid_placements).
+ShapeInfo = namedtuple("ShapeInfo", "shape_id cells width height count rows cols")
+
+
+def _shape_info(shape_id, shape):
+    x0 = min(dx for dx, _ in shape)
+    y0 = min(dy for _, dy in shape)
+    cells = tuple((dx - x0, dy - y0) for dx, dy in shape)
+    return ShapeInfo(shape_id, cells, max(dx for dx, _ in cells) + 1, max(dy for _, dy in cells) + 1, len(cells),
+                     tuple(sorted(Counter(dy for _, dy in cells).items())), tuple(sorted(Counter(dx for dx, _ in cells).items())))
+
+
+SHAPE_CATALOG = tuple(_shape_info(k, s) for k, s in enumerate(BLOCK_SHAPES))
+# Lưới nhỏ hơn khối lớn nhất thì có khối không bao giờ đặt được
+MIN_GRID_SIZE = max(max(info.width, info.height) for info in SHAPE_CATALOG)
+SHAPE_ROWS = [info.rows for info in SHAPE_CATALOG]
+SHAPE_COLS = [info.cols for info in SHAPE_CATALOG]
+
+
+class Geometry:
+    # Mọi bảng tính sẵn phụ thuộc kích thước lưới
+    def __init__(self, size):
+        if not MIN_GRID_SIZE <= size <= MAX_GRID_SIZE:
+            raise ValueError(f"Kích thước lưới phải trong [{MIN_GRID_SIZE}, {MAX_GRID_SIZE}], nhận {size}")
+        self.size = size
+        self.cells = size * size
+        self.full_mask = (1 << self.cells) - 1
+        # Mask của từng hàng / từng cột đầy
+        self.row_masks = [((1 << size) - 1) << (r * size) for r in range(size)]
+        col0 = sum(1 << (r * size) for r in range(size))
+        self.col_masks = [col0 << c for c in range(size)]
+        self.line_masks = self.row_masks + self.col_masks
+        # Tính sẵn một lần cho mọi khối trong SHAPE_CATALOG
+        self.placement_masks = [self._placement_masks(info.cells) for info in SHAPE_CATALOG]
+        # Độ lệch index ô so với điểm neo (dùng để ghi màu, mask đã đảm bảo không tràn)
+        self.shape_offsets = [tuple(dy * size + dx for dx, dy in info.cells) for info in SHAPE_CATALOG]
+        # Chỉ các điểm neo không tràn lưới: (bit của điểm neo, mask, các hàng/cột mask chạm tới).
+        # Lưới không bao giờ còn sẵn dòng đầy, nên sau khi đặt chỉ những dòng khối chạm tới mới có thể đầy.
+        self.valid_placements = [
+            [(1 << a, m, tuple([self.row_masks[a // size + dy] for dy, _ in SHAPE_ROWS[k]] +
+                               [self.col_masks[a % size + dx] for dx, _ in SHAPE_COLS[k]]))
+             for a, m in enumerate(masks) if m]
+            for k, masks in enumerate(self.placement_masks)
+        ]
+
+    def _placement_masks(self, shape):
+        # masks[gy*size + gx] = mask các ô khối chiếm khi neo tại (gx, gy),
+        # 0 nếu khối tràn ra ngoài lưới (khối nào cũng có ít nhất 1 ô nên mask hợp lệ luôn != 0)
+        size = self.size
+        masks = [0] * self.cells
+        for gy in range(size):
+            for gx in range(size):
+                m = 0
+                for dx, dy in shape:
+                    x, y = gx + dx, gy + dy
+                    if x >= size or y >= size:
+                        m = 0
+                        break
+                    m |= 1 << (y * size + x)
+                masks[gy * size + gx] = m
+        return masks
+
+
+@lru_cache(maxsize=None)
+def geometry(size=GRID_SIZE):
+    return Geometry(size)
+
+
+# Bảng của lưới mặc định, giữ tên cũ cho code chỉ chạy 8x8 (batch, benchmark)
+_DEFAULT = geometry(GRID_SIZE)
+CELLS = _DEFAULT.cells
+FULL_MASK = _DEFAULT.full_mask
+ROW_MASKS = _DEFAULT.row_masks
+COL_MASKS = _DEFAULT.col_masks
+PLACEMENT_MASKS = _DEFAULT.placement_masks
+SHAPE_OFFSETS = _DEFAULT.shape_offsets
+VALID_PLACEMENTS = _DEFAULT.valid_placements
+
+
+def clear_full_lines(occ, geo=_DEFAULT):
+    # Tìm hàng/cột đầy trên bitboard: trả về (bitboard sau khi xoá, mask các ô bị xoá, combo)
+    cleared = 0
+    combo = 0
+    for m in geo.row_masks:
+        if occ & m == m:
+            cleared |= m
+            combo += 1
+    for m in geo.col_masks:
+        if occ & m == m:
+            cleared |= m
+            combo += 1
+    return occ & ~cleared, cleared, combo
+
+
+def clear_touched_lines(occ, lines):
+    # Như clear_full_lines nhưng chỉ xét các dòng trong `lines` (xem Geometry.valid_placements)
+    cleared = 0
+    combo = 0
+    for m in lines:
+        if occ & m == m:
+            cleared |= m
+            combo += 1
+    return occ & ~cleared, cleared, combo
+
+
+def placement_score(placed_cells, combo, size=GRID_SIZE, line_bonus=None):
+    # Luật tính điểm giữ nguyên: số ô đặt + combo * độ dài một dòng;
+    # line_bonus: điểm mỗi dòng xoá thay cho độ dài dòng (thử luật khác, xem handblast.selfplay)
+    return placed_cells + combo * (size if line_bonus is None else line_bonus)
+
+
+class Board:
+    __slots__ = ("size", "geo", "occupied", "colors", "row_counts", "col_counts")
+
+    def __init__(self, size=GRID_SIZE):
+        self.size = size
+        self.geo = geometry(size)
+        self.occupied = 0
+        self.colors = bytearray(self.geo.cells)
+        # Số ô đã có khối của từng hàng / cột
+        self.row_counts = bytearray(size)
+        self.col_counts = bytearray(size)
+
+    def cell(self, r, c):
+        return self.colors[r * self.size + c]
+
+    def copy(self):
+        b = Board.__new__(Board)
+        b.size = self.size
+        b.geo = self.geo
+        b.occupied = self.occupied
+        b.colors = bytearray(self.colors)
+        b.row_counts = bytearray(self.row_counts)
+        b.col_counts = bytearray(self.col_counts)
+        return b
+
+    def can_place(self, shape_id, gx, gy):
+        size = self.size
+        if gx < 0 or gy < 0 or gx >= size or gy >= size: return False
+        m = self.geo.placement_masks[shape_id][gy * size + gx]
+        return m != 0 and not (self.occupied & m)
+
+    def has_move(self, shape_id):
+        occ = self.occupied
+        for _, m, _ in self.geo.valid_placements[shape_id]:
+            if not occ & m: return True
+        return False
+
+    def legal_anchors(self, shape_id):
+        # Bitmask các điểm neo đặt được: bit (gy*size + gx)
+        occ = self.occupied
+        bits = 0
+        for a, m, _ in self.geo.valid_placements[shape_id]:
+            if not occ & m: bits |= a
+        return bits
+
+    def place(self, shape_id, color_id, gx, gy):
+        # Gọi sau khi can_place() == True. Trả về (số ô đã đặt, combo)
+        size = self.size
+        geo = self.geo
+        anchor = gy * size + gx
+        occ = self.occupied | geo.placement_masks[shape_id][anchor]
+        colors = self.colors
+        offsets = geo.shape_offsets[shape_id]
+        for off in offsets:
+            colors[anchor + off] = color_id
+
+        # Cập nhật bộ đếm; chỉ hàng / cột khối chạm tới mới có thể vừa đầy
+        row_counts, col_counts = self.row_counts, self.col_counts
+        full_rows = []
+        for dy, k in SHAPE_ROWS[shape_id]:
+            r = gy + dy
+            n = row_counts[r] + k
+            row_counts[r] = n
+            if n == size: full_rows.append(r)
+        full_cols = []
+        for dx, k in SHAPE_COLS[shape_id]:
+            c = gx + dx
+            n = col_counts[c] + k
+            col_counts[c] = n
+            if n == size: full_cols.append(c)
+        if full_rows or full_cols:
+            empty = bytes(size)
+            for r in full_rows:
+                occ &= ~geo.row_masks[r]
+                colors[r * size:(r + 1) * size] = empty
+                row_counts[r] = 0
+            for c in full_cols:
+                occ &= ~geo.col_masks[c]
+                colors[c::size] = empty
+                col_counts[c] = 0
+            # Ô bị xoá của hàng đầy nằm ở mọi cột (trừ cột cũng đầy, đã về 0) và ngược lại
+            for c in range(size):
+                if col_counts[c]: col_counts[c] -= len(full_rows)
+            for r in range(size):
+                if row_counts[r]: row_counts[r] -= len(full_cols)
+        self.occupied = occ
+        return len(offsets), len(full_rows) + len(full_cols)
+
+    def to_rows(self):
+        # Chuyển về dạng list-of-lists cũ (grid[y][x])
+        size = self.size
+        return [list(self.colors[r * size:(r + 1) * size]) for r in range(size)]
+
+    @classmethod
+    def from_rows(cls, rows):
+        b = cls(len(rows))
+        size = b.size
+        for r in range(size):
+            for c in range(size):
+                v = rows[r][c]
+                if v:
+                    b.colors[r * size + c] = v
+                    b.occupied |= 1 << (r * size + c)
+                    b.row_counts[r] += 1
+                    b.col_counts[c] += 1
+        return b
@@ -0,0 +1,105 @@
+# ---------------- Lọc + dự đoán vị trí con trỏ ----------------
+# Nằm giữa landmark của HandSample và HandController (cursor / thumb):
+#   - OneEuroFilter: low-pass thích nghi (One-Euro, Casiez 2012). Tay đứng yên thì cắt mạnh
+#     (hết rung), tay di chuyển nhanh thì tần số cắt tăng theo tốc độ (ít trễ)
+#   - VelocityPredictor: ước lượng vận tốc (đã làm mượt) và ngoại suy vị trí tới thời điểm
+#     frame được hiển thị, bù phần trễ camera + suy luận đo được (target_t - captured_at)
+# Mỗi tầng nhận (x, y, t, target_t) -> (x, y); CursorFilter áp dụng chuỗi tầng cho ngón trỏ
+# và ngón cái, trả về HandSample mới nên phần sau (controller, recorder) không cần biết có lọc.
+import math
+
+from handblast.control import INDEX_TIP, THUMB_TIP
+
+FILTERED_POINTS = (INDEX_TIP, THUMB_TIP)
+
+
+def _alpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    # Toạ độ chuẩn hoá 0..1: min_cutoff (Hz) quyết định độ mượt khi đứng yên,
+    # beta: tần số cắt tăng thêm bao nhiêu theo tốc độ (toạ độ chuẩn hoá / giây)
+    def __init__(self, min_cutoff=1.0, beta=20.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._t = None
+
+    def __call__(self, x, y, t, target_t):
+        if self._t is None or t <= self._t:
+            self._t, self._x, self._y, self._dx, self._dy = t, x, y, 0.0, 0.0
+            return x, y
+        dt = t - self._t
+        a_d = _alpha(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        self._dy += a_d * ((y - self._y) / dt - self._dy)
+        a = _alpha(self.min_cutoff + self.beta * math.hypot(self._dx, self._dy), dt)
+        self._x += a * (x - self._x)
+        self._y += a * (y - self._y)
+        self._t = t
+        return self._x, self._y
+
+
+class VelocityPredictor:
+    # Vận tốc = sai phân hai mẫu liên tiếp, làm mượt mũ với hệ số `smoothing`;
+    # ngoại suy tối đa max_lead giây để một lần trễ bất thường không ném con trỏ đi xa
+    def __init__(self, smoothing=0.7, max_lead=0.15):
+        self.smoothing = smoothing
+        self.max_lead = max_lead
+        self.reset()
+
+    def reset(self):
+        self._t = None
+
+    def __call__(self, x, y, t, target_t):
+        if self._t is None or t <= self._t:
+            self._t, self._x, self._y, self._vx, self._vy = t, x, y, 0.0, 0.0
+            return x, y
+        dt = t - self._t
+        k = self.smoothing
+        self._vx = k * self._vx + (1 - k) * (x - self._x) / dt
+        self._vy = k * self._vy + (1 - k) * (y - self._y) / dt
+        self._t, self._x, self._y = t, x, y
+        lead = min(max(target_t - t, 0.0), self.max_lead)
+        return x + self._vx * lead, y + self._vy * lead
+
+
+# Tên -> danh sách (lớp, tham số) của các tầng; "raw" = không lọc (như trước)
+CURSOR_FILTERS = {
+    "raw": (),
+    "one-euro": ((OneEuroFilter, {}),),
+    "predict": ((VelocityPredictor, {}),),
+    "one-euro+predict": ((OneEuroFilter, {}), (VelocityPredictor, {})),
+}
+
+
+class CursorFilter:
+    def __init__(self, name="one-euro+predict"):
+        self.name = name
+        stages = CURSOR_FILTERS[name]
+        # Mỗi điểm được lọc có chuỗi tầng riêng (state riêng)
+        self._chains = {i: [cls(**kwargs) for cls, kwargs in stages] for i in FILTERED_POINTS}
+
+    def reset(self):
+        for chain in self._chains.values():
+            for stage in chain: stage.reset()
+
+    def apply(self, sample, target_t):
+        # target_t: thời điểm (perf_counter) dự kiến kết quả lên màn hình
+        if sample.points is None:
+            self.reset() # mất tay: lần thấy lại bắt đầu từ vị trí mới, không nội suy từ chỗ cũ
+            return sample
+        if not self._chains[INDEX_TIP]: return sample # "raw"
+        points = list(sample.points)
+        t = sample.captured_at
+        for i, chain in self._chains.items():
+            x, y = points[i]
+            for stage in chain:
+                x, y = stage(x, y, t, target_t)
+            points[i] = (x, y)
+        return sample._replace(points=tuple(points))
@@ -0,0 +1,93 @@
+# ---------------- State game không phụ thuộc giao diện ----------------
+# Gồm lưới, khay, điểm, tạo khối / khay mới, kiểm tra + đặt khối và phát hiện Game Over.
+# Không import pygame / cv2, không đọc ghi file: dùng được cho cả v1, v2 lẫn mô phỏng
+# hàng loạt. Nguồn ngẫu nhiên được truyền vào (random.Random(seed)) để chạy lại y hệt.
+import itertools
+import random
+
+from handblast.engine import GRID_SIZE, BLOCK_SHAPES, Board, placement_score
+from handblast.moves import MoveIndex
+from handblast.trays import playable_tray
+
+NUM_COLORS = 5 # = len(BLOCK_COLORS) của giao diện
+TRAY_SIZE = 3
+
+
+class GameState:
+    def __init__(self, rng=None, high_score=0, num_colors=NUM_COLORS, size=GRID_SIZE, shape_weights=None, line_bonus=None,
+                 playable_tray=False):
+        # size: cạnh lưới (engine.GRID_SIZE = 8 như bản gốc)
+        # shape_weights: trọng số chọn từng khối trong BLOCK_SHAPES (None = đều nhau như bản gốc,
+        # 0 = không bao giờ ra); line_bonus: điểm mỗi dòng xoá (None = size). Dùng để thử luật
+        # bằng self-play (handblast.selfplay), file game để mặc định.
+        # playable_tray: khay mới luôn có ít nhất một thứ tự đặt hết cả 3 khối trên lưới hiện tại
+        # (handblast.trays); False = rút độc lập như bản gốc, cùng seed cho cùng khay như trước
+        self.rng = rng if rng is not None else random.Random()
+        self.num_colors = num_colors
+        self.size = size
+        self.high_score = high_score
+        self.line_bonus = line_bonus
+        self.playable_tray = playable_tray
+        self._cum_weights = None
+        if shape_weights is not None:
+            if len(shape_weights) != len(BLOCK_SHAPES) or min(shape_weights) < 0 or not sum(shape_weights) > 0:
+                raise ValueError(f"shape_weights cần {len(BLOCK_SHAPES)} trọng số >= 0, tổng > 0")
+            self._cum_weights = list(itertools.accumulate(shape_weights))
+        self._shape_pool = [k for k in range(len(BLOCK_SHAPES)) if shape_weights is None or shape_weights[k] > 0]
+        self.reset()
+
+    def reset(self):
+        self.grid = Board(self.size)
+        self.score = 0
+        self.moves_made = 0
+        self.tray = self.new_tray()
+        self.moves = MoveIndex(self.grid, self.tray)
+
+    def new_block(self):
+        if self._cum_weights is None:
+            shape_id = self.rng.randrange(len(BLOCK_SHAPES))
+        else:
+            shape_id = self.rng.choices(range(len(BLOCK_SHAPES)), cum_weights=self._cum_weights)[0]
+        color_index = self.rng.randrange(self.num_colors)
+        return {"shape": BLOCK_SHAPES[shape_id], "shape_id": shape_id, "color_index": color_index}
+
+    def new_tray(self):
+        if self.playable_tray:
+            return playable_tray(self.grid, self.new_block, self.rng, TRAY_SIZE, self._shape_pool)[0]
+        return [self.new_block() for _ in range(TRAY_SIZE)]
+
+    def can_place(self, slot, gx, gy):
+        return self.moves.is_legal(slot, gx, gy)
+
+    def place_block(self, slot, gx, gy):
+        # Đặt khối ở ô khay `slot` tại điểm neo (gx, gy); trả về combo (số hàng + cột bị xoá)
+        if not self.moves.is_legal(slot, gx, gy):
+            raise ValueError(f"Không đặt được khối {slot} tại ({gx}, {gy})")
+        block = self.tray[slot]
+        placed_cells, combo = self.grid.place(block["shape_id"], block["color_index"] + 1, gx, gy)
+        self.score += placement_score(placed_cells, combo, self.size, self.line_bonus)
+        if self.score > self.high_score:
+            self.high_score = self.score
+        self.moves_made += 1
+
+        self.tray[slot] = None
+        if all(b is None for b in self.tray):
+            self.tray[:] = self.new_tray()
+            self.moves.rebuild(self.grid, self.tray)
+        else:
+            self.moves.on_place(self.grid, self.tray, slot, combo)
+        return combo
+
+    def is_game_over(self):
+        return not self.moves.has_moves()
+
+    def legal_moves(self):
+        # Danh sách (slot, gx, gy) theo thứ tự cố định: slot, rồi gy, rồi gx
+        result = []
+        for slot, bits in enumerate(self.moves.anchors):
+            while bits:
+                low = bits & -bits
+                a = low.bit_length() - 1
+                result.append((slot, a % self.size, a // self.size))
+                bits ^= low
+        return result
@@ -0,0 +1,125 @@
+# ---------------- Suy luận MediaPipe Hands có cấu hình ----------------
+# Thay cho lời gọi hands.process(rgb) trên nguyên frame camera. Các tuỳ chọn:
+#   - max_num_hands: game chỉ dùng multi_hand_landmarks[0] nên 1 tay là đủ
+#   - model_complexity: 0 = model lite (nhanh hơn), 1 = model đầy đủ (mặc định của MediaPipe)
+#   - scale: thu nhỏ ảnh đầu vào (0.5 = một nửa mỗi chiều) trước khi suy luận
+#   - roi: chỉ gửi vùng quanh bàn tay của frame trước (nới thêm roi_padding),
+#     mất dấu thì quay lại tìm trên toàn frame
+# Toạ độ trả về luôn được quy về toàn frame (đã lật gương), chuẩn hoá 0..1.
+# [BUFFER] Không lật ảnh bằng cv2.flip nữa: suy luận trên ảnh gốc rồi lật toạ độ x -> 1 - x
+# (toạ độ chuẩn hoá tính theo mép ảnh, nên ảnh lật và ảnh gốc khớp đúng phép này). Ảnh thu
+# nhỏ / ảnh RGB ghi vào bộ đệm giữ lại giữa các frame (tham số dst của OpenCV), chỉ cấp phát
+# lại khi kích thước đổi (ROI đổi cỡ, camera đổi độ phân giải).
+from collections import namedtuple
+
+import cv2
+
+InferenceConfig = namedtuple(
+    "InferenceConfig",
+    "max_num_hands model_complexity scale roi roi_padding min_detection_confidence min_tracking_confidence",
+    defaults=(2, 1, 1.0, False, 0.5, 0.7, 0.7),
+)
+
+# "default" = đúng cấu hình cũ của game, các preset sau nhẹ dần
+INFERENCE_PRESETS = {
+    "default": InferenceConfig(),
+    "single": InferenceConfig(max_num_hands=1),
+    "lite": InferenceConfig(max_num_hands=1, model_complexity=0),
+    "lite-half": InferenceConfig(max_num_hands=1, model_complexity=0, scale=0.5),
+    "lite-roi": InferenceConfig(max_num_hands=1, model_complexity=0, roi=True),
+    "lite-roi-half": InferenceConfig(max_num_hands=1, model_complexity=0, scale=0.5, roi=True),
+}
+
+# ROI nhỏ hơn mức này (theo tỉ lệ cạnh frame) thì MediaPipe khó bắt lại tay
+MIN_ROI_FRACTION = 0.25
+
+
+def _even_span(a, b, limit):
+    # Nới [a, b) thêm một pixel nếu cạnh lẻ: thu nhỏ 0.5 không bỏ mất cột / hàng cuối, và vùng
+    # cắt trên ảnh gốc thu nhỏ ra đúng ảnh lật của vùng cắt trên ảnh lật
+    if (b - a) % 2 == 0: return a, b
+    if b < limit: return a, b + 1
+    return (a - 1, b) if a > 0 else (a, b)
+
+
+def roi_around(points, padding, width, height):
+    # Hộp bao các landmark, nới mỗi phía thêm `padding` * cạnh hộp, tính bằng pixel
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    bw = max(max(xs) - min(xs), MIN_ROI_FRACTION)
+    bh = max(max(ys) - min(ys), MIN_ROI_FRACTION)
+    cx = (max(xs) + min(xs)) / 2
+    cy = (max(ys) + min(ys)) / 2
+    half_w = bw * (0.5 + padding)
+    half_h = bh * (0.5 + padding)
+    x0 = max(0, int((cx - half_w) * width))
+    y0 = max(0, int((cy - half_h) * height))
+    x1 = min(width, int((cx + half_w) * width) + 1)
+    y1 = min(height, int((cy + half_h) * height) + 1)
+    x0, x1 = _even_span(x0, x1, width)
+    y0, y1 = _even_span(y0, y1, height)
+    return x0, y0, x1, y1
+
+
+class HandDetector:
+    def __init__(self, config=InferenceConfig()):
+        # Import mediapipe mất ~1s: chỉ nạp khi thật sự dựng detector
+        import mediapipe as mp
+        self.config = config
+        # Khi cắt ROI, vị trí vùng cắt đổi theo từng frame nên bộ tracking nội bộ của
+        # MediaPipe (dựa trên toạ độ frame trước) không còn đúng -> chạy chế độ ảnh tĩnh,
+        # việc "bám theo tay" do chính ROI đảm nhận.
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=config.roi,
+            max_num_hands=config.max_num_hands,
+            model_complexity=config.model_complexity,
+            min_detection_confidence=config.min_detection_confidence,
+            min_tracking_confidence=config.min_tracking_confidence,
+        )
+        self.roi = None # pixel theo ảnh đã lật, như toạ độ trả về
+        self.full_searches = 0
+        self.roi_hits = 0
+        self._small = None
+        self._rgb = None
+
+    def _process(self, frame, box):
+        # Trả về landmark theo toạ độ ảnh gốc (chưa lật)
+        x0, y0, x1, y1 = box
+        sub = frame[y0:y1, x0:x1]
+        if self.config.scale != 1.0:
+            sub = self._small = cv2.resize(sub, None, self._small, fx=self.config.scale, fy=self.config.scale, interpolation=cv2.INTER_AREA)
+        self._rgb = cv2.cvtColor(sub, cv2.COLOR_BGR2RGB, self._rgb)
+        results = self.hands.process(self._rgb)
+        if not results.multi_hand_landmarks: return None
+        h, w = frame.shape[:2]
+        sx, sy = (x1 - x0) / w, (y1 - y0) / h
+        ox, oy = x0 / w, y0 / h
+        return tuple((ox + lm.x * sx, oy + lm.y * sy) for lm in results.multi_hand_landmarks[0].landmark)
+
+    def __call__(self, frame):
+        h, w = frame.shape[:2]
+        full = (0, 0, w, h)
+
+        points = None
+        if self.config.roi and self.roi is not None:
+            # Cột x của ảnh lật là cột w - 1 - x của ảnh gốc: vùng cắt đối xứng đúng vùng cũ
+            x0, y0, x1, y1 = self.roi
+            points = self._process(frame, (w - x1, y0, w - x0, y1))
+            if points is not None: self.roi_hits += 1
+        if points is None:
+            # Chưa có ROI hoặc mất dấu trong ROI: tìm lại trên toàn frame
+            self.full_searches += 1
+            points = self._process(frame, full)
+
+        if points is not None: points = tuple((1.0 - x, y) for x, y in points) # lật gương như cv2.flip(frame, 1) cũ
+        if self.config.roi:
+            self.roi = None if points is None else roi_around(points, self.config.roi_padding, w, h)
+        return points
+
+    def reset(self):
+        # Quên tay của frame trước (khi chuyển sang đoạn video / nguồn khác)
+        self.hands.reset()
+        self.roi = None
+
+    def close(self):
+        self.hands.close()
@@ -0,0 +1,72 @@
+# ---------------- Bộ vẽ nhiều lớp + dirty rectangle ----------------
+# - Lớp tĩnh (nền, khung lưới, tiêu đề, khung bảng điểm...) vẽ MỘT lần vào `static`.
+# - Mỗi lớp động (lưới, điểm, khay...) có một hàm key(); chỉ khi key đổi thì vùng
+#   của lớp đó mới được ghép lại vào `scene` (nền tĩnh + mọi lớp chồng lên vùng đó).
+# - Những thứ đổi mỗi frame (con trỏ, khối đang kéo) vẽ thẳng lên màn hình qua overlay();
+#   frame sau vùng đó được khôi phục từ `scene`.
+# - present() chỉ đẩy các vùng bẩn qua pygame.display.update(rects) thay vì flip() cả cửa sổ.
+import pygame
+
+
+class Layer:
+    __slots__ = ("rect", "render", "key", "last_key")
+
+    def __init__(self, rect, render, key):
+        self.rect = pygame.Rect(rect)
+        self.render = render
+        self.key = key
+        self.last_key = None
+
+
+class LayeredRenderer:
+    def __init__(self, screen, render_static):
+        self.screen = screen
+        self.static = pygame.Surface(screen.get_size()).convert()
+        render_static(self.static)
+        self.scene = self.static.copy()
+        self.layers = []
+        self._dirty = [screen.get_rect()]
+        self._overlays = []
+        self._prev_overlays = []
+
+    def add_layer(self, rect, render, key):
+        layer = Layer(rect, render, key)
+        self.layers.append(layer)
+        self._dirty.append(layer.rect)
+        return layer
+
+    def invalidate(self):
+        # Vẽ lại toàn bộ (VD: cửa sổ bị che rồi hiện lại)
+        for layer in self.layers: layer.last_key = None
+        self._dirty.append(self.screen.get_rect())
+
+    def begin_frame(self):
+        # Ghép lại các lớp có key thay đổi, rồi khôi phục màn hình ở vùng bẩn + vùng overlay cũ
+        regions = list(self._dirty)
+        for layer in self.layers:
+            k = layer.key()
+            if k != layer.last_key:
+                layer.last_key = k
+                regions.append(layer.rect)
+
+        scene = self.scene
+        for region in regions:
+            scene.set_clip(region)
+            scene.blit(self.static, region.topleft, region)
+            for layer in self.layers:
+                if layer.rect.colliderect(region): layer.render(scene)
+        scene.set_clip(None)
+
+        for r in regions + self._prev_overlays:
+            self.screen.blit(scene, r.topleft, r)
+        self._dirty = regions
+
+    def overlay(self, rect):
+        # Khai báo vùng vừa vẽ trực tiếp lên màn hình trong frame này
+        if rect: self._overlays.append(pygame.Rect(rect))
+
+    def present(self):
+        pygame.display.update(self._dirty + self._prev_overlays + self._overlays)
+        self._prev_overlays = self._overlays
+        self._overlays = []
+        self._dirty = []
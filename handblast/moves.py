@@ -0,0 +1,42 @@
+# ---------------- Chỉ mục nước đi hợp lệ ----------------
+# Giữ sẵn bitmask các điểm neo đặt được cho từng ô của khay (bit gy*size + gx),
+# chỉ cập nhật khi lưới đổi (đặt khối) hoặc khay được làm mới. Nhờ vậy kiểm tra
+# Game Over và tô màu preview khi kéo khối mỗi frame chỉ là tra cứu O(1).
+class MoveIndex:
+    __slots__ = ("anchors", "_any", "_size")
+
+    def __init__(self, board, tray):
+        self.rebuild(board, tray)
+
+    def rebuild(self, board, tray):
+        # Tính lại toàn bộ: gọi khi khay mới (new_tray) hoặc lưới bị xoá hàng/cột
+        self._size = board.size
+        self.anchors = [0 if b is None else board.legal_anchors(b["shape_id"]) for b in tray]
+        self._any = any(self.anchors)
+
+    def on_place(self, board, tray, slot, combo):
+        # Gọi sau place_block() khi ô khay `slot` đã được gán None. Nếu không có hàng/cột
+        # nào bị xoá thì lưới chỉ đầy thêm, nên chỉ cần loại các điểm neo cũ bị chồng lấn.
+        self.anchors[slot] = 0
+        if combo:
+            self.rebuild(board, tray)
+            return
+        occ = board.occupied
+        for i, bits in enumerate(self.anchors):
+            if not bits: continue
+            masks = board.geo.placement_masks[tray[i]["shape_id"]]
+            keep = bits
+            while bits:
+                low = bits & -bits
+                if occ & masks[low.bit_length() - 1]: keep ^= low
+                bits ^= low
+            self.anchors[i] = keep
+        self._any = any(self.anchors)
+
+    def has_moves(self):
+        return self._any
+
+    def is_legal(self, slot, gx, gy):
+        size = self._size
+        if gx < 0 or gy < 0 or gx >= size or gy >= size: return False
+        return (self.anchors[slot] >> (gy * size + gx)) & 1 == 1
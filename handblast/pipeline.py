@@ -0,0 +1,172 @@
+# ---------------- Pipeline camera -> MediaPipe chạy nền ----------------
+# Vòng lặp vẽ không còn gọi cap.read() / hands.process() nối tiếp nữa:
+#   - LatestFrameGrabber: thread đọc camera, chỉ giữ frame MỚI NHẤT (frame cũ bị ghi đè)
+#   - HandInferenceWorker: thread lấy frame mới nhất, chạy detect(frame) và công bố
+#     kết quả mới nhất kèm thời điểm chụp / thời điểm suy luận xong
+# Vòng lặp vẽ chỉ đọc kết quả mới nhất (không chờ, không khoá). Frame nào tới lúc worker
+# còn bận sẽ bị bỏ qua thay vì xếp hàng, nên độ trễ không cộng dồn.
+# cap.read() và hands.process() đều nhả GIL khi chạy phần C++, nên hai thread này
+# chạy song song thật sự với vòng lặp pygame.
+# [BUFFER] Grabber đọc vào 3 bộ đệm xoay vòng (cap.read(image=buf)) thay vì cấp phát frame
+# mới mỗi lần: một bộ đệm giữ frame mới nhất, một bộ đệm worker đang xử lý, bộ còn lại để
+# ghi frame kế tiếp, nên grabber không bao giờ ghi đè frame worker đang dùng. Hệ quả: frame
+# nhận từ wait_newer() chỉ hợp lệ tới lần gọi wait_newer() kế tiếp, cần giữ lâu hơn thì copy.
+# [POWER] throttle(giây): khi không thấy tay, worker nghỉ giữa hai lần detect (chế độ idle
+# của handblast.power); hand_event được set mỗi khi có kết quả thấy tay để vòng lặp đang
+# ngủ dậy ngay.
+# Lỗi trong thread (cap.read() / detect() ném exception) không làm thread chết lặng lẽ nữa:
+# thread ghi `error` (dòng chữ tiếng Anh để giao diện hiện), in một lần ra stderr rồi dừng hẳn;
+# HandPipeline.error gom lỗi của cả hai thread.
+import sys
+import threading
+import traceback
+import time
+from collections import namedtuple
+
+# seq: số thứ tự frame camera, captured_at / inferred_at: time.perf_counter()
+# points: tuple 21 điểm (x, y) đã chuẩn hoá 0..1 của bàn tay đầu tiên, None nếu không thấy tay
+HandSample = namedtuple("HandSample", "seq captured_at inferred_at points")
+
+
+def _fail(thread, message):
+    # Gọi trong except của run(): ghi lỗi, in traceback một lần, dừng thread
+    thread.error = message
+    print(f"[{thread.name}] {message}", file=sys.stderr)
+    traceback.print_exc()
+    thread.stop()
+
+
+class LatestFrameGrabber(threading.Thread):
+    def __init__(self, cap, buffers=3):
+        super().__init__(name="camera-grabber", daemon=True)
+        self.cap = cap
+        self._cond = threading.Condition()
+        self._buffers = [None] * buffers # None = chưa có, cap.read() tự cấp phát ở lần đầu
+        self._published = -1 # index bộ đệm của frame mới nhất
+        self._held = -1 # index bộ đệm worker đang dùng
+        self._frame = None
+        self._captured_at = 0.0
+        self._seq = 0
+        self._stop_event = threading.Event()
+        self.read_time = 0.0 # thời gian cap.read() gần nhất (giây), cho FrameProfiler
+        self.error = None
+
+    def run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            _fail(self, f"Camera read failed: {e}")
+
+    def _loop(self):
+        buffers = self._buffers
+        while not self._stop_event.is_set():
+            with self._cond:
+                i = next(k for k in range(len(buffers)) if k != self._published and k != self._held)
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read(image=buffers[i])
+            self.read_time = time.perf_counter() - t0
+            if not ret:
+                time.sleep(0.01)
+                continue
+            buffers[i] = frame # lần đầu / đổi độ phân giải thì cap.read() trả về mảng mới
+            t = time.perf_counter()
+            with self._cond:
+                self._frame = frame
+                self._published = i
+                self._captured_at = t
+                self._seq += 1
+                self._cond.notify_all()
+
+    def wait_newer(self, seq, timeout=0.1):
+        # Chờ tới khi có frame mới hơn `seq`; trả về (seq, captured_at, frame) hoặc None nếu hết giờ
+        with self._cond:
+            if self._seq <= seq and not self._cond.wait_for(lambda: self._seq > seq, timeout):
+                return None
+            self._held = self._published # frame trước (nếu có) trả lại cho grabber
+            return self._seq, self._captured_at, self._frame
+
+    @property
+    def frames_captured(self):
+        return self._seq
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class HandInferenceWorker(threading.Thread):
+    def __init__(self, grabber, detect, hand_event=None):
+        super().__init__(name="hand-inference", daemon=True)
+        self.grabber = grabber
+        self.detect = detect
+        self.hand_event = hand_event if hand_event is not None else threading.Event()
+        self.idle_interval = 0.0 # nghỉ tối thiểu giữa hai lần detect khi không thấy tay (giây)
+        self.frames_inferred = 0
+        self.frames_dropped = 0
+        self._latest = None
+        self._stop_event = threading.Event()
+        self.detect_time = 0.0 # thời gian detect(frame) gần nhất (giây), cho FrameProfiler
+        self.error = None
+
+    def run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            _fail(self, f"Hand tracking failed: {e}")
+
+    def _loop(self):
+        seq = 0
+        while not self._stop_event.is_set():
+            item = self.grabber.wait_newer(seq)
+            if item is None:
+                if self.grabber.error is not None: return # grabber đã dừng vì lỗi: không còn frame nào nữa
+                continue
+            new_seq, captured_at, frame = item
+            if seq: self.frames_dropped += new_seq - seq - 1
+            seq = new_seq
+            t0 = time.perf_counter()
+            points = self.detect(frame)
+            t1 = time.perf_counter()
+            self.detect_time = t1 - t0
+            self.frames_inferred += 1
+            # Gán một tham chiếu là nguyên tử với GIL: vòng lặp vẽ đọc không cần khoá
+            self._latest = HandSample(seq, captured_at, t1, points)
+            if points is not None:
+                self.hand_event.set()
+            elif self.idle_interval > 0:
+                # Frame đến trong lúc nghỉ bị bỏ qua như frame đến lúc worker bận
+                self._stop_event.wait(self.idle_interval - (t1 - t0))
+
+    def latest(self):
+        return self._latest
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class HandPipeline:
+    def __init__(self, cap, detect, hand_event=None):
+        self.grabber = LatestFrameGrabber(cap)
+        self.worker = HandInferenceWorker(self.grabber, detect, hand_event)
+        self.hand_event = self.worker.hand_event
+
+    def start(self):
+        self.grabber.start()
+        self.worker.start()
+        return self
+
+    def latest(self):
+        return self.worker.latest()
+
+    @property
+    def error(self):
+        # Lỗi làm một trong hai thread dừng, None khi đang chạy bình thường
+        return self.grabber.error or self.worker.error
+
+    def throttle(self, idle_interval):
+        self.worker.idle_interval = idle_interval
+
+    def stop(self):
+        self.worker.stop()
+        self.grabber.stop()
+        self.worker.join(timeout=1.0)
+        self.grabber.join(timeout=1.0)
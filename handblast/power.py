@@ -0,0 +1,107 @@
+# ---------------- Chế độ tiết kiệm điện khi không ai chơi ----------------
+# Máy kiosk bật cả ngày: vòng lặp vẽ FPS cố định + MediaPipe mọi frame ăn trọn một nhân
+# dù không có ai trước camera. PowerGovernor chọn chế độ mỗi frame:
+#   - "active": có tay trong idle_after giây gần nhất -> vẽ đủ FPS, suy luận mọi frame
+#   - "idle": không thấy tay quá idle_after giây -> vẽ idle_fps, worker chỉ chạy detect mỗi
+#     idle_detect_interval giây (khi chưa thấy tay, xem HandInferenceWorker.throttle)
+#   - "game-over": màn hình Game Over -> vẽ game_over_fps, suy luận như idle
+# Trong idle / game-over vòng lặp ngủ trên hand_event của pipeline thay vì clock.tick(), nên
+# worker vừa thấy tay là vòng lặp thức dậy ngay, frame kế tiếp đã ở "active" (đủ FPS).
+# Mỗi chế độ cộng dồn thời gian thực + CPU của cả process (time.process_time(), gồm các
+# thread camera / MediaPipe) -> report() in số giây CPU / phút của từng chế độ.
+# Việc "không vẽ lại khi không có gì đổi" nằm ở file game (so khoá của khung hình).
+import math
+import time
+from collections import namedtuple
+
+ACTIVE = "active"
+IDLE = "idle"
+GAME_OVER = "game-over"
+MODES = (ACTIVE, IDLE, GAME_OVER)
+
+# idle_fps / game_over_fps: None = đủ FPS; idle_detect_interval: 0 = không giảm tần số suy luận
+PowerConfig = namedtuple("PowerConfig", "idle_after idle_fps game_over_fps idle_detect_interval",
+                         defaults=(3.0, 10, 10, 0.2))
+
+# "off" = như cũ (vẫn đếm CPU theo chế độ), "kiosk" = ngủ sâu hơn cho máy bật cả ngày
+POWER_PRESETS = {
+    "off": PowerConfig(idle_after=math.inf, idle_fps=None, game_over_fps=None, idle_detect_interval=0.0),
+    "balanced": PowerConfig(),
+    "kiosk": PowerConfig(idle_after=2.0, idle_fps=4, game_over_fps=5, idle_detect_interval=0.33),
+}
+
+
+class ModeStats:
+    __slots__ = ("wall", "cpu", "frames", "redraws")
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.frames = 0
+        self.redraws = 0
+
+    @property
+    def cpu_per_minute(self):
+        # Số giây CPU mỗi phút ở chế độ này (60 = trọn một nhân)
+        return self.cpu / self.wall * 60 if self.wall > 0 else 0.0
+
+
+class PowerGovernor:
+    def __init__(self, config, fps):
+        self.config = config
+        self.fps = fps
+        self.mode = ACTIVE
+        self.stats = {mode: ModeStats() for mode in MODES}
+        self._last_hand = self._t = time.perf_counter()
+        self._cpu = time.process_time()
+        self._frame_start = self._t
+
+    def update(self, hand_detected, game_over):
+        # Gọi mỗi frame sau khi cập nhật tay / game; trả về chế độ cho phần còn lại của frame
+        now = time.perf_counter()
+        cpu = time.process_time()
+        stats = self.stats[self.mode]
+        stats.wall += now - self._t
+        stats.cpu += cpu - self._cpu
+        self._t, self._cpu = now, cpu
+
+        if hand_detected: self._last_hand = now
+        if game_over: self.mode = GAME_OVER
+        elif now - self._last_hand < self.config.idle_after: self.mode = ACTIVE
+        else: self.mode = IDLE
+        return self.mode
+
+    def count_frame(self, redrawn):
+        stats = self.stats[self.mode]
+        stats.frames += 1
+        stats.redraws += redrawn
+
+    @property
+    def frame_rate(self):
+        config = self.config
+        rate = {ACTIVE: None, IDLE: config.idle_fps, GAME_OVER: config.game_over_fps}[self.mode]
+        return self.fps if rate is None else min(rate, self.fps)
+
+    @property
+    def detect_interval(self):
+        # Khoảng tối thiểu giữa hai lần detect khi không thấy tay (giây), cho pipeline.throttle()
+        return 0.0 if self.mode == ACTIVE else self.config.idle_detect_interval
+
+    def wait(self, clock, hand_event=None):
+        # Thay clock.tick(FPS) cuối frame
+        rate = self.frame_rate
+        if rate >= self.fps:
+            clock.tick(self.fps)
+            if hand_event is not None: hand_event.clear()
+        else:
+            # Ngủ tới hết frame chậm, nhưng dậy ngay khi worker thấy tay
+            timeout = 1 / rate - (time.perf_counter() - self._frame_start)
+            if timeout > 0:
+                if hand_event is None: time.sleep(timeout)
+                elif hand_event.wait(timeout): hand_event.clear()
+            clock.tick()
+        self._frame_start = time.perf_counter()
+
+    def report(self):
+        return ", ".join(f"{mode} {s.cpu_per_minute:.1f}s CPU/phút ({s.wall:.0f}s, vẽ {s.redraws}/{s.frames} frame)"
+                         for mode, s in self.stats.items() if s.frames)
@@ -0,0 +1,123 @@
+# ---------------- Đo thời gian từng giai đoạn của frame ----------------
+# Vòng lặp chính gọi begin_frame(), rồi mark("tên") sau mỗi giai đoạn (thời gian tính từ
+# mark trước đó), và end_frame() cuối frame. Số liệu đo ở thread khác (cap.read, process
+# của MediaPipe) thì đưa vào bằng record("tên", giây).
+#   - Mỗi giai đoạn giữ cửa sổ trượt `window` frame gần nhất -> summary() trả p50/p95/p99/max
+#   - sink (CsvSink / JsonlSink) nhận một bản ghi mỗi frame để phân tích sau
+# Khi tắt dùng NULL_PROFILER: mọi hàm là no-op, vòng lặp không phải kiểm tra cờ nào.
+# Không phụ thuộc pygame (phần vẽ overlay nằm ở file game).
+import csv
+import json
+import time
+from collections import deque
+
+TOTAL = "total" # tổng thời gian từ begin_frame() đến end_frame()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class FrameProfiler:
+    enabled = True
+
+    def __init__(self, window=300, sink=None):
+        self.window = window
+        self.sink = sink
+        self.frames = 0
+        self._windows = {}
+        self._current = {}
+        self._frame_start = 0.0
+        self._t = 0.0
+
+    def begin_frame(self):
+        self._frame_start = self._t = time.perf_counter()
+        self._current = {}
+
+    def mark(self, stage):
+        t = time.perf_counter()
+        current = self._current
+        current[stage] = current.get(stage, 0.0) + t - self._t
+        self._t = t
+
+    def record(self, stage, seconds):
+        self._current[stage] = seconds
+
+    def end_frame(self):
+        current = self._current
+        current[TOTAL] = time.perf_counter() - self._frame_start
+        windows = self._windows
+        for stage, seconds in current.items():
+            w = windows.get(stage)
+            if w is None:
+                w = windows[stage] = deque(maxlen=self.window)
+            w.append(seconds)
+        self.frames += 1
+        if self.sink is not None: self.sink.write(self.frames, self._frame_start, current)
+
+    def summary(self):
+        # {giai đoạn: (p50, p95, p99, max)} tính bằng mili giây, theo thứ tự xuất hiện
+        result = {}
+        for stage, w in self._windows.items():
+            values = sorted(w)
+            result[stage] = tuple(1000 * v for v in (percentile(values, 0.5), percentile(values, 0.95),
+                                                    percentile(values, 0.99), values[-1]))
+        return result
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+
+class NullProfiler:
+    enabled = False
+    frames = 0
+
+    def begin_frame(self): pass
+    def mark(self, stage): pass
+    def record(self, stage, seconds): pass
+    def end_frame(self): pass
+    def summary(self): return {}
+    def close(self): pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+# ---------------- Ghi bản ghi từng frame ----------------
+class CsvSink:
+    # Cột cố định: frame, t, rồi `stages` (ms). Giai đoạn không chạy trong frame đó để trống
+    def __init__(self, path, stages):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.DictWriter(self._file, ("frame", "t") + tuple(stages) + (TOTAL,), extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, frame, t, stages):
+        row = {k: f"{v * 1000:.3f}" for k, v in stages.items()}
+        row["frame"] = frame
+        row["t"] = f"{t:.6f}"
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    def __init__(self, path):
+        self._file = open(path, "w")
+
+    def write(self, frame, t, stages):
+        record = {"frame": frame, "t": round(t, 6)}
+        record.update((k, round(v * 1000, 3)) for k, v in stages.items())
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(path, stages):
+    # Chọn định dạng theo đuôi file: .jsonl -> JSON Lines, còn lại -> CSV
+    if path.endswith(".jsonl"): return JsonlSink(path)
+    return CsvSink(path, stages)
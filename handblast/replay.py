@@ -0,0 +1,269 @@
+# ---------------- Ghi và chạy lại landmark của bàn tay ----------------
+# LandmarkRecorder ghi lại đúng những HandSample mà HandController đã dùng (mỗi frame:
+# thời điểm, có thấy tay không, toạ độ ngón trỏ 8 + ngón cái 4 hoặc đủ 21 điểm), cùng
+# seed của khay và bố cục điều khiển. Chạy lại cùng file với cùng seed -> cùng lưới, cùng điểm.
+#
+# Định dạng file (little-endian), dữ liệu nằm trong các mảng liền nhau (module array):
+#   header  : _HEADER (magic, version, cờ file, số điểm / frame, số frame, seed, số ô lưới,
+#             điểm cuối ván) + ControlLayout (12 double; bản ghi version 1: 11, chưa có release_threshold)
+#   grid    : số ô lưới byte = màu các ô lúc kết thúc (để kiểm tra khi chạy lại)
+#   times   : n double  - giây tính từ frame đầu
+#   flags   : n byte    - bit 0: thấy tay, bit 1: ván mới bắt đầu trước frame này
+#   coords  : n * số điểm * 2 double - x, y chuẩn hoá (0 khi không thấy tay); giữ double để
+#             phép làm tròn ra pixel khi chạy lại giống hệt lúc ghi
+import math
+import random
+import struct
+import sys
+import time
+from array import array
+
+from handblast.control import ControlLayout, HandController, INDEX_TIP, THUMB_TIP
+from handblast.engine import CELLS, GRID_SIZE
+from handblast.game import GameState
+from handblast.pipeline import HandSample
+
+MAGIC = b"HBR1"
+VERSION = 2
+_HEADER = struct.Struct("<4sHHHIQHq")
+_LAYOUTS = {1: struct.Struct("<" + "d" * 11), 2: struct.Struct("<" + "d" * len(ControlLayout._fields))}
+
+FLAG_HAND = 1
+FLAG_RESET = 2
+FLAG_FULL = 1 # cờ của file: có đủ 21 điểm
+FLAG_PLAYABLE = 2 # cờ của file: ván chơi với GameState(playable_tray=True)
+
+NUM_LANDMARKS = 21
+RECORDED_POINTS = (INDEX_TIP, THUMB_TIP) # thứ tự lưu khi chỉ ghi 2 điểm
+
+
+class LandmarkRecorder:
+    def __init__(self, seed, layout, full=False, playable_tray=False):
+        self.seed = seed
+        self.layout = layout
+        self.full = full
+        self.playable_tray = playable_tray
+        self.times = array("d")
+        self.flags = array("B")
+        self.coords = array("d")
+        self._t0 = None
+        self._reset = False
+
+    def mark_reset(self):
+        # Gọi khi game.reset(): frame ghi kế tiếp được đánh dấu "ván mới"
+        self._reset = True
+
+    def add(self, sample):
+        t = sample.captured_at
+        if self._t0 is None: self._t0 = t
+        self.times.append(t - self._t0)
+        flag = FLAG_RESET if self._reset else 0
+        self._reset = False
+        per_frame = NUM_LANDMARKS if self.full else len(RECORDED_POINTS)
+        if sample.points is None:
+            self.coords.extend([0.0] * (2 * per_frame))
+        else:
+            flag |= FLAG_HAND
+            points = sample.points if self.full else [sample.points[i] for i in RECORDED_POINTS]
+            for x, y in points:
+                self.coords.append(x)
+                self.coords.append(y)
+        self.flags.append(flag)
+
+    def __len__(self):
+        return len(self.times)
+
+    def save(self, path, game):
+        # game: ván lúc kết thúc ghi, dùng làm kết quả mong đợi khi chạy lại
+        recording = Recording(self.seed, self.layout, self.full, self.times, self.flags, self.coords,
+                              game.score, bytes(game.grid.colors), self.playable_tray)
+        recording.save(path)
+        return recording
+
+
+class Recording:
+    def __init__(self, seed, layout, full, times, flags, coords, final_score=0, final_grid=bytes(CELLS), playable_tray=False):
+        self.seed = seed
+        self.layout = layout
+        self.full = full
+        self.playable_tray = playable_tray
+        self.times = times
+        self.flags = flags
+        self.coords = coords
+        self.final_score = final_score
+        self.final_grid = final_grid
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def board_size(self):
+        # Header lưu số ô của lưới cuối: cạnh lưới = căn bậc hai
+        return math.isqrt(len(self.final_grid))
+
+    @property
+    def points_per_frame(self):
+        return NUM_LANDMARKS if self.full else len(RECORDED_POINTS)
+
+    def save(self, path):
+        n = len(self.times)
+        with open(path, "wb") as f:
+            file_flags = (FLAG_FULL if self.full else 0) | (FLAG_PLAYABLE if self.playable_tray else 0)
+            f.write(_HEADER.pack(MAGIC, VERSION, file_flags, self.points_per_frame, n,
+                                 self.seed, len(self.final_grid), self.final_score))
+            layout = self.layout
+            if layout.release_threshold is None: layout = layout._replace(release_threshold=layout.dist_threshold)
+            f.write(_LAYOUTS[VERSION].pack(*layout))
+            f.write(self.final_grid)
+            for a in (self.times, self.flags, self.coords):
+                if sys.byteorder != "little":
+                    a = array(a.typecode, a)
+                    a.byteswap()
+                a.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, file_flags, per_frame, n, seed, cells, final_score = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version not in _LAYOUTS:
+                raise ValueError(f"{path}: không phải file ghi landmark (HBR1, version {sorted(_LAYOUTS)})")
+            # Lưu dạng double (v1 không giới hạn mép phải khay = inf), đọc lại thành int khi được
+            packed = _LAYOUTS[version]
+            layout = ControlLayout(*(int(v) if v.is_integer() else v for v in packed.unpack(f.read(packed.size))))
+            final_grid = f.read(cells)
+            arrays = []
+            for typecode, count in (("d", n), ("B", n), ("d", n * per_frame * 2)):
+                a = array(typecode)
+                a.fromfile(f, count)
+                if sys.byteorder != "little": a.byteswap()
+                arrays.append(a)
+        return cls(seed, layout, bool(file_flags & FLAG_FULL), *arrays, final_score, final_grid, bool(file_flags & FLAG_PLAYABLE))
+
+    def samples(self):
+        # Dãy (HandSample, ván mới?) theo đúng thứ tự đã ghi. Khi chỉ ghi 2 điểm, các điểm
+        # còn lại của points là None
+        per_frame = self.points_per_frame
+        coords = self.coords
+        for i, t in enumerate(self.times):
+            flag = self.flags[i]
+            points = None
+            if flag & FLAG_HAND:
+                base = i * per_frame * 2
+                xy = [(coords[base + 2*k], coords[base + 2*k + 1]) for k in range(per_frame)]
+                if self.full:
+                    points = tuple(xy)
+                else:
+                    full = [None] * NUM_LANDMARKS
+                    for k, idx in enumerate(RECORDED_POINTS): full[idx] = xy[k]
+                    points = tuple(full)
+            yield HandSample(i + 1, t, t, points), bool(flag & FLAG_RESET)
+
+
+def replay_headless(recording, num_colors):
+    # Chạy lại toàn bộ bản ghi trên GameState mới (không pygame, không chờ): trả về game
+    game = GameState(rng=random.Random(recording.seed), num_colors=num_colors, size=recording.board_size,
+                     playable_tray=recording.playable_tray)
+    control = HandController(game, recording.layout)
+    for sample, reset in recording.samples():
+        if reset:
+            game.reset()
+            control.release()
+        control.update(sample)
+    return game
+
+
+def verify_replay(recording, num_colors):
+    game = replay_headless(recording, num_colors)
+    return game.score == recording.final_score and bytes(game.grid.colors) == recording.final_grid
+
+
+class ReplaySource:
+    # Thay HandPipeline khi chạy lại trong game: latest() trả về sample kế tiếp khi tới giờ
+    # (theo `speed`, 2.0 = nhanh gấp đôi). Mỗi lần gọi nhả tối đa một sample để vòng lặp
+    # không bỏ sót frame nào -> kết quả giống hệt lúc ghi; muốn nhanh hơn nữa dùng replay_headless().
+    def __init__(self, recording, speed=1.0):
+        self.recording = recording
+        self.speed = speed
+        self._samples = recording.samples()
+        self._next = next(self._samples, None)
+        self._latest = None
+        self._start = None
+        self._reset_due = False
+        self.hand_event = None # vòng lặp chờ theo thời gian như không có camera
+        self.filtered = True # bản ghi lưu sample đã qua CursorFilter: file game không lọc lại
+
+    def start(self):
+        self._start = time.perf_counter()
+        return self
+
+    def latest(self):
+        if self._next is None or self._reset_due: return self._latest
+        sample, reset = self._next
+        if (time.perf_counter() - self._start) * self.speed < sample.captured_at: return self._latest
+        if reset:
+            # Chờ file game gọi take_reset() (đúng chỗ lúc ghi đã nhấn R) rồi mới nhả sample
+            self._reset_due = True
+            self._next = (sample, False)
+            return self._latest
+        # Đổi thời điểm trong bản ghi sang đồng hồ hiện tại (như HandPipeline)
+        t = self._start + sample.captured_at / self.speed
+        self._latest = sample._replace(captured_at=t, inferred_at=t)
+        self._next = next(self._samples, None)
+        return self._latest
+
+    def take_reset(self):
+        due = self._reset_due
+        self._reset_due = False
+        return due
+
+    @property
+    def finished(self):
+        return self._next is None
+
+    def throttle(self, idle_interval):
+        pass # Bản ghi không có suy luận để giảm
+
+    def stop(self):
+        pass
+
+
+# ---------------- Bản ghi giả lập (không cần camera) ----------------
+SYNTH_FPS = 30
+
+
+def _synth_sample(seq, layout, cursor, pinched):
+    t = seq / SYNTH_FPS
+    if cursor is None: return HandSample(seq, t, t, None)
+    x, y = cursor
+    gap = 10 if pinched else 3 * layout.dist_threshold
+    points = [(x / layout.width, y / layout.height)] * NUM_LANDMARKS
+    points[THUMB_TIP] = ((x + gap) / layout.width, y / layout.height)
+    return HandSample(seq, t, t, tuple(points))
+
+
+def synthesize_recording(seed, layout, num_moves, num_colors, full=False, size=GRID_SIZE, playable_tray=False):
+    # Chơi num_moves nước ngẫu nhiên (theo seed) bằng cử chỉ dựng sẵn: đưa tay tới khay,
+    # véo, kéo tới ô đích, mở tay, mất tay một frame. Trả về Recording như lúc ghi thật
+    rng = random.Random(seed ^ 0x5EED)
+    game = GameState(rng=random.Random(seed), num_colors=num_colors, size=size, playable_tray=playable_tray)
+    control = HandController(game, layout)
+    recorder = LandmarkRecorder(seed, layout, full, playable_tray)
+
+    def feed(cursor, pinched):
+        sample = _synth_sample(len(recorder) + 1, layout, cursor, pinched)
+        control.update(sample)
+        recorder.add(sample)
+
+    for _ in range(num_moves):
+        if game.is_game_over(): break
+        slot, gx, gy = rng.choice(game.legal_moves())
+        start = (layout.tray_x0 + 30, layout.tray_y + slot*layout.tray_spacing + layout.tray_slot_height // 2)
+        end = (layout.grid_x + gx*layout.cell + layout.cell // 2, layout.grid_y + gy*layout.cell + layout.cell // 2)
+        for _ in range(3): feed(start, False)
+        for _ in range(2): feed(start, True)
+        for k in range(1, 9):
+            feed((start[0] + (end[0] - start[0]) * k / 8, start[1] + (end[1] - start[1]) * k / 8), True)
+        for _ in range(2): feed(end, False)
+        feed(None, False)
+    return Recording(seed, layout, full, recorder.times, recorder.flags, recorder.coords,
+                     game.score, bytes(game.grid.colors), playable_tray)
@@ -0,0 +1,221 @@
+# ---------------- Self-play Monte-Carlo để cân bằng khối / điểm ----------------
+# Chơi thật nhiều ván bằng GameState (đúng luật đặt khối, xoá dòng, tính điểm của engine) với
+# một chính sách chơi, trên nhiều process, để chỉnh BLOCK_SHAPES / phân bố new_block / điểm
+# mỗi dòng xoá bằng số liệu:
+#   - SelfPlayRules: cạnh lưới, số màu, trọng số từng khối (GameState.shape_weights, 0 = bỏ
+#     khối đó), điểm mỗi dòng (line_bonus, None = combo * cạnh lưới như luật gốc), giới hạn nước,
+#     khay luôn đặt được (GameState.playable_tray, handblast.trays)
+#   - POLICIES: "random" (như play_scalar của handblast.batch), "greedy" (điểm ngay nước này
+#     lớn nhất, hoà lấy nước đầu), "lookahead" (HintSearch "balanced" trên cả khay, đi theo
+#     chuỗi nước tìm được tới khi khay mới). Thêm chính sách: lớp nhận rules, gọi policy(game)
+#     trả về (slot, gx, gy)
+#   - Ván thứ i của lượt chạy dùng random.Random(game_seed(seed, i)) cho cả khay lẫn chính
+#     sách: cùng seed -> cùng kết quả, không phụ thuộc số process / cách chia việc
+#   - SelfPlayStats: cộng dồn dạng đếm (Counter điểm / số nước / combo, số khối theo hình),
+#     merge() được và chỉ lớn theo số giá trị khác nhau chứ không theo số ván. Mỗi process trả
+#     về stats của một lô ván, process chính merge ngay khi nhận (imap_unordered)
+# Không phụ thuộc pygame / numpy. Chạy: python tools/selfplay.py
+import math
+import multiprocessing
+import random
+from collections import Counter, namedtuple
+
+from handblast.engine import BLOCK_SHAPES, GRID_SIZE, clear_touched_lines, placement_score
+from handblast.game import NUM_COLORS, GameState
+from handblast.solver import HintSearch
+
+# max_moves: dừng ván quá dài (chính sách tốt có thể chơi rất lâu), đếm vào SelfPlayStats.capped
+SelfPlayRules = namedtuple("SelfPlayRules", "size num_colors shape_weights line_bonus max_moves playable_tray",
+                           defaults=(GRID_SIZE, NUM_COLORS, None, None, 5000, False))
+
+RULE_PRESETS = {
+    "default": SelfPlayRules(),
+    "no-single": SelfPlayRules(shape_weights=tuple(0 if len(s) == 1 else 1 for s in BLOCK_SHAPES)),
+    "small-bias": SelfPlayRules(shape_weights=tuple(5 - min(len(s), 4) for s in BLOCK_SHAPES)),
+    "big-bias": SelfPlayRules(shape_weights=tuple(min(len(s), 4) for s in BLOCK_SHAPES)),
+    "line-x2": SelfPlayRules(line_bonus=2 * GRID_SIZE),
+    "board-10": SelfPlayRules(size=10),
+    "playable": SelfPlayRules(playable_tray=True),
+}
+
+SelfPlayTask = namedtuple("SelfPlayTask", "rules policy seed start count")
+
+
+def game_seed(seed, index):
+    return (seed << 32) | index
+
+
+class RandomPolicy:
+    def __init__(self, rules):
+        pass
+
+    def __call__(self, game):
+        return game.rng.choice(game.legal_moves())
+
+
+class GreedyPolicy:
+    def __init__(self, rules):
+        pass
+
+    def __call__(self, game):
+        # Duyệt theo thứ tự legal_moves() (slot, rồi điểm neo) -> hoà thì lấy nước đầu
+        occ = game.grid.occupied
+        geo = game.grid.geo
+        best, move = -1, None
+        for slot, block in enumerate(game.tray):
+            if block is None: continue
+            shape_id = block["shape_id"]
+            cells = len(BLOCK_SHAPES[shape_id])
+            for bit, m, lines in geo.valid_placements[shape_id]:
+                if occ & m: continue
+                gain = placement_score(cells, clear_touched_lines(occ | m, lines)[2], geo.size, game.line_bonus)
+                if gain > best: best, move = gain, (slot, bit)
+        slot, bit = move
+        a = bit.bit_length() - 1
+        return slot, a % geo.size, a // geo.size
+
+
+class LookaheadPolicy:
+    def __init__(self, rules, evaluation="balanced"):
+        self.evaluation = evaluation
+        self.cache = {}
+        self.plan = []
+
+    def __call__(self, game):
+        # Tìm trọn (mọi độ sâu, không giới hạn thời gian -> kết quả cố định) một lần cho mỗi khay,
+        # các nước sau đi theo chuỗi đã tìm (tìm lại trên phần khay còn lại cho cùng kết quả)
+        if not self.plan:
+            search = HintSearch(game.grid.occupied, game.tray, self.evaluation, self.cache, game.size, game.line_bonus)
+            search.step(math.inf)
+            self.plan = list(search.best[1])
+        return self.plan.pop(0)
+
+
+POLICIES = {"random": RandomPolicy, "greedy": GreedyPolicy, "lookahead": LookaheadPolicy}
+
+
+class SelfPlayStats:
+    def __init__(self):
+        self.games = 0
+        self.capped = 0 # ván dừng vì max_moves
+        self.scores = Counter() # điểm cuối ván -> số ván
+        self.lengths = Counter() # số nước mỗi ván -> số ván
+        self.combos = Counter() # số dòng xoá của một nước -> số nước
+        n = len(BLOCK_SHAPES)
+        self.placed = [0] * n # số lần đặt từng khối
+        self.stuck = [0] * n # số lần khối còn kẹt trong khay lúc hết ván
+
+    def add_move(self, shape_id, combo):
+        self.placed[shape_id] += 1
+        self.combos[combo] += 1
+
+    def add_game(self, game, capped=False):
+        self.games += 1
+        self.capped += capped
+        self.scores[game.score] += 1
+        self.lengths[game.moves_made] += 1
+        for block in game.tray:
+            if block is not None: self.stuck[block["shape_id"]] += 1
+
+    def merge(self, other):
+        self.games += other.games
+        self.capped += other.capped
+        self.scores.update(other.scores)
+        self.lengths.update(other.lengths)
+        self.combos.update(other.combos)
+        self.placed = [a + b for a, b in zip(self.placed, other.placed)]
+        self.stuck = [a + b for a, b in zip(self.stuck, other.stuck)]
+        return self
+
+    @staticmethod
+    def mean(counter):
+        total = sum(counter.values())
+        return sum(v * n for v, n in counter.items()) / total if total else 0.0
+
+    @staticmethod
+    def quantile(counter, q):
+        # Giá trị nhỏ nhất mà ít nhất q phần các mẫu <= nó
+        total = sum(counter.values())
+        if not total: return 0
+        need = q * total
+        seen = 0
+        for value in sorted(counter):
+            seen += counter[value]
+            if seen >= need: return value
+        return value
+
+    @property
+    def moves(self):
+        return sum(self.combos.values())
+
+    @property
+    def clear_rate(self):
+        # Tỉ lệ nước đi xoá được ít nhất một dòng
+        moves = self.moves
+        return (moves - self.combos[0]) / moves if moves else 0.0
+
+    @property
+    def lines_per_move(self):
+        moves = self.moves
+        return sum(c * n for c, n in self.combos.items()) / moves if moves else 0.0
+
+    def stuck_rate(self, shape_id):
+        # Trong số lần khối này xuất hiện ở khay (= đặt + kẹt lúc hết ván), bao nhiêu lần bị kẹt
+        offered = self.placed[shape_id] + self.stuck[shape_id]
+        return self.stuck[shape_id] / offered if offered else 0.0
+
+    def summary(self):
+        return {
+            "games": self.games, "capped": self.capped, "moves": self.moves,
+            "score_mean": self.mean(self.scores),
+            "score_p10": self.quantile(self.scores, 0.1), "score_p50": self.quantile(self.scores, 0.5),
+            "score_p90": self.quantile(self.scores, 0.9), "score_max": max(self.scores, default=0),
+            "length_mean": self.mean(self.lengths), "length_p50": self.quantile(self.lengths, 0.5),
+            "clear_rate": self.clear_rate, "lines_per_move": self.lines_per_move,
+            "combos": dict(sorted(self.combos.items())),
+            "stuck_rate": [self.stuck_rate(k) for k in range(len(BLOCK_SHAPES))],
+        }
+
+
+def play_game(rules, policy_name, seed, stats):
+    game = GameState(rng=random.Random(seed), num_colors=rules.num_colors, size=rules.size,
+                     shape_weights=rules.shape_weights, line_bonus=rules.line_bonus, playable_tray=rules.playable_tray)
+    policy = POLICIES[policy_name](rules)
+    capped = False
+    while not game.is_game_over():
+        if game.moves_made >= rules.max_moves:
+            capped = True
+            break
+        slot, gx, gy = policy(game)
+        shape_id = game.tray[slot]["shape_id"]
+        stats.add_move(shape_id, game.place_block(slot, gx, gy))
+    stats.add_game(game, capped)
+    return game
+
+
+def run_task(task):
+    # Chạy trong process con: một lô ván liên tiếp, trả về stats của lô
+    stats = SelfPlayStats()
+    for i in range(task.start, task.start + task.count):
+        play_game(task.rules, task.policy, game_seed(task.seed, i), stats)
+    return stats
+
+
+def run_selfplay(games, rules=SelfPlayRules(), policy="random", seed=0, processes=None, chunk=None, progress=None):
+    # processes: số process (None = số nhân, 1 = chạy ngay trong process này);
+    # progress(stats): gọi sau mỗi lô với stats cộng dồn tới lúc đó
+    if policy not in POLICIES: raise ValueError(f"policy không hợp lệ: {policy}")
+    processes = processes or multiprocessing.cpu_count()
+    if chunk is None: chunk = max(1, min(500, games // (processes * 8)))
+    tasks = (SelfPlayTask(rules, policy, seed, start, min(chunk, games - start)) for start in range(0, games, chunk))
+    total = SelfPlayStats()
+    if processes == 1:
+        for task in tasks:
+            total.merge(run_task(task))
+            if progress is not None: progress(total)
+        return total
+    with multiprocessing.Pool(processes) as pool:
+        for stats in pool.imap_unordered(run_task, tasks):
+            total.merge(stats)
+            if progress is not None: progress(total)
+    return total
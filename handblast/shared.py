@@ -0,0 +1,336 @@
+# ---------------- Server tracking dùng chung qua shared memory ----------------
+# Ở sự kiện chạy nhiều cửa sổ game trên một máy nhiều nhân: mỗi cửa sổ tự mở camera và dựng
+# MediaPipe riêng. Với server (python tools/hand_server.py) thì:
+#   - mỗi camera một process của server: mở camera, dựng HandDetector + AdaptiveHandDetector,
+#     suy luận rồi publish sample mới nhất vào một LandmarkRing (shared memory, tên
+#     "<prefix>-cam<camera>"). Một process / camera chứ không chia frame của một camera cho
+#     nhiều process: graph MediaPipe và optical flow cần đủ các frame liên tiếp của camera đó.
+#     Các process chạy song song trên các nhân, nhiều cửa sổ đọc chung một camera
+#   - không có camera: process "replay" nhả lại landmark của file .hbr đúng nhịp lúc ghi
+#     (lặp lại khi hết), không cần cv2 / mediapipe
+#   - file game đặt HAND_SERVER = "<prefix>": SharedHandSource đọc ring thay vì tự mở camera
+# LandmarkRing: header + RING_SLOTS ô, mỗi ô một HandSample (seq, thời điểm chụp / suy luận,
+# có tay không, 21 điểm double; điểm không có là NaN). Một process ghi, nhiều process đọc,
+# không khoá: ghi seq = 0 -> ghi dữ liệu -> ghi seq -> header.latest = seq; bên đọc chép ô
+# header.latest chỉ tới rồi đọc lại seq của ô, lệch là ô vừa bị ghi đè -> đọc lại (seqlock).
+# captured_at / inferred_at là time.perf_counter() của process server: đồng hồ monotonic
+# chung cả máy (Linux CLOCK_MONOTONIC, Windows QueryPerformanceCounter) nên so được với
+# perf_counter() của game. heartbeat: server ghi mỗi vòng, cũ quá SERVER_TIMEOUT = server đã tắt.
+# Server chỉ tạo ring khi camera + model đã sẵn sàng (mở camera / probe / nạp model có thể mất
+# vài giây), nên ring đã có là heartbeat đang chạy; bên đọc chỉ coi là "ready" từ sample đầu tiên.
+# filtered (header): 1 = sample đã qua CursorFilter (server nhả lại file .hbr, vốn lưu sample đã
+# lọc), game không lọc lại; 0 = landmark thô từ camera như HandPipeline của chính cửa sổ.
+# Module này không import numpy ở mức module (file game import nó lúc khởi động).
+import math
+import os
+import re
+import signal
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+from handblast.pipeline import HandSample
+from handblast.replay import NUM_LANDMARKS
+
+MAGIC = b"HBS1"
+VERSION = 2 # 2: thêm filtered vào header
+RING_SLOTS = 16
+SERVER_TIMEOUT = 1.0 # giây không có heartbeat -> coi như server đã tắt
+ATTACH_INTERVAL = 0.5 # giây giữa hai lần thử nối lại khi chưa có server
+
+_dtypes = None
+
+
+def ring_dtypes():
+    global _dtypes
+    if _dtypes is None:
+        import numpy as np
+        header = np.dtype([("magic", "S4"), ("version", "<u4"), ("slots", "<u4"), ("points", "<u4"),
+                           ("latest", "<u8"), ("heartbeat", "<f8"), ("pid", "<u8"), ("filtered", "u1")], align=True)
+        slot = np.dtype([("seq", "<u8"), ("captured_at", "<f8"), ("inferred_at", "<f8"), ("hand", "u1"),
+                         ("points", "<f8", (NUM_LANDMARKS, 2))], align=True)
+        _dtypes = header, slot
+    return _dtypes
+
+
+def ring_name(prefix, camera):
+    # camera: index hoặc đường dẫn video như CAMERA của file game; tên shared memory không được có "/"
+    return f"{prefix}-cam" + re.sub(r"[^0-9A-Za-z_.-]", "_", str(camera))[-200:]
+
+
+class LandmarkRing:
+    # create(): process ghi (server), attach(): process đọc (game). Tự dùng `with` hoặc close()
+    def __init__(self, shm, owner):
+        import numpy as np
+        header_dtype, slot_dtype = ring_dtypes()
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((1,), header_dtype, shm.buf)
+        slots = int(self.header["slots"][0]) if not owner else (shm.size - header_dtype.itemsize) // slot_dtype.itemsize
+        self.slots = np.ndarray((slots,), slot_dtype, shm.buf, header_dtype.itemsize)
+        self._seq = int(self.header["latest"][0])
+
+    @classmethod
+    def create(cls, name, slots=RING_SLOTS, filtered=False):
+        header_dtype, slot_dtype = ring_dtypes()
+        size = header_dtype.itemsize + slots * slot_dtype.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Còn sót từ server bị kill: xoá rồi tạo lại (game đang nối vào bản cũ sẽ thấy heartbeat dừng)
+            old = shared_memory.SharedMemory(name)
+            old.close()
+            old.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        ring = cls(shm, True)
+        ring.header[0] = (MAGIC, VERSION, slots, NUM_LANDMARKS, 0, time.perf_counter(), os.getpid(), filtered)
+        ring.slots["seq"] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, untrack=True):
+        # FileNotFoundError nếu chưa có server, ValueError nếu không phải ring của bản này
+        shm = shared_memory.SharedMemory(name)
+        # Python < 3.13 đăng ký cả segment chỉ mở để đọc với resource_tracker, rồi unlink nó
+        # khi process đọc thoát -> gỡ đăng ký, chỉ server mới xoá. Process cha của server dùng
+        # chung resource_tracker với process tạo ring nên không gỡ (untrack=False)
+        if untrack: resource_tracker.unregister(shm._name, "shared_memory")
+        ring = cls(shm, False)
+        header = ring.header[0].copy()
+        if bytes(header["magic"]) != MAGIC or int(header["version"]) != VERSION or int(header["points"]) != NUM_LANDMARKS:
+            ring.close()
+            raise ValueError(f"{name}: không phải ring landmark (HBS1, version {VERSION})")
+        return ring
+
+    def publish(self, sample):
+        # Chỉ process tạo ring gọi; trả về seq của sample trong ring
+        self._seq += 1
+        seq = self._seq
+        slots = self.slots
+        i = seq % len(slots)
+        slots["seq"][i] = 0
+        slots["captured_at"][i] = sample.captured_at
+        slots["inferred_at"][i] = sample.inferred_at
+        points = sample.points
+        slots["hand"][i] = points is not None
+        if points is not None:
+            slots["points"][i] = [p if p is not None else (math.nan, math.nan) for p in points]
+        slots["seq"][i] = seq
+        self.header["latest"][0] = seq
+        self.beat()
+        return seq
+
+    def beat(self):
+        self.header["heartbeat"][0] = time.perf_counter()
+
+    @property
+    def latest_seq(self):
+        return int(self.header["latest"][0])
+
+    @property
+    def heartbeat(self):
+        return float(self.header["heartbeat"][0])
+
+    @property
+    def filtered(self):
+        return bool(self.header["filtered"][0])
+
+    def read(self, newer_than=0):
+        # HandSample mới nhất (seq = seq trong ring) nếu mới hơn `newer_than`, không thì None
+        slots = self.slots
+        for _ in range(4):
+            seq = int(self.header["latest"][0])
+            if seq <= newer_than: return None
+            i = seq % len(slots)
+            slot = slots[i].copy()
+            if int(slot["seq"]) != seq or int(slots["seq"][i]) != seq: continue # đang bị ghi đè
+            points = None
+            if slot["hand"]:
+                points = tuple(None if x != x else (x, y) for x, y in slot["points"].tolist())
+            return HandSample(seq, float(slot["captured_at"]), float(slot["inferred_at"]), points)
+        return None
+
+    def close(self):
+        self.header = self.slots = None # giải phóng view trước khi đóng buffer
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SharedHandSource:
+    # Dùng như BackgroundHandPipeline (start / latest / throttle / stop / status) nhưng đọc
+    # LandmarkRing của server. Chưa có server thì latest() trả None, status báo chờ và cứ
+    # ATTACH_INTERVAL giây thử nối lại; server tắt (heartbeat cũ) thì thả ring, chờ server mới.
+    def __init__(self, prefix, camera, timer=None):
+        self.name = ring_name(prefix, camera)
+        self.timer = timer
+        self.ring = None
+        self.tracker = None # suy luận ở server, không có số liệu infer / track tại chỗ
+        self.hand_event = None # không có thread nền để đánh thức: chế độ idle ngủ theo idle_fps
+        self.status = "Waiting for hand server..."
+        self.error = None
+        self.filtered = False # theo header ring của server (file game không lọc lại khi True)
+        self.samples = 0
+        self.reconnects = 0
+        self._fresh = False # vừa nối vào ring, chưa nhận sample nào
+        self._seq = 0
+        self._latest = None
+        self._next_attach = 0.0
+
+    def start(self):
+        self._attach()
+        return self
+
+    def _attach(self):
+        self._next_attach = time.perf_counter() + ATTACH_INTERVAL
+        try:
+            ring = LandmarkRing.attach(self.name)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            self.error = self.status = f"Hand server: {e}"
+            return
+        if time.perf_counter() - ring.heartbeat > SERVER_TIMEOUT:
+            # Segment còn sót của server đã chết (bị kill trước khi kịp xoá): chờ server mới
+            ring.close()
+            return
+        self.ring = ring
+        # Chỉ nhận sample publish sau khi nối: sample cũ còn trong ring không tính là "ready"
+        self._seq = ring.latest_seq
+        self._fresh = True
+        self.filtered = ring.filtered
+
+    def latest(self):
+        ring = self.ring
+        if ring is None:
+            if time.perf_counter() >= self._next_attach: self._attach()
+            return self._latest
+        sample = ring.read(self._seq)
+        if sample is not None:
+            if self._fresh:
+                # Sample đầu tiên từ ring vừa nối: lúc này mới là "ready"
+                self._fresh = False
+                self.reconnects += self.samples > 0
+                self.status = None
+                if self.timer is not None: self.timer.mark("ready")
+            self._seq = sample.seq
+            self.samples += 1
+            self._latest = sample
+        elif time.perf_counter() - ring.heartbeat > SERVER_TIMEOUT:
+            ring.close()
+            self.ring = None
+            self.status = "Hand server stopped"
+            self._latest = None
+        return self._latest
+
+    def throttle(self, idle_interval):
+        # Server dùng chung cho nhiều cửa sổ nên tự giảm tần số suy luận (--power của server)
+        pass
+
+    def capture_report(self):
+        return f"server {self.name}: {self.samples} sample, nối lại {self.reconnects} lần"
+
+    def stop(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+# ---------------- Phía server: mỗi nguồn một process ----------------
+# inference / schedule / capture: như INFERENCE_MODE / INFERENCE_SCHEDULE / CAPTURE của file game;
+# width / height / dist_threshold / release_threshold: bố cục lập lịch optical flow dùng để đổi
+# khoảng cách sang px (như file game v2); power: tên trong POWER_PRESETS - không thấy tay quá
+# idle_after giây thì detect thưa lại theo idle_detect_interval, như worker của game ở chế độ idle
+ServerConfig = namedtuple("ServerConfig", "inference schedule capture capture_cache width height dist_threshold release_threshold power",
+                          defaults=("single", "balanced", "auto", "capture.json", 1080, 720, 40, 50, "balanced"))
+
+
+def publish_camera(name, camera, config, stop):
+    from handblast.capture import CAPTURE_PRESETS, open_auto, open_capture
+    from handblast.control import ControlLayout
+    from handblast.inference import HandDetector, INFERENCE_PRESETS
+    from handblast.pipeline import LatestFrameGrabber
+    from handblast.power import POWER_PRESETS
+    from handblast.tracking import AdaptiveHandDetector, SCHEDULE_PRESETS
+    import numpy as np
+
+    # Mở camera + dựng model trước, rồi mới tạo ring: game nối vào là có heartbeat ngay
+    if config.capture == "auto":
+        cap = open_auto(camera, config.capture_cache)[0]
+    else:
+        cap = open_capture(camera, CAPTURE_PRESETS[config.capture])
+    if not cap.isOpened(): raise RuntimeError(f"Camera {camera!r} không mở được")
+    layout = ControlLayout(config.width, config.height, 0, 0, 1, 0, 0, 0, 0, 0, config.dist_threshold, config.release_threshold)
+    detector = HandDetector(INFERENCE_PRESETS[config.inference])
+    grabber = None
+    try:
+        # MediaPipe nạp model ở lần process đầu (như BackgroundHandPipeline)
+        detector(np.zeros((240, 320, 3), np.uint8))
+        detector.reset()
+        tracker = AdaptiveHandDetector(detector, layout, SCHEDULE_PRESETS[config.schedule])
+        power = POWER_PRESETS[config.power]
+        if stop.is_set(): return
+        with LandmarkRing.create(name) as ring:
+            grabber = LatestFrameGrabber(cap)
+            grabber.start()
+            seq = 0
+            last_hand = time.perf_counter()
+            while not stop.is_set():
+                ring.beat()
+                item = grabber.wait_newer(seq)
+                if item is None:
+                    if grabber.error is not None: raise RuntimeError(grabber.error)
+                    continue
+                seq, captured_at, frame = item
+                t0 = time.perf_counter()
+                points = tracker(frame)
+                t1 = time.perf_counter()
+                ring.publish(HandSample(seq, captured_at, t1, points))
+                if points is not None: last_hand = t1
+                elif t1 - last_hand > power.idle_after and power.idle_detect_interval > 0:
+                    stop.wait(power.idle_detect_interval - (t1 - t0))
+    finally:
+        if grabber is not None:
+            grabber.stop()
+            grabber.join(timeout=1.0)
+        detector.close()
+        cap.release()
+
+
+def publish_replay(name, recording, stop, speed=1.0):
+    # Nhả lại bản ghi đúng nhịp (chia speed), hết thì lặp lại từ đầu với thời điểm mới.
+    # Bản ghi lưu sample đã lọc -> ring đánh dấu filtered
+    with LandmarkRing.create(name, filtered=True) as ring:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            for sample, _ in recording.samples():
+                due = t0 + sample.captured_at / speed
+                while not stop.is_set():
+                    ring.beat()
+                    remaining = due - time.perf_counter()
+                    if remaining <= 0 or stop.wait(min(remaining, SERVER_TIMEOUT / 4)): break
+                if stop.is_set(): return
+                ring.publish(sample._replace(captured_at=due, inferred_at=time.perf_counter()))
+            if not len(recording): stop.wait(SERVER_TIMEOUT / 4)
+
+
+def run_publisher(prefix, camera, config, stop, replay=None, speed=1.0):
+    # Hàm chạy trong process con của server: replay = đường dẫn .hbr thì không mở camera.
+    # SIGTERM gửi thẳng tới process con (cả nhóm process bị kill, terminate()) cũng thoát như
+    # stop: ring được đóng + xoá thay vì để sót shared memory
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    name = ring_name(prefix, camera)
+    try:
+        if replay is None:
+            publish_camera(name, camera, config, stop)
+        else:
+            from handblast.replay import Recording
+            publish_replay(name, Recording.load(replay), stop, speed)
+    except KeyboardInterrupt:
+        pass
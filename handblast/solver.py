@@ -0,0 +1,127 @@
+# ---------------- Gợi ý nước đi ("best move") ----------------
+# Duyệt mọi thứ tự + mọi vị trí đặt các khối còn lại trong khay theo đúng luật đặt / xoá
+# dòng / tính điểm của engine, trả về chuỗi nước đi tốt nhất theo hàm đánh giá cấu hình được.
+#   - Bảng chuyển vị (transposition cache) theo (bitboard, các khối còn lại, độ sâu):
+#     đặt A rồi B hay B rồi A ra cùng lưới chỉ tính một lần. `cache` truyền vào giữ một bảng
+#     riêng cho mỗi (cạnh lưới, line_bonus, trọng số đánh giá), nên dùng chung một dict cho
+#     nhiều kiểu tìm khác nhau vẫn không lẫn giá trị
+#   - Tìm sâu dần (iterative deepening) 1, 2, 3 khối; search là generator, mỗi lần
+#     step(budget) chỉ chạy trong `budget` giây rồi trả quyền lại cho vòng lặp vẽ.
+#     Hết giờ thì dùng kết quả của độ sâu đã xong gần nhất, frame sau chạy tiếp.
+# Chỉ dùng bitboard (màu không ảnh hưởng điểm), không phụ thuộc pygame.
+import time
+
+from handblast.engine import GRID_SIZE, geometry, clear_touched_lines, placement_score
+
+# Trọng số đánh giá: score = điểm ăn được trên đường đi, empty = số ô trống cuối cùng,
+# open_lines = số hàng + cột hoàn toàn trống cuối cùng
+EVALUATIONS = {
+    "score": {"score": 1.0},
+    "empty": {"empty": 1.0},
+    "open_lines": {"open_lines": 1.0},
+    "balanced": {"score": 1.0, "empty": 0.25, "open_lines": 2.0},
+}
+# Không đặt hết được các khối còn lại = sắp thua: trừ thật nặng cho mỗi khối bị kẹt
+STUCK_PENALTY = 1000.0
+CACHE_LIMIT = 200000
+
+
+def _leaf_value(occ, weights, geo):
+    value = 0.0
+    w = weights.get("empty")
+    if w: value += w * (geo.cells - occ.bit_count())
+    w = weights.get("open_lines")
+    if w: value += w * sum(1 for m in geo.line_masks if not occ & m)
+    return value
+
+
+class HintSearch:
+    def __init__(self, occupied, tray, evaluation="balanced", cache=None, size=GRID_SIZE, line_bonus=None):
+        # tray: danh sách block (dict có "shape_id") hoặc None như GameState.tray
+        # cache: dict dùng chung giữa các lần tìm (bảng riêng theo lưới / line_bonus / đánh giá)
+        self.occupied = occupied
+        self.geo = geometry(size)
+        self.line_bonus = line_bonus # như GameState.line_bonus
+        self.slots = [(i, b["shape_id"]) for i, b in enumerate(tray) if b is not None]
+        self.weights = EVALUATIONS[evaluation] if isinstance(evaluation, str) else evaluation
+        context = (size, line_bonus, tuple(sorted(self.weights.items())))
+        self.cache = (cache if cache is not None else {}).setdefault(context, {})
+        self.best = None        # (giá trị, [(slot, gx, gy), ...]) của độ sâu đã xong gần nhất
+        self.depth_done = 0
+        self.nodes = 0
+        self.done = not self.slots
+        self._gen = self._deepen()
+
+    def step(self, budget):
+        # Chạy tiếp tối đa `budget` giây; trả về self.best
+        if self.done: return self.best
+        deadline = time.perf_counter() + budget
+        for _ in self._gen:
+            if time.perf_counter() >= deadline: break
+        return self.best
+
+    def first_move(self):
+        return self.best[1][0] if self.best and self.best[1] else None
+
+    def _deepen(self):
+        shapes = tuple(sorted(s for _, s in self.slots))
+        for depth in range(1, len(shapes) + 1):
+            value, seq = yield from self._search(self.occupied, shapes, depth)
+            self.best = (value, self._to_slots(seq))
+            self.depth_done = depth
+        self.done = True
+
+    def _to_slots(self, seq):
+        # Chuỗi nước theo shape_id -> theo ô khay (khối trùng hình thì lấy ô trống đầu tiên)
+        free = list(self.slots)
+        result = []
+        for shape_id, anchor in seq:
+            for k, (slot, s) in enumerate(free):
+                if s == shape_id:
+                    result.append((slot, anchor % self.geo.size, anchor // self.geo.size))
+                    del free[k]
+                    break
+        return result
+
+    def _search(self, occ, shapes, depth):
+        key = (occ, shapes, depth)
+        hit = self.cache.get(key)
+        if hit is not None: return hit
+
+        # Mỗi node trong (không tính lá) nhường lại một lần để step() kiểm tra đồng hồ
+        self.nodes += 1
+        yield
+
+        if depth == 0 or not shapes:
+            result = (_leaf_value(occ, self.weights, self.geo), ())
+        else:
+            w_score = self.weights.get("score", 0.0)
+            best_value = None
+            best_seq = ()
+            tried = set()
+            for k, shape_id in enumerate(shapes):
+                if shape_id in tried: continue # khối trùng hình: cùng kết quả
+                tried.add(shape_id)
+                rest = shapes[:k] + shapes[k + 1:]
+                for bit, m, lines in self.geo.valid_placements[shape_id]:
+                    if occ & m: continue
+                    after, _, combo = clear_touched_lines(occ | m, lines)
+                    gain = w_score * placement_score(m.bit_count(), combo, self.geo.size, self.line_bonus)
+                    if depth == 1:
+                        # Lá: đánh giá tại chỗ, không tạo generator / không ghi cache
+                        value, seq = _leaf_value(after, self.weights, self.geo), ()
+                    else:
+                        value, seq = yield from self._search(after, rest, depth - 1)
+                    value += gain
+                    if best_value is None or value > best_value:
+                        best_value = value
+                        best_seq = ((shape_id, bit.bit_length() - 1),) + seq
+            if best_value is None:
+                # Kẹt: không đặt được khối nào nữa
+                result = (_leaf_value(occ, self.weights, self.geo) - STUCK_PENALTY * len(shapes), ())
+            else:
+                result = (best_value, best_seq)
+
+        if len(self.cache) >= CACHE_LIMIT: self.cache.clear()
+        self.cache[key] = result
+        return result
@@ -0,0 +1,32 @@
+# ---------------- Atlas sprite cho các ô khối ----------------
+# Mỗi bộ (index màu, kích thước, viền highlight) chỉ được vẽ bằng primitive MỘT lần vào
+# một Surface riêng; sau đó vẽ một ô khối chỉ còn là một lần blit.
+import pygame
+
+
+class BlockAtlas:
+    def __init__(self, render, colors):
+        # render(surface, color, size, highlight): vẽ ô khối tại (0, 0), highlight = màu viền hoặc None
+        self.render = render
+        self.colors = colors
+        self._sprites = {}
+
+    def get(self, color_index, size, highlight=None):
+        key = (color_index, size, highlight)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+            sprite.fill((0, 0, 0, 0))
+            self.render(sprite, self.colors[color_index], size, highlight)
+            self._sprites[key] = sprite
+        return sprite
+
+    def warm(self, sizes, highlights=(None,)):
+        # Vẽ sẵn lúc khởi động để frame đầu tiên không bị giật
+        for size in sizes:
+            for highlight in highlights:
+                for i in range(len(self.colors)):
+                    self.get(i, size, highlight)
+
+    def __len__(self):
+        return len(self._sprites)
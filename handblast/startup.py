@@ -0,0 +1,159 @@
+# ---------------- Khởi động theo giai đoạn ----------------
+# Trước đây file game import cv2 + mediapipe, dựng mp.solutions.hands.Hands và chờ
+# cv2.VideoCapture(0) trước khi vẽ frame đầu: vài giây cửa sổ đen. Ở đây:
+#   - BackgroundHandPipeline: thread nền import cv2 / mediapipe, dựng HandDetector và chạy thử
+#     một frame (MediaPipe nạp model ở lần process đầu), song song với việc mở camera; xong
+#     thì khởi động HandPipeline. Trong lúc đó latest() trả None, `status` là dòng chữ cho màn
+#     hình chờ (tiếng Anh như phần còn lại của giao diện, font game không có dấu tiếng Việt)
+#   - Camera mở theo CAPTURE_PRESETS (handblast.capture); "auto" = lấy cấu hình đã chọn lần
+#     trước trong cache, chưa có thì probe các ứng viên (chạy song song với việc nạp model)
+#   - StartupTimer: ghi mốc thời gian (giây kể từ lúc chạy file) của từng giai đoạn:
+#     window, first_frame, model, camera, ready, first_hand
+# Module này không import cv2 / mediapipe / numpy ở mức module.
+import sys
+import threading
+import time
+import traceback
+
+from handblast.pipeline import HandPipeline
+
+
+class StartupTimer:
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks = {}
+
+    def mark(self, name):
+        # Chỉ ghi lần đầu; trả True nếu vừa ghi
+        if name in self.marks: return False
+        self.marks[name] = time.perf_counter() - self.t0
+        return True
+
+    def report(self):
+        return ", ".join(f"{name} {t:.2f}s" for name, t in sorted(self.marks.items(), key=lambda item: item[1]))
+
+
+class BackgroundHandPipeline:
+    # Dùng như HandPipeline (start / latest / stop); grabber, worker, tracker có khi ready
+    def __init__(self, camera, inference_mode, schedule, layout, timer=None, capture="default", capture_cache=None):
+        self.camera = camera # index camera hoặc đường dẫn video, như cv2.VideoCapture
+        self.capture = capture # tên trong CAPTURE_PRESETS hoặc "auto"
+        self.capture_cache = capture_cache
+        self.probe_results = [] # ProbeResult khi "auto" vừa probe
+        self.negotiated = None # describe(negotiated(cap)) lúc camera vừa mở (cap.release() xong thì không đọc lại được)
+        self.inference_mode = inference_mode
+        self.schedule = schedule
+        self.layout = layout
+        self.timer = timer if timer is not None else StartupTimer()
+        self.status = "Starting..."
+        self.error = None
+        self.cap = None
+        self._camera_error = None # exception của _open_camera (chạy trên thread riêng)
+        self.detector = None
+        self.tracker = None
+        self._pipeline = None
+        self._idle_interval = 0.0
+        self.hand_event = threading.Event() # dùng chung với HandPipeline khi ready
+        self.filtered = False # landmark thô: file game chạy CursorFilter
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="hand-startup", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _open_camera(self):
+        # Lỗi (probe, ghi cache...) giữ lại để _start_pipeline báo sau khi join
+        try:
+            from handblast.capture import CAPTURE_PRESETS, describe, negotiated, open_auto, open_capture
+            if self.capture == "auto":
+                self.cap, self.capture, self.probe_results = open_auto(self.camera, self.capture_cache)
+            else:
+                self.cap = open_capture(self.camera, CAPTURE_PRESETS[self.capture])
+            if self.cap.isOpened(): self.negotiated = describe(negotiated(self.cap))
+        except Exception as e:
+            self._camera_error = e
+            return
+        self.timer.mark("camera")
+
+    def _run(self):
+        try:
+            self._start_pipeline()
+        except Exception as e:
+            self.error = f"Startup failed: {e}"
+            self.status = self.error
+            raise
+
+    def _start_pipeline(self):
+        # Camera (có máy mất 1-2s) mở trên thread riêng, song song với việc nạp model
+        camera_thread = threading.Thread(target=self._open_camera, name="camera-open", daemon=True)
+        camera_thread.start()
+
+        self.status = "Loading hand tracking..."
+        import numpy as np
+        from handblast.inference import HandDetector, INFERENCE_PRESETS
+        from handblast.tracking import AdaptiveHandDetector, SCHEDULE_PRESETS
+        self.detector = HandDetector(INFERENCE_PRESETS[self.inference_mode])
+        self.detector(np.zeros((240, 320, 3), np.uint8))
+        self.detector.reset()
+        self.timer.mark("model")
+
+        self.status = "Opening camera..."
+        camera_thread.join()
+        if self._camera_error is not None:
+            self.error = f"Camera {self.camera!r} failed: {self._camera_error}"
+            self.status = self.error
+            print(self.error, file=sys.stderr)
+            traceback.print_exception(self._camera_error)
+            return
+        if not self.cap.isOpened():
+            self.error = f"Camera {self.camera!r} not available"
+            self.status = self.error
+            print(self.error, file=sys.stderr)
+            return
+        if self._stopping: return
+        self.tracker = AdaptiveHandDetector(self.detector, self.layout, SCHEDULE_PRESETS[self.schedule])
+        self._pipeline = HandPipeline(self.cap, self.tracker, self.hand_event)
+        self._pipeline.throttle(self._idle_interval)
+        self._pipeline.start()
+        self.timer.mark("ready")
+        self.status = None
+
+    def capture_report(self):
+        # Gọi được cả sau stop(): dùng cấu hình đã đọc lúc camera vừa mở
+        if self.negotiated is None: return f"{self.capture} (chưa mở)"
+        probed = f", probe {len(self.probe_results)} cấu hình" if self.probe_results else ""
+        return f"{self.capture}: {self.negotiated}{probed}"
+
+    @property
+    def ready(self):
+        return self._pipeline is not None
+
+    @property
+    def grabber(self):
+        return self._pipeline.grabber
+
+    @property
+    def worker(self):
+        return self._pipeline.worker
+
+    def latest(self):
+        pipeline = self._pipeline
+        if pipeline is None: return None
+        if pipeline.error is not None and self.error is None:
+            # Thread camera / suy luận đã dừng vì lỗi: hiện lên màn hình thay cho con trỏ đứng im
+            self.error = self.status = pipeline.error
+        return pipeline.latest()
+
+    def throttle(self, idle_interval):
+        self._idle_interval = idle_interval
+        pipeline = self._pipeline
+        if pipeline is not None: pipeline.throttle(idle_interval)
+
+    def stop(self):
+        # Thoát khi đang tải: chờ thread khởi động xong bước đang dở (không ngắt được import / dựng graph)
+        self._stopping = True
+        self._thread.join()
+        if self._pipeline is not None: self._pipeline.stop()
+        if self.detector is not None: self.detector.close()
+        if self.cap is not None: self.cap.release()
@@ -0,0 +1,150 @@
+# ---------------- Lưu kỷ lục + bảng xếp hạng, không chặn vòng lặp vẽ ----------------
+# Trước đây place_block() mở và ghi đè highscore.txt ngay trong frame, mỗi lần đặt khối khi
+# đã vượt kỷ lục; chết giữa lúc ghi có thể để lại file rỗng. Ở đây:
+#   - write_atomic: ghi file tạm cùng thư mục, fsync, rồi os.replace (file cũ hoặc mới, không nửa vời)
+#   - ScoreWriter: thread nền nhận yêu cầu ghi; nhiều lần submit_high_score liên tiếp chỉ ghi
+#     giá trị mới nhất (gộp), vòng lặp vẽ chỉ gán biến + notify
+#   - Leaderboard: SQLite các ván đã chơi (điểm, thời lượng, số nước, thời điểm), có index
+#     theo điểm để lấy top N không phải quét cả bảng
+# Dùng chung cho v1 và v2; không import pygame / cv2.
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# duration: giây, played_at: time.time() lúc ván kết thúc
+Session = namedtuple("Session", "score duration moves played_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    moves INTEGER NOT NULL,
+    played_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_score ON sessions (score DESC, played_at);
+"""
+
+
+def read_high_score(path):
+    # Chưa có file = 0; file hỏng / không đọc được thì báo ra stderr (không nuốt lỗi im lặng) và dùng 0
+    try:
+        with open(path, "r") as f:
+            return int(f.read())
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Không đọc được kỷ lục từ {path}: {e}", file=sys.stderr)
+        return 0
+
+
+def write_atomic(path, text):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Leaderboard:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL: đọc (top) không chặn ghi, mỗi commit chỉ nối vào log
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def add_many(self, sessions):
+        with self.conn:
+            self.conn.executemany("INSERT INTO sessions (score, duration, moves, played_at) VALUES (?, ?, ?, ?)", sessions)
+
+    def add(self, session):
+        self.add_many((session,))
+
+    def top(self, n=10):
+        # Điểm cao trước, bằng điểm thì ván sớm hơn trước (đi theo index sessions_by_score)
+        rows = self.conn.execute("SELECT score, duration, moves, played_at FROM sessions ORDER BY score DESC, played_at LIMIT ?", (n,))
+        return [Session(*row) for row in rows]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class ScoreWriter(threading.Thread):
+    # leaderboard_path = None: chỉ ghi kỷ lục
+    def __init__(self, highscore_path, leaderboard_path=None):
+        super().__init__(name="score-writer", daemon=True)
+        self.highscore_path = highscore_path
+        self.leaderboard_path = leaderboard_path
+        self._cond = threading.Condition()
+        self._high_score = None # giá trị chờ ghi (chỉ giữ cái mới nhất)
+        self._sessions = []
+        self._closing = False
+        self.high_score_requests = 0
+        self.high_score_writes = 0
+        self.sessions_written = 0
+
+    def start(self):
+        super().start()
+        return self
+
+    def submit_high_score(self, score):
+        with self._cond:
+            self._high_score = score
+            self.high_score_requests += 1
+            self._cond.notify()
+
+    def submit_session(self, session):
+        with self._cond:
+            self._sessions.append(session)
+            self._cond.notify()
+
+    def run(self):
+        # Kết nối SQLite phải tạo và dùng trên cùng thread
+        leaderboard = None
+        if self.leaderboard_path:
+            try:
+                leaderboard = Leaderboard(self.leaderboard_path)
+            except sqlite3.Error as e:
+                print(f"Không mở được bảng xếp hạng {self.leaderboard_path}: {e}", file=sys.stderr)
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closing or self._high_score is not None or self._sessions)
+                high_score, self._high_score = self._high_score, None
+                sessions, self._sessions = self._sessions, []
+                closing = self._closing
+            # Lỗi ghi đĩa không được làm chết thread: báo ra stderr, lần sau thử lại với giá trị mới
+            if high_score is not None:
+                try:
+                    write_atomic(self.highscore_path, str(high_score))
+                    self.high_score_writes += 1
+                except OSError as e:
+                    print(f"Không ghi được kỷ lục vào {self.highscore_path}: {e}", file=sys.stderr)
+            if sessions and leaderboard is not None:
+                try:
+                    leaderboard.add_many(sessions)
+                    self.sessions_written += len(sessions)
+                except sqlite3.Error as e:
+                    print(f"Không ghi được {len(sessions)} ván vào {self.leaderboard_path}: {e}", file=sys.stderr)
+            if closing: break # mọi thứ gửi trước close() đã được lấy ra ở trên
+        if leaderboard is not None: leaderboard.close()
+
+    def close(self, timeout=5.0):
+        # Ghi nốt những gì còn chờ rồi dừng thread
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self.join(timeout)
+
+
+def session_from_game(game, started_at):
+    # started_at: time.perf_counter() lúc bắt đầu ván
+    return Session(game.score, time.perf_counter() - started_at, game.moves_made, time.time())
@@ -0,0 +1,28 @@
+# ---------------- Pool Surface dùng lại giữa các frame ----------------
+# Thay cho pygame.Surface(...) tạo mới mỗi frame (khối đang kéo, lớp phủ Game Over).
+# Mỗi (kích thước, flags) chỉ cấp phát một lần; `allocations` / `bytes_allocated` đếm
+# số lần cấp phát thật sự để kiểm chứng rằng lúc chạy ổn định không còn cấp phát mới.
+import pygame
+
+
+class SurfacePool:
+    def __init__(self):
+        self._surfaces = {}
+        self.allocations = 0
+        self.bytes_allocated = 0
+        self.requests = 0
+
+    def get(self, size, flags=0):
+        # Trả về Surface dùng chung: nội dung cũ vẫn còn, người gọi tự fill lại
+        self.requests += 1
+        key = (int(size[0]), int(size[1]), flags)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(key[:2], flags)
+            self._surfaces[key] = surface
+            self.allocations += 1
+            self.bytes_allocated += key[0] * key[1] * surface.get_bytesize()
+        return surface
+
+    def stats(self):
+        return f"{self.allocations} lần cấp phát ({self.bytes_allocated / 1024:.0f} KB) / {self.requests} lần lấy"
@@ -0,0 +1,115 @@
+# ---------------- Lập lịch suy luận: MediaPipe khi cần, optical flow ở giữa ----------------
+# hands.process() là việc tốn nhất của game. AdaptiveHandDetector bọc một hàm detect(frame)
+# (thường là HandDetector) và chỉ gọi nó khi cần:
+#   - chưa thấy tay / vừa mất dấu
+#   - tay di chuyển nhanh (ngón trỏ dời quá max_motion px màn hình trong một frame)
+#   - sắp đổi trạng thái véo (khoảng cách hai ngón cách ngưỡng véo / thả dưới pinch_margin px)
+#   - optical flow không tin được (status = 0, sai số tiến-lùi quá max_fb_error px)
+#   - đã bám liên tiếp max_tracked frame: sàn tần số suy luận = fps camera / (max_tracked + 1)
+# Các frame còn lại chỉ bám ngón trỏ + ngón cái bằng cv2.calcOpticalFlowPyrLK trên ảnh xám
+# thu nhỏ (scale), các landmark khác dời theo độ dời trung bình của hai điểm đó.
+# Trả về cùng dạng với HandDetector (21 điểm chuẩn hoá, đã lật gương) nên dùng thẳng làm
+# `detect` của HandPipeline. Toạ độ "px màn hình" tính theo ControlLayout như HandController.
+# [BUFFER] Ảnh thu nhỏ, ảnh xám và hai ảnh xám đã lật (frame này / frame trước) ghi vào bộ
+# đệm dùng lại giữa các frame. Ảnh nhỏ này vẫn lật pixel (rẻ, không cấp phát): pyramid của
+# optical flow trên ảnh lật không đối xứng với ảnh gốc, lật toạ độ thay thì điểm bám lệch
+# tới vài px so với trước.
+import math
+from collections import Counter, namedtuple
+
+import cv2
+import numpy as np
+
+from handblast.control import INDEX_TIP, THUMB_TIP
+
+ScheduleConfig = namedtuple("ScheduleConfig", "max_tracked max_motion pinch_margin max_fb_error scale",
+                            defaults=(2, 25.0, 12.0, 1.0, 0.5))
+
+# "always" = suy luận mọi frame (như cũ), các preset sau bám nhiều frame hơn
+SCHEDULE_PRESETS = {
+    "always": ScheduleConfig(max_tracked=0),
+    "balanced": ScheduleConfig(),
+    "saver": ScheduleConfig(max_tracked=5, max_motion=40.0, pinch_margin=8.0, max_fb_error=1.5),
+}
+
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2, criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+TRACKED_POINTS = (INDEX_TIP, THUMB_TIP)
+
+
+class AdaptiveHandDetector:
+    def __init__(self, detect, layout, config=ScheduleConfig()):
+        self.detect = detect
+        self.layout = layout
+        self.config = config
+        self.frames_inferred = 0
+        self.frames_tracked = 0
+        self.reasons = Counter() # lý do -> số lần phải suy luận
+        self.last_inferred = True # frame gần nhất có chạy detect không (cho FrameProfiler)
+        self._small = None
+        self._gray_buf = None
+        self._spare = None # bộ đệm ảnh lật sẽ ghi ở frame kế tiếp (khác _prev)
+        self.reset()
+
+    def reset(self):
+        self._prev = None # ảnh xám thu nhỏ (đã lật) của frame trước
+        self._points = None # kết quả của frame trước
+        self._tracked_run = 0
+        self._reason = "no-hand" # lý do suy luận ở frame kế tiếp, None = được bám
+
+    def _gray(self, frame):
+        s = self.config.scale
+        if s != 1.0:
+            frame = self._small = cv2.resize(frame, None, self._small, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        self._gray_buf = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, self._gray_buf)
+        return cv2.flip(self._gray_buf, 1, self._spare)
+
+    def _screen_dist(self, a, b):
+        return math.hypot((a[0] - b[0]) * self.layout.width, (a[1] - b[1]) * self.layout.height)
+
+    def _track(self, gray):
+        h, w = gray.shape
+        p0 = np.array([[self._points[i][0] * w, self._points[i][1] * h] for i in TRACKED_POINTS], dtype=np.float32).reshape(-1, 1, 2)
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(self._prev, gray, p0, None, **LK_PARAMS)
+        # Kiểm tra tiến-lùi: bám ngược từ frame này về frame trước phải ra gần điểm cũ
+        back, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev, p1, None, **LK_PARAMS)
+        if not (st.all() and st_back.all()): return None
+        if np.abs(back - p0).reshape(-1, 2).max() > self.config.max_fb_error: return None
+        moved = {i: (float(p[0][0]) / w, float(p[0][1]) / h) for i, p in zip(TRACKED_POINTS, p1)}
+        if not all(0.0 <= x <= 1.0 and 0.0 <= y <= 1.0 for x, y in moved.values()): return None
+        dx = sum(moved[i][0] - self._points[i][0] for i in TRACKED_POINTS) / len(TRACKED_POINTS)
+        dy = sum(moved[i][1] - self._points[i][1] for i in TRACKED_POINTS) / len(TRACKED_POINTS)
+        return tuple(moved.get(i, (x + dx, y + dy)) for i, (x, y) in enumerate(self._points))
+
+    def _next_reason(self, points):
+        # Quyết định (từ kết quả frame này) frame sau có phải suy luận không
+        config = self.config
+        if points is None: return "no-hand"
+        if self._tracked_run >= config.max_tracked: return "floor"
+        if self._points is not None and self._screen_dist(points[INDEX_TIP], self._points[INDEX_TIP]) > config.max_motion:
+            return "motion"
+        dist = self._screen_dist(points[INDEX_TIP], points[THUMB_TIP])
+        release = self.layout.release_threshold or self.layout.dist_threshold
+        if min(abs(dist - self.layout.dist_threshold), abs(dist - release)) < config.pinch_margin: return "pinch"
+        return None
+
+    def __call__(self, frame):
+        gray = self._gray(frame)
+        reason = self._reason
+        points = None
+        if reason is None:
+            points = self._track(gray)
+            if points is None: reason = "lost"
+        if points is None:
+            points = self.detect(frame)
+            self.frames_inferred += 1
+            self.reasons[reason] += 1
+            self._tracked_run = 0
+            self.last_inferred = True
+        else:
+            self.frames_tracked += 1
+            self._tracked_run += 1
+            self.last_inferred = False
+        self._reason = self._next_reason(points)
+        self._spare, self._prev = self._prev, gray
+        self._points = points
+        return points
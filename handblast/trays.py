@@ -0,0 +1,87 @@
+# ---------------- Khay luôn đặt được ----------------
+# new_tray() gốc rút 3 khối độc lập, không nhìn lưới: lưới đã chật thì hay thua ngay khi khay
+# vừa làm mới. GameState(playable_tray=True) dùng playable_tray() ở đây:
+#   - tray_solution(): tìm một thứ tự + vị trí đặt hết các khối trên bitboard (có xoá dòng giữa
+#     các nước), DFS dừng ở lời giải đầu tiên. Cắt nhánh: khối đang không có chỗ không đặt
+#     trước; còn 2 khối mà một khối không có chỗ thì chỉ nước xoá được dòng mới cứu được nó
+#     (không xoá dòng thì lưới chỉ chật thêm); hai nước liền nhau cùng không xoá dòng thì đổi
+#     chỗ được nên chỉ thử một thứ tự; khối trùng hình chỉ thử một lần; memo theo (bitboard,
+#     khối còn lại) dùng chung cho mọi khay thử trong một lần làm mới
+#   - playable_tray(): rút khay như cũ (cùng new_block, cùng phân bố) tới khi đặt hết được, tối
+#     đa PLAYABLE_ATTEMPTS lần; vẫn không được thì duyệt các tổ hợp khối (thứ tự ngẫu nhiên theo
+#     rng) lấy tổ hợp đầu tiên đặt hết được. Không tổ hợp nào đặt hết được (vd. lưới còn dưới 3 ô
+#     trống) thì giữ khay rút lần cuối: không thể bảo đảm
+# Chi phí xấu nhất trên lưới dày: python benchmarks/bench_trays.py
+import itertools
+
+from handblast.engine import BLOCK_SHAPES, clear_touched_lines
+
+PLAYABLE_ATTEMPTS = 8
+
+
+def _solve(occ, rest, valid, memo, floor=-1, candidates=None):
+    # rest: tuple shape_id đã sắp xếp; valid: Geometry.valid_placements. Trả về
+    # ((shape_id, bit điểm neo), ...) hoặc None.
+    # floor: nước trước không xoá dòng và là khối floor -> nước không xoá dòng lần này chỉ dùng
+    # khối >= floor (hai nước liền nhau không xoá dòng đổi chỗ cho nhau vẫn ra cùng lưới).
+    # candidates: các nước còn trống của cha; sau nước không xoá dòng lưới chỉ chật thêm nên lọc
+    # tiếp từ đó thay vì cả valid
+    key = (occ, rest, floor)
+    if key in memo: return memo[key]
+    source = valid if candidates is None else candidates
+    free = {s: [p for p in source[s] if not occ & p[1]] for s in set(rest)}
+    if len(rest) == 1:
+        s = rest[0]
+        result = ((s, free[s][0][0]),) if free[s] else None
+        memo[key] = result
+        return result
+    # Còn 2 khối mà một khối đang không có chỗ: nước còn lại phải xoá dòng
+    stuck = len(rest) == 2 and not all(free.values())
+    result = None
+    last = None
+    for k, s in enumerate(rest):
+        if s == last or not free[s]: continue
+        last = s
+        others = rest[:k] + rest[k + 1:]
+        quiet_ok = not stuck and s >= floor
+        for bit, m, lines in free[s]:
+            after, _, combo = clear_touched_lines(occ | m, lines)
+            if combo:
+                sub = _solve(after, others, valid, memo)
+            elif quiet_ok:
+                sub = _solve(after, others, valid, memo, s, free)
+            else:
+                continue
+            if sub is not None:
+                result = ((s, bit),) + sub
+                break
+        if result is not None: break
+    memo[key] = result
+    return result
+
+
+def tray_solution(occupied, shape_ids, geo, memo=None):
+    # Chuỗi nước [(shape_id, gx, gy), ...] đặt hết các khối shape_ids (theo thứ tự đặt), None nếu không có
+    seq = _solve(occupied, tuple(sorted(shape_ids)), geo.valid_placements, {} if memo is None else memo)
+    if seq is None: return None
+    return [(s, (bit.bit_length() - 1) % geo.size, (bit.bit_length() - 1) // geo.size) for s, bit in seq]
+
+
+def playable_tray(board, draw, rng, size, shape_ids, attempts=PLAYABLE_ATTEMPTS):
+    # draw(): một block mới (GameState.new_block); shape_ids: các khối có thể ra (trọng số > 0).
+    # Trả về (khay, số khay đã rút); số khay = attempts + 1 nghĩa là đã phải duyệt tổ hợp
+    memo = {}
+    occ, geo = board.occupied, board.geo
+    for attempt in range(1, attempts + 1):
+        tray = [draw() for _ in range(size)]
+        if tray_solution(occ, [b["shape_id"] for b in tray], geo, memo) is not None: return tray, attempt
+    combos = list(itertools.combinations_with_replacement(shape_ids, size))
+    rng.shuffle(combos)
+    for combo in combos:
+        if tray_solution(occ, combo, geo, memo) is None: continue
+        # Giữ màu của khay rút lần cuối, thứ tự khối trong khay cũng ngẫu nhiên
+        order = list(combo)
+        rng.shuffle(order)
+        tray = [dict(block, shape=BLOCK_SHAPES[s], shape_id=s) for block, s in zip(tray, order)]
+        return tray, attempts + 1
+    return tray, attempts + 1
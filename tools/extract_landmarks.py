@@ -0,0 +1,190 @@
+# ---------------- Trích landmark từ video hàng loạt (nhiều process) ----------------
+# Chạy: python tools/extract_landmarks.py thư_mục_video --out landmarks/ [--workers 8] [--preset single]
+# Mỗi video được chia thành các đoạn --chunk-frames frame, các đoạn chia đều cho một pool
+# process; mỗi process có MỘT HandDetector (một mp.solutions.hands.Hands) dùng cho mọi đoạn
+# nó nhận, nên tốc độ tăng gần tuyến tính theo số nhân. HandDetector lật gương (trên toạ độ) +
+# đổi BGR->RGB y như trong game, toạ độ trả về giống hệt những gì update của HandController thấy.
+#
+# Kết quả: mỗi video một file <tên>.npz dạng cột (mỗi trường một mảng):
+#   frame (int32), t (float64, giây), present (bool), x / y (float32, [n, 21], NaN khi không thấy tay),
+#   fps, width, height, source_size, source_mtime, preset
+# Chạy lại được (resume): video đã có .npz khớp kích thước + mtime + --preset thì bỏ qua, đoạn
+# đã xong (<tên>.partNNNN.npz, lưu kèm preset, khoảng frame và kích thước + mtime video) không
+# chạy lại nếu còn khớp, đổi --preset / --chunk-frames hay video đổi thì trích lại; các file
+# đều ghi ra file tạm rồi os.replace.
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from handblast.inference import HandDetector, INFERENCE_PRESETS
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+NUM_LANDMARKS = 21
+
+_detector = None # HandDetector riêng của mỗi process con
+
+
+def _init_worker(preset):
+    global _detector
+    cv2.setNumThreads(1) # song song ở mức process, tránh mỗi process lại mở nhiều thread OpenCV
+    _detector = HandDetector(INFERENCE_PRESETS[preset])
+
+
+def save_npz(path, **arrays):
+    # Ghi file tạm rồi thay thế: bị ngắt giữa chừng không để lại file hỏng
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def output_path(out_dir, video):
+    return os.path.join(out_dir, os.path.splitext(os.path.basename(video))[0] + ".npz")
+
+
+def part_path(out_dir, video, part):
+    return output_path(out_dir, video)[:-len(".npz")] + f".part{part:04d}.npz"
+
+
+def source_stamp(video):
+    st = os.stat(video)
+    return st.st_size, st.st_mtime
+
+
+def is_done(out_path, video, preset, **bounds):
+    # .npz (kết quả hoặc một đoạn) đã có và được trích từ đúng video này với cùng preset;
+    # bounds (start, end của đoạn) nếu có cũng phải khớp
+    if not os.path.exists(out_path): return False
+    size, mtime = source_stamp(video)
+    with np.load(out_path) as data:
+        if "preset" not in data or str(data["preset"]) != preset: return False
+        if int(data["source_size"]) != size or float(data["source_mtime"]) != mtime: return False
+        return all(key in data and int(data[key]) == value for key, value in bounds.items())
+
+
+def probe(video):
+    cap = cv2.VideoCapture(video)
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    return frames, fps, width, height
+
+
+def extract_segment(task):
+    # task = (video, part, start, end, path, preset): chạy detector trên frame [start, end) của
+    # video (end = None: tới hết video, khi container không cho biết số frame)
+    video, part, start, end, path, preset = task
+    t0 = time.perf_counter()
+    _detector.reset()
+    cap = cv2.VideoCapture(video)
+    if start: cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    missing = np.full((NUM_LANDMARKS, 2), np.nan, dtype=np.float32)
+    points_list = []
+    present = []
+    frame = None # đọc lại vào cùng bộ đệm (HandDetector không giữ frame)
+    while end is None or len(present) < end - start:
+        ret, frame = cap.read(image=frame)
+        if not ret: break
+        points = _detector(frame)
+        present.append(points is not None)
+        points_list.append(missing if points is None else points)
+    cap.release()
+
+    count = len(present)
+    frame_ids = np.arange(start, start + count, dtype=np.int32)
+    xy = np.array(points_list, dtype=np.float32).reshape(count, NUM_LANDMARKS, 2)
+    size, mtime = source_stamp(video)
+    save_npz(path, frame=frame_ids, t=frame_ids / fps, present=np.array(present, dtype=bool), x=xy[:, :, 0], y=xy[:, :, 1],
+             start=start, end=-1 if end is None else end, preset=preset, source_size=size, source_mtime=mtime)
+    return video, part, count, time.perf_counter() - t0
+
+
+def merge_parts(video, parts, out_path, fps, width, height, preset):
+    columns = {"frame": [], "t": [], "present": [], "x": [], "y": []}
+    for path in parts:
+        with np.load(path) as data:
+            for key in columns: columns[key].append(data[key])
+    size, mtime = source_stamp(video)
+    save_npz(out_path, **{k: np.concatenate(v) for k, v in columns.items()},
+             fps=fps, width=width, height=height, source_size=size, source_mtime=mtime, preset=preset)
+    for path in parts: os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("videos", help="thư mục chứa video (hoặc một file video)")
+    parser.add_argument("--out", default="landmarks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--preset", choices=sorted(INFERENCE_PRESETS), default="single")
+    parser.add_argument("--chunk-frames", type=int, default=900, help="số frame mỗi đoạn giao cho một process")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.videos):
+        videos = sorted(os.path.join(args.videos, f) for f in os.listdir(args.videos) if f.lower().endswith(VIDEO_EXTS))
+    else:
+        videos = [args.videos]
+    os.makedirs(args.out, exist_ok=True)
+
+    # Lập danh sách đoạn cần chạy; video / đoạn đã xong từ lần chạy trước thì bỏ qua
+    tasks = []
+    pending = {} # video -> [số đoạn còn thiếu, danh sách file đoạn, thông tin video]
+    skipped = 0
+    for video in videos:
+        out_path = output_path(args.out, video)
+        if is_done(out_path, video, args.preset):
+            skipped += 1
+            continue
+        frames, fps, width, height = probe(video)
+        parts = []
+        missing = 0
+        # Không biết số frame: cả video là một đoạn
+        bounds = [(s, min(frames, s + args.chunk_frames)) for s in range(0, frames, args.chunk_frames)] if frames > 0 else [(0, None)]
+        for part, (start, end) in enumerate(bounds):
+            path = part_path(args.out, video, part)
+            parts.append(path)
+            if not is_done(path, video, args.preset, start=start, end=-1 if end is None else end):
+                tasks.append((video, part, start, end, path, args.preset))
+                missing += 1
+        pending[video] = [missing, parts, (out_path, fps, width, height)]
+
+    total_frames = sum(end - start for _, _, start, end, _, _ in tasks if end is not None)
+    print(f"{len(videos)} video ({skipped} đã xong), {len(tasks)} đoạn / {total_frames} frame, {args.workers} process")
+
+    def finish(video):
+        _, parts, (out_path, fps, width, height) = pending.pop(video)
+        merge_parts(video, parts, out_path, fps, width, height, args.preset)
+
+    for video in [v for v, (missing, _, _) in pending.items() if missing == 0]:
+        finish(video) # mọi đoạn đã có từ lần trước, chỉ còn ghép
+
+    t0 = time.perf_counter()
+    done_frames = 0
+    if tasks:
+        with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(args.preset,)) as pool:
+            for k, (video, part, count, seconds) in enumerate(pool.imap_unordered(extract_segment, tasks), 1):
+                done_frames += count
+                elapsed = time.perf_counter() - t0
+                rate = done_frames / elapsed if elapsed else 0.0
+                eta = (total_frames - done_frames) / rate if rate else 0.0
+                print(f"[{k}/{len(tasks)}] {os.path.basename(video)} đoạn {part}: {count} frame, {count / seconds:.1f} fps"
+                      f" | tổng {rate:.1f} fps, còn ~{eta:.0f}s", flush=True)
+                pending[video][0] -= 1
+                if pending[video][0] == 0: finish(video)
+
+    elapsed = time.perf_counter() - t0
+    if done_frames:
+        print(f"Xong {done_frames} frame trong {elapsed:.1f}s ({done_frames / elapsed:.1f} fps, {args.workers} process)")
+
+
+if __name__ == "__main__":
+    main()
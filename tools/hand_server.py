@@ -0,0 +1,116 @@
+# ---------------- Server tracking dùng chung cho nhiều cửa sổ game ----------------
+# Chạy: python tools/hand_server.py [--name hbb] [--cameras 0 1] [--inference single] [--schedule balanced]
+#       python tools/hand_server.py --replay a.hbr b.hbr    (không cần camera / MediaPipe)
+# Mỗi camera (hoặc mỗi file --replay, gán cho camera 0, 1, ...) một process con publish
+# landmark mới nhất vào shared memory "<name>-cam<camera>" (handblast.shared). Trong file game
+# đặt HAND_SERVER = "<name>" và CAMERA = số camera muốn đọc: nhiều cửa sổ đọc chung một camera.
+# Mỗi --report giây in số sample / giây của từng camera; Ctrl+C / SIGTERM để tắt (shared memory được xoá).
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.capture import CAPTURE_PRESETS
+from handblast.inference import INFERENCE_PRESETS
+from handblast.power import POWER_PRESETS
+from handblast.shared import LandmarkRing, ServerConfig, ring_name, run_publisher
+from handblast.tracking import SCHEDULE_PRESETS
+
+
+def camera_source(value):
+    # Như CAMERA của file game: số = index camera, còn lại là đường dẫn video
+    return int(value) if value.isdigit() else value
+
+
+def start_server(name, sources, config, speed=1.0):
+    # sources: [(camera, file .hbr hoặc None)]; trả về (stop event, danh sách process)
+    # "spawn": process con không thừa hưởng thread / graph MediaPipe nào của process cha
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    processes = []
+    for camera, replay in sources:
+        process = context.Process(target=run_publisher, args=(name, camera, config, stop, replay, speed),
+                                  name=f"hand-server-{camera}", daemon=True)
+        process.start()
+        processes.append((camera, process))
+    return stop, processes
+
+
+def stop_server(stop, processes, timeout=5.0):
+    stop.set()
+    for _, process in processes:
+        process.join(timeout)
+        if process.is_alive(): process.terminate()
+
+
+def attach_rings(name, processes, timeout=30.0):
+    # Chờ process con tạo ring (mở camera + dựng model có thể mất vài giây)
+    rings = {}
+    end = time.perf_counter() + timeout
+    while len(rings) < len(processes) and time.perf_counter() < end:
+        for camera, process in processes:
+            if camera in rings or not process.is_alive(): continue
+            try:
+                rings[camera] = LandmarkRing.attach(ring_name(name, camera), untrack=False)
+            except FileNotFoundError:
+                pass
+        time.sleep(0.1)
+    return rings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", default="hbb", help="HAND_SERVER trong file game")
+    parser.add_argument("--cameras", nargs="*", type=camera_source, help="index camera / đường dẫn video (mặc định 0, hoặc 0..n-1 với --replay)")
+    parser.add_argument("--replay", nargs="*", default=[], help="file .hbr thay cho camera, một file mỗi camera")
+    parser.add_argument("--speed", type=float, default=1.0, help="tốc độ nhả bản ghi")
+    parser.add_argument("--inference", choices=sorted(INFERENCE_PRESETS), default="single")
+    parser.add_argument("--schedule", choices=sorted(SCHEDULE_PRESETS), default="balanced")
+    parser.add_argument("--capture", choices=sorted(CAPTURE_PRESETS) + ["auto"], default="auto")
+    parser.add_argument("--capture-cache", default="capture.json")
+    parser.add_argument("--power", choices=sorted(POWER_PRESETS), default="balanced", help="giảm tần số detect khi không có tay")
+    parser.add_argument("--width", type=int, default=1080, help="kích thước cửa sổ game (ngưỡng optical flow tính theo px)")
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--dist-threshold", type=float, default=40)
+    parser.add_argument("--hysteresis", type=float, default=1.25)
+    parser.add_argument("--report", type=float, default=5.0)
+    args = parser.parse_args()
+
+    cameras = args.cameras if args.cameras else list(range(len(args.replay))) or [0]
+    if args.replay and len(args.replay) != len(cameras): parser.error("--replay cần đúng một file cho mỗi camera")
+    sources = list(zip(cameras, args.replay or [None] * len(cameras)))
+    config = ServerConfig(args.inference, args.schedule, args.capture, args.capture_cache, args.width, args.height,
+                          args.dist_threshold, args.dist_threshold * args.hysteresis, args.power)
+
+    # Trình quản lý dịch vụ tắt bằng SIGTERM: thoát như Ctrl+C (dừng process con, xoá shared memory)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    stop, processes = start_server(args.name, sources, config, args.speed)
+    rings = {}
+    try:
+        rings = attach_rings(args.name, processes)
+        for camera, replay in sources:
+            state = "sẵn sàng" if camera in rings else "KHÔNG chạy được"
+            print(f"{ring_name(args.name, camera)}: {'replay ' + replay if replay else f'camera {camera!r}'} - {state}")
+        last = {camera: (ring.latest_seq, time.perf_counter()) for camera, ring in rings.items()}
+        while any(process.is_alive() for _, process in processes):
+            time.sleep(args.report)
+            line = []
+            for camera, ring in rings.items():
+                seq, t = ring.latest_seq, time.perf_counter()
+                rate = (seq - last[camera][0]) / (t - last[camera][1])
+                last[camera] = seq, t
+                line.append(f"cam {camera}: {rate:5.1f} sample/s")
+            print(", ".join(line))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_server(stop, processes)
+        for ring in rings.values(): ring.close()
+
+
+if __name__ == "__main__":
+    main()
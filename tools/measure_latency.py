@@ -0,0 +1,144 @@
+# ---------------- Đo độ trễ màn hình -> camera -> con trỏ bằng nháy màn hình ----------------
+# Chạy: python tools/measure_latency.py [--camera 0] [--configs mjpg-480p yuyv-480p default] [--flashes 20]
+# Đặt camera nhìn thấy cửa sổ đo (hoặc quay camera vào màn hình, --fullscreen cho dễ). Với
+# mỗi cấu hình trong CAPTURE_PRESETS (mặc định: CAPTURE_CANDIDATES):
+#   1. probe_capture() như "auto" của game -> cột "ước lượng"
+#   2. mở camera bằng open_capture() + LatestFrameGrabber (đúng đường đọc của game)
+#   3. hiệu chỉnh: cửa sổ đen rồi trắng, độ sáng trung bình vùng giữa frame -> ngưỡng ở giữa
+#   4. --flashes lần: cửa sổ đen một khoảng ngẫu nhiên (không khớp nhịp camera), đổi sang
+#      trắng, ghi lúc display.flip() trả về; frame đầu tiên sáng quá ngưỡng là frame thấy nháy.
+#      "màn->frame" = lúc grabber nhận frame đó - lúc flip
+#   5. chạy HandDetector (--mode) trên frame đó: "màn->con trỏ" = màn->frame + thời gian suy
+#      luận + nửa frame vẽ của game (--fps), tức lúc con trỏ trung bình lên màn hình
+# Số đo gồm cả độ trễ của màn hình (compositor, panel), cảm biến và USB: đúng cái người chơi
+# thấy, nên chỉ so được các cấu hình trên cùng máy + màn hình + camera.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import pygame
+
+from handblast.capture import CAPTURE_CANDIDATES, CAPTURE_PRESETS, describe, negotiated, open_capture, probe_capture
+from handblast.inference import HandDetector, INFERENCE_PRESETS
+from handblast.pipeline import LatestFrameGrabber
+
+
+def brightness(frame):
+    h, w = frame.shape[:2]
+    return sum(cv2.mean(frame[h // 4:3 * h // 4, w // 4:3 * w // 4])[:3]) / 3
+
+
+def show(screen, color):
+    screen.fill(color)
+    pygame.display.flip()
+    return time.perf_counter()
+
+
+def wait_frame(grabber, seq, until, predicate=None):
+    # Frame mới hơn `seq` (thoả predicate nếu có) trước thời điểm `until`, hoặc None
+    while time.perf_counter() < until:
+        pygame.event.pump()
+        item = grabber.wait_newer(seq, 0.05)
+        if item is None: continue
+        seq = item[0]
+        if predicate is None or predicate(item[2]): return item
+    return None
+
+
+def settle(grabber, seconds):
+    # Đọc bỏ các frame trong `seconds` giây, trả về độ sáng trung bình của nửa sau
+    values = []
+    seq = grabber.frames_captured
+    end = time.perf_counter() + seconds
+    while True:
+        item = wait_frame(grabber, seq, end)
+        if item is None: break
+        seq = item[0]
+        values.append(brightness(item[2]))
+    return statistics.mean(values[len(values) // 2:]) if values else None
+
+
+def measure(screen, cap, detector, args):
+    grabber = LatestFrameGrabber(cap)
+    grabber.start()
+    try:
+        show(screen, (0, 0, 0))
+        dark = settle(grabber, 1.0)
+        show(screen, (255, 255, 255))
+        bright = settle(grabber, 1.0)
+        if dark is None or bright is None: return None, "không đọc được frame"
+        if bright - dark < 20: return None, f"camera không thấy nháy (đen {dark:.0f}, trắng {bright:.0f})"
+        threshold = (dark + bright) / 2
+
+        latencies, detects = [], []
+        for _ in range(args.flashes):
+            show(screen, (0, 0, 0))
+            # Chờ camera thấy lại màu đen rồi thêm một khoảng ngẫu nhiên
+            if wait_frame(grabber, grabber.frames_captured, time.perf_counter() + 1.0, lambda f: brightness(f) < threshold) is None: continue
+            time.sleep(random.uniform(0.1, 0.3))
+            seq = grabber.frames_captured
+            t_flip = show(screen, (255, 255, 255))
+            item = wait_frame(grabber, seq, t_flip + 1.0, lambda f: brightness(f) > threshold)
+            if item is None: continue
+            latencies.append(item[1] - t_flip)
+            if detector is not None:
+                t0 = time.perf_counter()
+                detector(item[2])
+                detects.append(time.perf_counter() - t0)
+        return (latencies, detects), None
+    finally:
+        grabber.stop()
+        grabber.join(timeout=1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--configs", nargs="*", choices=sorted(CAPTURE_PRESETS), default=list(CAPTURE_CANDIDATES))
+    parser.add_argument("--flashes", type=int, default=20)
+    parser.add_argument("--mode", choices=sorted(INFERENCE_PRESETS), default="single", help="INFERENCE_PRESETS để đo thời gian suy luận")
+    parser.add_argument("--no-detect", action="store_true", help="không chạy HandDetector (chỉ đo màn->frame)")
+    parser.add_argument("--fps", type=int, default=30, help="FPS vẽ của game, cộng nửa frame vào màn->con trỏ")
+    parser.add_argument("--fullscreen", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    pygame.init()
+    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN) if args.fullscreen else pygame.display.set_mode((640, 480))
+    pygame.display.set_caption("Hand Block Blast - latency")
+    detector = None if args.no_detect else HandDetector(INFERENCE_PRESETS[args.mode])
+
+    print(f"{'cấu hình':14s} {'driver dùng':28s} {'ước lượng':>9s} {'màn->frame p50':>15s} {'p95':>6s} {'min':>6s} {'màn->con trỏ':>13s}  (ms)")
+    try:
+        for name in args.configs:
+            estimate = probe_capture(args.camera, name, CAPTURE_PRESETS[name])
+            cap = open_capture(args.camera, CAPTURE_PRESETS[name])
+            if not cap.isOpened():
+                print(f"{name:14s} không mở được camera {args.camera}")
+                continue
+            actual = describe(negotiated(cap))
+            result, error = measure(screen, cap, detector, args)
+            cap.release()
+            guess = f"{estimate.latency * 1000:9.1f}" if estimate.latency is not None else f"{'-':>9s}"
+            if error or not result[0]:
+                print(f"{name:14s} {actual:28s} {guess} {error or 'không bắt được lần nháy nào'}")
+                continue
+            latencies, detects = sorted(result[0]), result[1]
+            p50 = statistics.median(latencies)
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            cursor = p50 + (statistics.median(detects) if detects else 0.0) + 0.5 / args.fps
+            print(f"{name:14s} {actual:28s} {guess} {p50 * 1000:15.1f} {p95 * 1000:6.1f} {latencies[0] * 1000:6.1f} {cursor * 1000:13.1f}")
+    finally:
+        if detector is not None: detector.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
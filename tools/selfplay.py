@@ -0,0 +1,77 @@
+# ---------------- Self-play: so các bộ luật bằng hàng triệu ván ----------------
+# Chạy: python tools/selfplay.py [--games 100000] [--policy random|greedy|lookahead] [--rules default no-single line-x2]
+#       python tools/selfplay.py --weights 1,1,1,1,2,2,1,1,1,1 --line-bonus 12 --games 1000000
+# Mỗi bộ luật (RULE_PRESETS trong handblast/selfplay.py, hoặc --weights / --line-bonus / --size
+# đè lên preset) chơi --games ván trên --processes process, in điểm (trung bình, p10/p50/p90,
+# cao nhất), số nước mỗi ván, tỉ lệ nước xoá được dòng, số dòng / nước, rồi tỉ lệ kẹt của từng
+# khối (khối còn trong khay lúc hết ván / số lần khối đó ra). Cùng --seed thì cùng kết quả.
+# --json: ghi summary() của từng bộ luật ra file để so về sau.
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from handblast.engine import BLOCK_SHAPES
+from handblast.selfplay import POLICIES, RULE_PRESETS, run_selfplay
+
+
+def parse_weights(value):
+    weights = tuple(float(w) for w in value.split(","))
+    if len(weights) != len(BLOCK_SHAPES):
+        raise argparse.ArgumentTypeError(f"cần {len(BLOCK_SHAPES)} trọng số (một cho mỗi khối trong BLOCK_SHAPES)")
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--rules", nargs="*", choices=sorted(RULE_PRESETS), default=["default"])
+    parser.add_argument("--weights", type=parse_weights, help="trọng số new_block của từng khối, cách nhau bởi dấu phẩy")
+    parser.add_argument("--line-bonus", type=int, help="điểm mỗi dòng xoá (luật gốc: cạnh lưới)")
+    parser.add_argument("--size", type=int, help="cạnh lưới")
+    parser.add_argument("--max-moves", type=int, help="dừng ván dài hơn bấy nhiêu nước")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, help="mặc định: số nhân")
+    parser.add_argument("--chunk", type=int, help="số ván mỗi lô gửi cho một process")
+    parser.add_argument("--json", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    overrides = {k: v for k, v in (("shape_weights", args.weights), ("line_bonus", args.line_bonus),
+                                   ("size", args.size), ("max_moves", args.max_moves)) if v is not None}
+    results = {}
+    print(f"{args.games} ván / bộ luật, policy {args.policy}, seed {args.seed}, {args.processes or os.cpu_count()} process")
+    print(f"{'luật':12s} {'điểm TB':>8s} {'p10':>5s} {'p50':>5s} {'p90':>6s} {'max':>6s} {'nước TB':>8s} {'xoá dòng':>9s} {'dòng/nước':>10s} {'chạm max':>9s} {'ván/s':>7s}")
+    for name in args.rules:
+        rules = RULE_PRESETS[name]._replace(**overrides)
+        t0 = last = time.perf_counter()
+
+        def progress(stats):
+            nonlocal last
+            if sys.stderr.isatty() and time.perf_counter() - last > 2:
+                last = time.perf_counter()
+                print(f"\r  {stats.games}/{args.games} ván...", end="", file=sys.stderr, flush=True)
+
+        stats = run_selfplay(args.games, rules, args.policy, args.seed, args.processes, args.chunk, progress)
+        elapsed = time.perf_counter() - t0
+        if sys.stderr.isatty(): print("\r" + " " * 40 + "\r", end="", file=sys.stderr)
+        s = stats.summary()
+        results[name] = dict(s, rules=rules._asdict(), policy=args.policy, seed=args.seed)
+        print(f"{name:12s} {s['score_mean']:8.1f} {s['score_p10']:5d} {s['score_p50']:5d} {s['score_p90']:6d} {s['score_max']:6d} "
+              f"{s['length_mean']:8.1f} {s['clear_rate']:9.1%} {s['lines_per_move']:10.3f} {s['capped']:9d} {stats.games / elapsed:7.0f}")
+
+    print("\nTỉ lệ kẹt theo khối (khối còn trong khay lúc hết ván / số lần ra)")
+    print(f"{'khối':>4s} {'ô':>2s} " + " ".join(f"{name:>12s}" for name in results))
+    for k, shape in enumerate(BLOCK_SHAPES):
+        print(f"{k:4d} {len(shape):2d} " + " ".join(f"{r['stuck_rate'][k]:12.2%}" for r in results.values()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()